@@ -0,0 +1,38 @@
+"""Time importing the package in a fresh interpreter.
+
+Each statement is run in a new Python process, so that no modules are
+cached, and the best wall time over several runs is reported.
+
+Usage: python benchmarks/bench_import.py [n_runs]
+"""
+
+import subprocess
+import sys
+import time
+
+
+STATEMENTS = (
+    "pass",
+    "import solardat",
+    "from solardat import parse_archival",
+    "from solardat.descriptions import lookup_code",
+    "from solardat.descriptions import lookup_code; lookup_code('1001')",
+    "from solardat import fetch_file",
+    "from solardat import fetch_many",
+)
+
+
+def time_statement(statement: str, n_runs: int) -> float:
+    timings = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for statement in STATEMENTS:
+        best = time_statement(statement, n_runs)
+        print(f"{best * 1e3:7.1f} ms  {statement}")
@@ -0,0 +1,40 @@
+"""Time quality control masks over a few million rows of flags.
+
+Usage: python benchmarks/bench_qc.py
+"""
+
+from array import array
+from collections import OrderedDict
+import random
+import timeit
+
+from solardat.qc import all_good, categorize, filter_columns
+
+
+N_ROWS = 5_000_000
+ELEMENTS = ("1001", "2011", "3001")
+
+
+def best_of(func, number: int = 1) -> float:
+    return min(timeit.repeat(func, repeat=3, number=number)) / number
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    columns = OrderedDict()
+    columns["ending_time"] = array("q", range(0, N_ROWS * 60, 60))
+    for element in ELEMENTS:
+        columns[element] = array("d", bytes(8 * N_ROWS))
+        flags = [99 if rng.random() < 0.01 else 11 for _ in range(N_ROWS)]
+        columns[f"{element}_FLAG"] = array("B", flags)
+
+    mask = all_good(columns)
+    timings = {
+        "all_good": best_of(lambda: all_good(columns)),
+        "categorize": best_of(lambda: categorize(columns["1001_FLAG"])),
+        "filter_columns": best_of(lambda: filter_columns(columns, mask)),
+    }
+
+    print(f"{N_ROWS} rows, {mask.count(1)} good")
+    for name, timing in timings.items():
+        print(f"{name:>16}: {timing * 1e3:8.1f} ms")
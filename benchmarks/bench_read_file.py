@@ -0,0 +1,39 @@
+"""Time reading local archival data files.
+
+A month of synthetic one-minute data is written to a temporary file
+and read with :func:`~solardat.decode.parse_archival`, as well as the
+memory-mapped readers.
+
+Usage: python benchmarks/bench_read_file.py
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import timeit
+
+from solardat.decode import parse_archival, read_file, read_file_columns
+from synthetic import make_archival
+
+
+def best_of(func, number: int = 1) -> float:
+    return min(timeit.repeat(func, repeat=3, number=number)) / number
+
+def parse_text(path: Path):
+    with open(path) as fh:
+        return parse_archival(fh)
+
+
+if __name__ == "__main__":
+    with TemporaryDirectory() as directory:
+        path = Path(directory, "EUPO1801.txt")
+        path.write_text(make_archival())
+
+        timings = {
+            "parse_archival": best_of(lambda: parse_text(path)),
+            "read_file": best_of(lambda: read_file(path)),
+            "read_file (1 column)": best_of(lambda: read_file(path, ["1001"])),
+            "read_file_columns": best_of(lambda: read_file_columns(path)),
+        }
+
+    for name, timing in timings.items():
+        print(f"{name:>22}: {timing * 1e3:8.1f} ms")
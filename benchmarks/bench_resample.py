@@ -0,0 +1,38 @@
+"""Time aggregating a month of one-minute data into hourly windows.
+
+The row-based aggregation runs over the lazily decoded rows of
+:func:`~solardat.decode.iter_archival`, and the columnar aggregation
+over the output of :func:`~solardat.decode.parse_columns`.
+
+Usage: python benchmarks/bench_resample.py
+"""
+
+from io import StringIO
+import timeit
+
+from solardat.decode import iter_archival, parse_columns
+from solardat.resample import resample_columns, resample_rows
+from synthetic import make_archival
+
+
+def best_of(func, number: int = 1) -> float:
+    return min(timeit.repeat(func, repeat=3, number=number)) / number
+
+def resample_text(contents: str):
+    with StringIO(contents) as buffer:
+        _, rows = iter_archival(buffer)
+        return list(resample_rows(rows, "H"))
+
+
+if __name__ == "__main__":
+    contents = make_archival()
+    with StringIO(contents) as buffer:
+        _, columns = parse_columns(buffer)
+
+    timings = {
+        "decode + resample_rows": best_of(lambda: resample_text(contents)),
+        "resample_columns": best_of(lambda: resample_columns(columns, "H")),
+    }
+
+    for name, timing in timings.items():
+        print(f"{name:>24}: {timing * 1e3:8.1f} ms")
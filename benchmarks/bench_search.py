@@ -0,0 +1,37 @@
+"""Time parsing of large search results pages.
+
+The search results fixture is scaled up by repeating its station
+blocks, and parsed with :func:`~solardat.search.extract_rel_links`.
+
+Usage: python benchmarks/bench_search.py [n_repeats]
+"""
+
+from pathlib import Path
+import sys
+import timeit
+
+from solardat.search import extract_rel_links
+
+
+FIXTURE = Path(__file__).parents[1] / "tests/data/eugene-silver-lake-stripped.html"
+# Boundaries of the station blocks in the search results table.
+BLOCKS_START = b'<td colspan="3" width="385"'
+BLOCKS_END = b"</table>\n</table>"
+
+
+def scale_page(page: bytes, n_repeats: int) -> bytes:
+    start = page.rindex(b"<tr>", 0, page.index(BLOCKS_START))
+    end = page.index(BLOCKS_END)
+    return page[:start] + page[start:end] * n_repeats + page[end:]
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    page = scale_page(FIXTURE.read_bytes(), n_repeats)
+    links = extract_rel_links(page)
+    n_links = sum(map(len, links.values()))
+
+    timer = timeit.Timer(lambda: extract_rel_links(page))
+    n_loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=3, number=n_loops)) / n_loops
+    print(f"{len(page) / 1e6:.1f} MB, {n_links} links: {best * 1e3:.1f} ms per parse")
@@ -0,0 +1,33 @@
+"""Time loading a year of one-minute data into SQLite.
+
+Usage: python benchmarks/bench_sqlite.py
+"""
+
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sqlite3
+import time
+
+from solardat.decode import iter_archival
+from solardat.sqlite import load
+from synthetic import make_archival
+
+
+def stream(contents):
+    for month, text in enumerate(contents, start=1):
+        station_id, rows = iter_archival(StringIO(text))
+        yield f"EUPO18{month:02d}", station_id, rows
+
+
+if __name__ == "__main__":
+    contents = [make_archival(month=month, seed=month) for month in range(1, 13)]
+
+    with TemporaryDirectory() as directory:
+        connection = sqlite3.connect(str(Path(directory, "bench.db")))
+        start = time.perf_counter()
+        n_rows = load(connection, stream(contents))
+        elapsed = time.perf_counter() - start
+        connection.close()
+
+    print(f"{n_rows} rows in {elapsed:.1f} s, including decoding")
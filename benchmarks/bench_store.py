@@ -0,0 +1,40 @@
+"""Time reading a year of data from the columnar store.
+
+A year of synthetic one-minute data for a station is written to a
+temporary store, and a single element is read back. Decoding the same
+data from text is timed for comparison.
+
+Usage: python benchmarks/bench_store.py
+"""
+
+from io import StringIO
+from tempfile import TemporaryDirectory
+import timeit
+
+from solardat.decode import parse_archival, parse_columns
+from solardat.store import ColumnStore
+from synthetic import make_archival
+
+
+def best_of(func, number: int = 3) -> float:
+    return min(timeit.repeat(func, repeat=3, number=number)) / number
+
+
+if __name__ == "__main__":
+    contents = [make_archival(month=month, seed=month) for month in range(1, 13)]
+
+    with TemporaryDirectory() as root:
+        store = ColumnStore(root)
+        for month, text in enumerate(contents, start=1):
+            with StringIO(text) as buffer:
+                station_id, columns = parse_columns(buffer)
+            store.write(f"EUPO18{month:02d}", station_id, columns)
+        store.save()
+
+        n_rows = len(store.read(94255, ["1001"])["1001"])
+        read = best_of(lambda: ColumnStore(root).read(94255, ["1001", "1001_FLAG"]))
+        decode = best_of(lambda: [parse_archival(StringIO(text)) for text in contents], 1)
+
+    print(f"{n_rows} rows")
+    print(f"store read:  {read * 1e3:8.1f} ms")
+    print(f"text decode: {decode * 1e3:8.1f} ms")
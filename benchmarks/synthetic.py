@@ -0,0 +1,42 @@
+"""Generate synthetic archival data files for benchmarks."""
+
+from calendar import monthrange
+from datetime import date
+import random
+
+
+ELEMENTS = ("1001", "2011", "3001", "9301", "9331")
+
+
+def make_archival(
+    station_id: int = 94255,
+    year: int = 2018,
+    month: int = 1,
+    interval: int = 1,
+    elements=ELEMENTS,
+    seed: int = 0,
+) -> str:
+    """Make the contents of an archival data file.
+
+    ``interval`` is the length of the measurement intervals, in
+    minutes.
+    """
+
+    rng = random.Random(seed)
+    header = [str(station_id), str(year)]
+    for element in elements:
+        header.extend([element, "0"])
+    lines = ["\t".join(header)]
+
+    first_doy = date(year, month, 1).timetuple().tm_yday
+    n_days = monthrange(year, month)[1]
+    for doy in range(first_doy, first_doy + n_days):
+        for minutes in range(interval, 24 * 60 + 1, interval):
+            hours, minutes_ = divmod(minutes, 60)
+            fields = [str(doy), str(hours * 100 + minutes_)]
+            for _ in elements:
+                fields.append(f"{rng.uniform(0, 1000):.1f}")
+                fields.append(rng.choice(("11", "12", "13", "99")))
+            lines.append("\t".join(fields))
+
+    return "\n".join(lines) + "\n"
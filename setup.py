@@ -7,9 +7,16 @@ setup(
     author_email="davidsamuellaw@gmail.com",
     license="MIT",
     install_requires=[
+        "aiohttp",
         "lxml",
         "requests",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
+    entry_points={
+        "console_scripts": ["solardat = solardat.cli:main"],
+    },
     packages=["solardat"],
     package_data={"solardat": ["resources/*"]},
     classifiers=[
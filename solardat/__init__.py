@@ -1,4 +1,45 @@
-from .async_fetch import fetch_many
-from .decode import parse_archival, read_raw
-from .fetch import fetch_compressed, fetch_file, find_compressed, find_files
-from .search import fetch_stations
+from importlib import import_module
+import sys
+
+
+# Public names, by the submodule that defines them. Submodules are
+# imported on first access, so that e.g. only decoding local files
+# does not import the HTTP clients or HTML parser.
+_exports = {
+    "fetch_many": "async_fetch",
+    "parse_archival": "decode",
+    "read_raw": "decode",
+    "fetch_compressed": "fetch",
+    "fetch_file": "fetch",
+    "find_compressed": "fetch",
+    "find_files": "fetch",
+    "fetch_stations": "search",
+}
+
+__all__ = sorted(_exports)
+
+
+def _load(name: str):
+    module = import_module(f".{_exports[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name: str):
+        if name in _exports:
+            return _load(name)
+        try:
+            return import_module(f".{name}", __name__)
+        except ModuleNotFoundError as exc:
+            # Only a missing submodule, not a missing dependency.
+            if exc.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    def __dir__():
+        return sorted({*globals(), *_exports})
+else:
+    # Module level `__getattr__` is not supported before Python 3.7.
+    for _name in __all__:
+        _load(_name)
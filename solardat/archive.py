@@ -0,0 +1,83 @@
+"""Archival data file naming conventions.
+
+Archival data files are named after the station, the interval length
+of the measurements and the month the data covers. For example,
+``EUPQ1801.txt`` holds fifteen-minute data ("Q") for January 2018 from
+the Eugene station (prefix "EUP").
+"""
+
+from datetime import timedelta
+from pathlib import PurePosixPath
+from typing import NamedTuple
+from urllib.parse import urlparse
+import re
+
+
+ARCHIVE_DIR = "download/Archive"
+
+# Interval length of the measurements, by file type letter.
+INTERVALS = {
+    "O": timedelta(minutes=1),
+    "F": timedelta(minutes=5),
+    "Q": timedelta(minutes=15),
+    "H": timedelta(hours=1),
+}
+
+# Two digit years before this are in the 21st century.
+_CENTURY_PIVOT = 70
+_FILENAME_PATTERN = re.compile(r"^(\w{3})(\w)(\d{2})(\d{2})$")
+
+
+class ArchiveFile(NamedTuple):
+    """Components of an archival data file name."""
+
+    prefix: str
+    file_type: str
+    year: int
+    month: int
+
+    @property
+    def stem(self) -> str:
+        return f"{self.prefix}{self.file_type}{self.year % 100:02d}{self.month:02d}"
+
+    @property
+    def path(self) -> str:
+        return f"{ARCHIVE_DIR}/{self.stem}.txt"
+
+
+def expand_year(year: int) -> int:
+    if year >= 100:
+        return year
+    century = 1900 if year >= _CENTURY_PIVOT else 2000
+    return century + year
+
+def to_path(url: str) -> str:
+    """Get the URL path component used to request a resource."""
+    return urlparse(url).path.lstrip("/")
+
+def parse_filename(path: str) -> ArchiveFile:
+    """Split an archival data file's name into its components.
+
+    Parameters
+    ----------
+    path : str
+        URL, URL path component or filename of an archival data
+        file.
+
+    Returns
+    -------
+    ArchiveFile
+
+    Examples
+    --------
+    >>> parse_filename("download/Archive/EUPQ1801.txt")
+    ArchiveFile(prefix='EUP', file_type='Q', year=2018, month=1)
+    """
+
+    stem = PurePosixPath(to_path(path)).stem
+    match = _FILENAME_PATTERN.match(stem)
+    if match is None:
+        raise ValueError(f"Not an archival data file: {path}")
+
+    prefix, file_type, year, month = match.groups()
+    return ArchiveFile(prefix, file_type, expand_year(int(year)), int(month))
@@ -1,14 +1,33 @@
 """Asynchronous versions of fetching data."""
 
-from aiohttp import ClientResponse, ClientSession
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession
 from pathlib import Path
 from requests.cookies import cookiejar_from_dict
 from requests.models import Response
 from requests.structures import CaseInsensitiveDict
-from typing import Iterable, List, Tuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+import asyncio
 
 from .decode import Row, read_raw
-from .http import _cache, add_etag, make_url
+from .http import (
+    Revalidation,
+    _cache,
+    _to_revalidate,
+    add_etag,
+    make_url,
+    should_retry,
+)
+from .throttle import RETRY_STATUSES, AsyncThrottle, retry_async
 
 
 # XXX: Creating a subclass of `Response` with restricted access would be
@@ -40,10 +59,103 @@ async def wrap_async(response: ClientResponse) -> Response:
     wrapped.cookies = cookiejar_from_dict(response.cookies)
     return wrapped
 
-async def fetch_file(session: ClientSession, path: str, **kwds) -> Tuple[int, List[Row]]:
+class AsyncSingleFlight(object):
+    """Share one coroutine among concurrent tasks with the same key.
+
+    Asynchronous version of :class:`~solardat.http.SingleFlight`. The
+    shared coroutine runs as a task, which is not cancelled when one of
+    the tasks awaiting it is.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Tuple[Any, Hashable], asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        # Tasks belong to an event loop, so calls are not shared between
+        # loops.
+        loop_key = (asyncio.get_event_loop(), key)
+        future = self._calls.get(loop_key)
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self._calls[loop_key] = future
+            future.add_done_callback(lambda _: self._calls.pop(loop_key, None))
+        return await asyncio.shield(future)
+
+# Downloads and decoding of files in flight, by path.
+_flights = AsyncSingleFlight()
+# Limits requests sent by `fetch_file`.
+_throttle = AsyncThrottle()
+
+def should_retry_async(exc: Exception) -> Optional[float]:
+    """Get whether a failed request should be retried.
+
+    Asynchronous version of :func:`~solardat.http.should_retry`.
+    """
+
+    if isinstance(exc, (ClientConnectionError, asyncio.TimeoutError)):
+        return 0.
+    return should_retry(exc)
+
+async def _throttled(
+    session: ClientSession,
+    method: str,
+    path: str,
+    kwds: Dict[str, Any],
+    urgent: bool = False,
+) -> Response:
+    await _throttle.acquire(urgent)
+    ok = False
+    latency = None
+    try:
+        started = _throttle.clock()
+        async with session.request(method, make_url(path), **kwds) as response:
+            # The time to the headers, which does not depend on the size
+            # of the response.
+            latency = _throttle.clock() - started
+            wrapped = await wrap_async(response)
+        ok = wrapped.status_code not in RETRY_STATUSES
+    finally:
+        await _throttle.release(ok, latency)
+    return wrapped
+
+async def get_response(session: ClientSession, path: str, **kwds) -> Response:
+    """Send a GET request for a path, bypassing the response cache.
+
+    Requests are throttled and retried as by :func:`fetch_file`, for
+    downloads that keep their own validators, e.g.
+    :func:`~solardat.sync.sync_files`.
+
+    Returns
+    -------
+    requests.Response
+        The response, with its content read, see :func:`wrap_async`.
+        Error statuses are raised as ``requests.HTTPError``, while
+        ``304 Not Modified`` responses are returned.
+    """
+
+    async def send() -> Response:
+        response = await _throttled(session, "GET", path, kwds)
+        response.raise_for_status()
+        return response
+
+    return await retry_async(send, should_retry_async)
+
+async def fetch_file(
+    session: ClientSession,
+    path: str,
+    urgent: bool = False,
+    **kwds,
+) -> Tuple[int, List[Row]]:
     """Get the contents of an archival data file asynchronously.
 
     Asynchronous version of :func:`~solardat.fetch.fetch_file`.
+    Requests are throttled and retried as by
+    :func:`~solardat.http.dispatch`. Concurrent calls for the same path
+    and urgency without additional parameters share one download and
+    decode, and receive the same rows, which should not be modified.
 
     Parameters
     ----------
@@ -52,6 +164,9 @@ async def fetch_file(session: ClientSession, path: str, **kwds) -> Tuple[int, Li
     path : str
         URL path component to the archival data file to
         be retrieved.
+    urgent : bool
+        Send requests ahead of those waiting for the throttle, see
+        :meth:`~solardat.throttle.AsyncThrottle.acquire`.
     **kwds
         Additional parameters to be used in the request.
 
@@ -61,19 +176,48 @@ async def fetch_file(session: ClientSession, path: str, **kwds) -> Tuple[int, Li
         The archival data, as well as the station's id.
     """
 
+    if kwds:
+        return await _fetch_file(session, path, urgent, kwds)
+    # Urgent calls do not join downloads waiting for the throttle.
+    return await _flights.do(
+        (path, urgent), lambda: _fetch_file(session, path, urgent, {})
+    )
+
+async def _fetch_file(
+    session: ClientSession,
+    path: str,
+    urgent: bool,
+    kwds: Dict[str, Any],
+) -> Tuple[int, List[Row]]:
+    checked = await retry_async(
+        lambda: _get(session, path, kwds, urgent), should_retry_async
+    )
+    station_id, rows = read_raw(checked.text)
+    return station_id, rows
+
+async def _get(
+    session: ClientSession,
+    path: str,
+    kwds: Dict[str, Any],
+    urgent: bool = False,
+) -> Response:
+    # The ETag is looked up for each attempt, as the cached response
+    # may change in between.
     headers = add_etag(path, kwds.get("headers", {}))
     if headers:
-        kwds["headers"] = headers
+        kwds = {**kwds, "headers": headers}
 
-    async with session.get(make_url(path), **kwds) as response:
-        wrapped = await wrap_async(response)
-        checked = _cache.check_response(path, wrapped)
-        station_id, rows = read_raw(checked.text)
-        return station_id, rows
+    wrapped = await _throttled(session, "GET", path, kwds, urgent)
+    return _cache.check_response(path, wrapped)
 
 _Ret = Tuple[str, int, List[Row]]
 
-async def fetch_many(session: ClientSession, paths: Iterable[str], **kwds) -> List[_Ret]:
+async def fetch_many(
+    session: ClientSession,
+    paths: Iterable[str],
+    failed: Optional[Dict[str, Exception]] = None,
+    **kwds,
+) -> List[_Ret]:
     """Get contents of multiple archival data files asynchronously.
 
     Parameters
@@ -83,6 +227,10 @@ async def fetch_many(session: ClientSession, paths: Iterable[str], **kwds) -> Li
     paths : Iterable[str]
         URL path components to the archival data files to
         be retrieved.
+    failed : Dict[str, Exception], optional
+        If given, files that could not be retrieved are left out of the
+        results, and their errors are added to it by path. Otherwise,
+        the first error is raised.
     **kwds
         Additional parameters to be used in each request.
 
@@ -116,6 +264,65 @@ async def fetch_many(session: ClientSession, paths: Iterable[str], **kwds) -> Li
     results = []
     for path in paths:
         filestem = Path(path).stem
-        station_id, rows = await fetch_file(session, path, **kwds)
+        try:
+            station_id, rows = await fetch_file(session, path, **kwds)
+        except Exception as exc:
+            if failed is None:
+                raise
+            failed[path] = exc
+            continue
         results.append((filestem, station_id, rows))
     return results
+
+async def _is_unchanged(session: ClientSession, path: str, etag: str) -> bool:
+    async def head() -> Response:
+        headers = {"If-None-Match": etag}
+        wrapped = await _throttled(session, "HEAD", path, {"headers": headers})
+        wrapped.raise_for_status()
+        return wrapped
+
+    response = await retry_async(head, should_retry_async)
+    # Some servers answer conditional HEAD requests in full.
+    if response.status_code == 304 or response.headers.get("ETag") == etag:
+        _cache.mark_validated(path)
+        return True
+    return False
+
+async def revalidate(
+    session: ClientSession,
+    paths: Iterable[str],
+    max_age: Optional[float] = None,
+) -> Revalidation:
+    """Check which cached responses are out of date asynchronously.
+
+    Asynchronous version of :func:`~solardat.http.revalidate`, with
+    requests limited by the throttle of :func:`fetch_file`.
+
+    Examples
+    --------
+    >>> async def refresh(paths):
+    ...     async with aiohttp.ClientSession() as session:
+    ...         result = await revalidate(session, paths)
+    ...         return await fetch_many(session, result.changed)
+    """
+
+    result = Revalidation([], [], {})
+    etags = _to_revalidate(paths, max_age, result)
+
+    outcomes = await asyncio.gather(
+        *(_is_unchanged(session, path, etag) for path, etag in etags.items()),
+        return_exceptions=True,
+    )
+    for path, outcome in zip(etags, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, Exception):
+            result.failed[path] = outcome
+        elif outcome:
+            result.unchanged.append(path)
+        else:
+            result.changed.append(path)
+
+    result.changed.sort()
+    result.unchanged.sort()
+    return result
@@ -0,0 +1,338 @@
+"""Command line interface.
+
+Usage::
+
+    solardat stations
+    solardat search --start 2018-01 --end 2018-12 Eugene "Silver Lake"
+    solardat download --start 2018-01 --end 2018-12 --output mirror Eugene
+    solardat resume --output mirror
+
+Downloads are mirrored with :func:`~solardat.sync.sync_files`. The
+paths of a download that are pending and done are kept in a job file
+in the output directory, so that an interrupted download is resumed
+without searching for the files again, and only files that are not
+done are requested.
+
+Downloads can also be spread over several hosts with a shared queue,
+see :mod:`~solardat.workqueue`::
+
+    solardat enqueue --queue /shared/queue.db --start 2010-01 --end 2019-12 Eugene
+    solardat work --queue /shared/queue.db --output /shared/mirror
+"""
+
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, TextIO, Union
+import asyncio
+import json
+import sys
+import time
+
+from .archive import parse_filename
+from .files import write_atomic
+from .sync import DEFAULT_LIMIT, SAVE_EVERY, SyncResult
+
+
+MONTH_FORMAT = "%Y-%m"
+# Seconds between progress reports.
+REPORT_INTERVAL = 1.
+# Name of the job file of a download, in its output directory.
+JOB_NAME = "job.json"
+
+
+def parse_month(value: str) -> date:
+    try:
+        return datetime.strptime(value, MONTH_FORMAT).date()
+    except ValueError:
+        raise ArgumentTypeError(f"Expected a month as YYYY-MM, got {value!r}")
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"Expected a positive number, got {value!r}")
+    return number
+
+
+class ThroughputReporter(object):
+    """Report the throughput of a download as files complete.
+
+    Used as the progress callback of :func:`~solardat.sync.sync_files`.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        stream: Optional[TextIO] = None,
+        interval: float = REPORT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.total = total
+        self.stream = sys.stderr if stream is None else stream
+        self.interval = interval
+        self.clock = clock
+        self.started = clock()
+        self.last_report: Optional[float] = None
+        self.files = 0
+        self.failures = 0
+        self.n_bytes = 0
+        self.rows = 0
+
+    def __call__(self, path: str, content: Optional[bytes]) -> None:
+        self.files += 1
+        if content is not None:
+            self.n_bytes += len(content)
+            # Each line but the header is a row.
+            self.rows += max(content.count(b"\n") - 1, 0)
+        self._maybe_report()
+
+    def failed(self, path: str, exc: Exception) -> None:
+        """Count a failed file, as the failure callback of ``sync_files``."""
+        self.failures += 1
+        self._maybe_report()
+
+    def _maybe_report(self) -> None:
+        now = self.clock()
+        if self.last_report is None or now - self.last_report >= self.interval:
+            self.report(now)
+
+    def format(self, now: float) -> str:
+        elapsed = max(now - self.started, 1e-9)
+        return (
+            f"{self.files + self.failures}/{self.total} files, "
+            f"{self.failures} failed, "
+            f"{self.files / elapsed:.1f} files/s, "
+            f"{self.n_bytes / elapsed / 1e6:.2f} MB/s, "
+            f"{self.rows / elapsed:.0f} rows/s"
+        )
+
+    def report(self, now: Optional[float] = None) -> None:
+        now = self.clock() if now is None else now
+        self.last_report = now
+        print(self.format(now), file=self.stream, flush=True)
+
+
+class DownloadJob(object):
+    """Paths of a download that are pending and done.
+
+    Paths are done once they are mirrored or found unchanged. Failed
+    paths stay pending, to be tried again when the job is resumed.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        pending: Iterable[str],
+        done: Iterable[str] = (),
+    ) -> None:
+        self.path = Path(path)
+        self.done = set(done)
+        self.pending = set(pending) - self.done
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "DownloadJob":
+        data = json.loads(Path(path).read_text())
+        return cls(path, data["pending"], data["done"])
+
+    def save(self) -> None:
+        data = {"pending": sorted(self.pending), "done": sorted(self.done)}
+        write_atomic(self.path, json.dumps(data, indent=2).encode())
+
+    def __call__(self, path: str, content: Optional[bytes]) -> None:
+        """Mark a path as done, as the progress callback of ``sync_files``."""
+        self.pending.discard(path)
+        self.done.add(path)
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+            self._unsaved = 0
+
+
+def make_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="solardat", description="Solar radiation archival data")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    commands.add_parser("stations", help="list stations with archival data")
+
+    def add_search_arguments(command: ArgumentParser) -> None:
+        command.add_argument("stations", nargs="+", metavar="station")
+        command.add_argument("--start", type=parse_month, required=True,
+                             help="first month, as YYYY-MM")
+        command.add_argument("--end", type=parse_month, required=True,
+                             help="last month, as YYYY-MM")
+        command.add_argument("--file-type", action="append", dest="file_types",
+                             choices=["O", "F", "Q", "H"],
+                             help="only include files of this type, may be repeated")
+
+    search = commands.add_parser("search", help="list archival data files")
+    add_search_arguments(search)
+
+    def add_download_arguments(command: ArgumentParser) -> None:
+        command.add_argument("-o", "--output", required=True,
+                             help="directory to mirror the files into")
+        command.add_argument("-j", "--workers", type=positive_int,
+                             default=DEFAULT_LIMIT,
+                             help="number of concurrent downloads")
+        command.add_argument("--max-age", type=float,
+                             help="do not revalidate files fetched within this many "
+                                  "seconds")
+        command.add_argument("-q", "--quiet", action="store_true",
+                             help="do not report progress")
+
+    download = commands.add_parser("download", help="mirror archival data files")
+    add_search_arguments(download)
+    add_download_arguments(download)
+
+    resume = commands.add_parser("resume", help="resume an interrupted download")
+    add_download_arguments(resume)
+
+    enqueue = commands.add_parser("enqueue", help="add archival data files to a queue")
+    add_search_arguments(enqueue)
+    enqueue.add_argument("--queue", required=True, help="queue file")
+
+    work = commands.add_parser("work", help="mirror archival data files from a queue")
+    work.add_argument("--queue", required=True, help="queue file")
+    work.add_argument("-o", "--output", required=True,
+                      help="directory to mirror the files into")
+    work.add_argument("-j", "--workers", type=positive_int, default=DEFAULT_LIMIT,
+                      help="number of concurrent downloads")
+    work.add_argument("--batch-size", type=positive_int, default=None,
+                      help="number of files to claim at once")
+
+    return parser
+
+def _filter_types(paths: Iterable[str], file_types: Optional[List[str]]) -> List[str]:
+    if not file_types:
+        return list(paths)
+    return [path for path in paths if parse_filename(path).file_type in file_types]
+
+def run_stations(args: Namespace) -> int:
+    from .search import fetch_stations
+
+    for station in fetch_stations():
+        print(station)
+    return 0
+
+def run_search(args: Namespace) -> int:
+    from .archive import to_path
+    from .fetch import find_files
+
+    results = find_files(args.start, args.end, args.stations)
+    for station, urls in results.items():
+        for path in _filter_types(map(to_path, urls), args.file_types):
+            print(f"{station}\t{path}")
+    return 0
+
+async def _download(
+    job: DownloadJob,
+    args: Namespace,
+    reporter: Optional[ThroughputReporter],
+) -> SyncResult:
+    import aiohttp
+    from .sync import sync_files
+
+    def progress(path: str, content: Optional[bytes]) -> None:
+        job(path, content)
+        if reporter is not None:
+            reporter(path, content)
+
+    async with aiohttp.ClientSession() as session:
+        return await sync_files(
+            session,
+            sorted(job.pending),
+            args.output,
+            limit=args.workers,
+            max_age=args.max_age,
+            progress=progress,
+            failure=None if reporter is None else reporter.failed,
+        )
+
+def _run_job(job: DownloadJob, args: Namespace) -> int:
+    reporter = None if args.quiet else ThroughputReporter(len(job.pending))
+
+    # The job and the manifest are saved when the download is cancelled,
+    # so it can be resumed.
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(_download(job, args, reporter))
+    try:
+        result = loop.run_until_complete(task)
+    except KeyboardInterrupt:
+        task.cancel()
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        print("Interrupted, run `solardat resume` to resume", file=sys.stderr)
+        return 130
+    finally:
+        job.save()
+        loop.close()
+
+    if reporter is not None:
+        reporter.report()
+    print(
+        f"{len(result.fetched)} fetched, {len(result.unchanged)} unchanged, "
+        f"{len(result.failed)} failed",
+        file=sys.stderr,
+    )
+    for path, exc in sorted(result.failed.items()):
+        print(f"Failed: {path}: {exc!r}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+def run_download(args: Namespace) -> int:
+    from .sync import discover
+
+    paths = _filter_types(discover(args.start, args.end, args.stations), args.file_types)
+    job = DownloadJob(Path(args.output, JOB_NAME), paths)
+    job.save()
+    return _run_job(job, args)
+
+def run_resume(args: Namespace) -> int:
+    path = Path(args.output, JOB_NAME)
+    if not path.exists():
+        print(f"No download to resume in {args.output}", file=sys.stderr)
+        return 2
+    return _run_job(DownloadJob.load(path), args)
+
+def run_enqueue(args: Namespace) -> int:
+    from .sync import discover
+    from .workqueue import WorkQueue
+
+    paths = _filter_types(discover(args.start, args.end, args.stations), args.file_types)
+    with WorkQueue(args.queue) as queue:
+        added = queue.add(paths)
+        counts = queue.counts()
+    print(f"{added} added, {sum(counts.values())} in queue", file=sys.stderr)
+    return 0
+
+def run_work(args: Namespace) -> int:
+    from .workqueue import DEFAULT_BATCH_SIZE, WorkQueue, work
+
+    batch_size = args.batch_size or DEFAULT_BATCH_SIZE
+    with WorkQueue(args.queue) as queue:
+        result = work(queue, args.output, batch_size=batch_size, limit=args.workers)
+        counts = queue.counts()
+
+    print(
+        f"{len(result.fetched)} fetched, {len(result.unchanged)} unchanged, "
+        f"{len(result.failed)} failed",
+        file=sys.stderr,
+    )
+    summary = ", ".join(f"{count} {state}" for state, count in counts.items())
+    print(summary, file=sys.stderr)
+    return 1 if result.failed else 0
+
+_COMMANDS = {
+    "stations": run_stations,
+    "search": run_search,
+    "download": run_download,
+    "resume": run_resume,
+    "enqueue": run_enqueue,
+    "work": run_work,
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+    return _COMMANDS[args.command](args)
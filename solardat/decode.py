@@ -3,20 +3,51 @@
 See http://solardat.uoregon.edu/ArchivalFiles.html for a description.
 """
 
+from array import array
 from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from io import StringIO
-from typing import Dict, Iterator, List, Tuple, Union
+from itertools import islice
+from pathlib import Path
+from typing import (
+    AnyStr,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 import csv
+import mmap
+import os
 
 
 RowValue = Union[int, float, datetime]
 Row = Dict[str, RowValue]
 Readable = Iterator[str]
+Columns = Dict[str, array]
+PathLike = Union[str, Path]
 
 
 DELIMITER = "\t"
 FIRST_COLUMNS = ("doy", "ending_time")
+FLAG_SUFFIX = "_FLAG"
+# Quality control flag of missing or bad data.
+MISSING_FLAG = 99
+BAD_FLAGS = frozenset([MISSING_FLAG])
+
+# Typecodes of columnar data. Interval end times are given as
+# seconds since the epoch, treating them as UTC.
+EPOCH = datetime(1970, 1, 1)
+TIMESTAMP_TYPECODE = "q"
+MEASURE_TYPECODE = "d"
+FLAG_TYPECODE = "B"
+
+_SECONDS_PER_DAY = 24 * 60 * 60
 
 
 def parse_header(values: List[str]) -> Tuple[int, int, List[str]]:
@@ -25,7 +56,7 @@ def parse_header(values: List[str]) -> Tuple[int, int, List[str]]:
     columns = list(FIRST_COLUMNS)
     for element_no, flag in zip(descriptors[0::2], descriptors[1::2]):
         columns.append(element_no)
-        columns.append(f"{element_no}_FLAG")
+        columns.append(f"{element_no}{FLAG_SUFFIX}")
 
     return int(station_id), int(year), columns
 
@@ -40,6 +71,31 @@ def add_hours_minutes(ending: datetime, hours: int, minutes: int) -> datetime:
         hours = 0
     return ending.replace(hour=hours, minute=minutes)
 
+def to_timestamp(dt: datetime) -> int:
+    return (dt - EPOCH) // timedelta(seconds=1)
+
+def from_timestamp(timestamp: int) -> datetime:
+    return EPOCH + timedelta(seconds=timestamp)
+
+def column_typecode(column: str) -> str:
+    if column == "ending_time":
+        return TIMESTAMP_TYPECODE
+    if column.endswith(FLAG_SUFFIX):
+        return FLAG_TYPECODE
+    return MEASURE_TYPECODE
+
+def select_columns(columns: List[str], selected: Optional[Iterable[str]]) -> List[str]:
+    """Get the data columns to decode, in file order."""
+    data_columns = columns[len(FIRST_COLUMNS):]
+    if selected is None:
+        return data_columns
+
+    wanted = set(selected) - {"ending_time"}
+    missing = wanted - set(data_columns)
+    if missing:
+        raise ValueError(f"Columns not in file: {sorted(missing)}")
+    return [column for column in data_columns if column in wanted]
+
 def cast_row(record: Dict[str, str], year: int) -> Row:
     out: OrderedDict[str, RowValue] = OrderedDict()
 
@@ -80,6 +136,19 @@ def parse_archival(handle: Readable) -> Tuple[int, List[Row]]:
     >>>     station_id, rows = parse_archival(fh)
     """
 
+    station_id, records = iter_archival(handle)
+    return station_id, list(records)
+
+def iter_archival(handle: Readable) -> Tuple[int, Iterator[Row]]:
+    """Parse archival file data from a file-like object lazily.
+
+    Only the header is read up front. Rows are decoded as the
+    returned iterator is consumed, so `handle` must remain open
+    until then.
+
+    See :func:`parse_archival`.
+    """
+
     header = next(handle)
     header_values = header.split(DELIMITER)
     station_id, year, columns = parse_header(header_values)
@@ -87,7 +156,216 @@ def parse_archival(handle: Readable) -> Tuple[int, List[Row]]:
     reader = csv.DictReader(handle, fieldnames=columns, delimiter=DELIMITER)
     records = map(lambda record: cast_row(record, year), reader)
 
-    return station_id, list(records)
+    return station_id, records
+
+def batch_rows(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    """Group rows into lists of at most `size` rows."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def make_timestamps(year: int, doys: Iterable[AnyStr], times: Iterable[AnyStr]) -> array:
+    start = to_timestamp(datetime(year, 1, 1))
+
+    def to_seconds(doy: AnyStr, time: AnyStr) -> int:
+        # 24:00 rolls over to the next day by construction.
+        hours, minutes = parse_timestamp(int(time))
+        return start + (int(doy) - 1) * _SECONDS_PER_DAY + hours * 3600 + minutes * 60
+
+    return array(TIMESTAMP_TYPECODE, map(to_seconds, doys, times))
+
+def parse_columns(
+    handle: Readable,
+    columns: Optional[Iterable[str]] = None,
+) -> Tuple[int, Columns]:
+    """Parse archival file data into typed columns.
+
+    Parameters
+    ----------
+    handle : Iterator[str]
+        A file-like object used to iterate over the archival file
+        data.
+    columns : Iterable[str], optional
+        Data columns to decode, e.g. ``["1001", "1001_FLAG"]``. All
+        are decoded by default.
+
+    Returns
+    -------
+    station_id, columns : Tuple[int, Dict[str, array.array]]
+        The archival data, as well as the station's id. The
+        "ending_time" column holds interval end times as seconds
+        since the epoch, measurements are doubles and quality
+        control flags are unsigned bytes.
+
+    Examples
+    --------
+    >>> with open("EUPQ1801.txt", "r") as fh:
+    >>>     station_id, columns = parse_columns(fh, ["1001"])
+    >>> columns["1001"]
+    array('d', [0.0, 0.0, ...])
+    """
+
+    header = next(handle)
+    station_id, year, names = parse_header(header.split(DELIMITER))
+    records = [line.split(DELIMITER) for line in handle if line.strip()]
+    return station_id, make_columns(year, names, records, columns)
+
+def make_columns(
+    year: int,
+    names: Sequence[str],
+    records: List[List[AnyStr]],
+    columns: Optional[Iterable[str]] = None,
+) -> Columns:
+    # Fields may be either `str` or `bytes`, both of which can be
+    # cast to numbers directly.
+    selected = select_columns(list(names), columns)
+    fields = list(zip(*records)) or [()] * len(names)
+
+    out: Columns = OrderedDict()
+    out["ending_time"] = make_timestamps(year, fields[0], fields[1])
+    for column in selected:
+        typecode = column_typecode(column)
+        cast = int if typecode == FLAG_TYPECODE else float
+        out[column] = array(typecode, map(cast, fields[names.index(column)]))
+
+    return out
+
+def columns_to_rows(columns: Columns) -> List[Row]:
+    """Convert columnar data into the rows of :func:`read_raw`."""
+    names = list(columns)
+    times = map(from_timestamp, columns["ending_time"])
+    values = [columns[name] for name in names[1:]]
+    return [OrderedDict(zip(names, row)) for row in zip(times, *values)]
+
+def rows_to_columns(rows: Sequence[Row]) -> Columns:
+    """Convert the rows of :func:`read_raw` into columnar data."""
+    out: Columns = OrderedDict()
+    if not rows:
+        out["ending_time"] = array(TIMESTAMP_TYPECODE)
+        return out
+
+    for name in rows[0]:
+        values: Iterable[RowValue] = (row[name] for row in rows)
+        if name == "ending_time":
+            values = map(to_timestamp, values)  # type: ignore
+        out[name] = array(column_typecode(name), values)
+    return out
+
+@lru_cache(maxsize=None)
+def _parse_header_line(header: bytes) -> Tuple[int, int, Tuple[str, ...]]:
+    # Files from the same station usually share a header, so the
+    # parsed layout is cached.
+    values = header.decode("ascii").split(DELIMITER)
+    station_id, year, columns = parse_header(values)
+    return station_id, year, tuple(columns)
+
+def _read_mapped(
+    path: PathLike,
+    columns: Optional[Iterable[str]],
+) -> Tuple[int, Columns]:
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            raise ValueError(f"Empty archival data file: {path}")
+
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header = mapped.readline()
+            station_id, year, names = _parse_header_line(header.rstrip())
+            delimiter = DELIMITER.encode()
+            records = [
+                line.split(delimiter)
+                for line in iter(mapped.readline, b"")
+                if line.strip()
+            ]
+
+    return station_id, make_columns(year, names, records, columns)
+
+def read_file(
+    path: PathLike,
+    columns: Optional[Iterable[str]] = None,
+) -> Tuple[int, List[Row]]:
+    """Read a local archival data file.
+
+    The file is memory-mapped and parsed from bytes, rather than
+    decoded into text first.
+
+    For the format of the returned data, see :func:`read_raw`.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the archival data file.
+    columns : Iterable[str], optional
+        Data columns to decode, e.g. ``["1001", "1001_FLAG"]``. All
+        are decoded by default.
+
+    Returns
+    -------
+    station_id, rows : Tuple[int, List[OrderedDict]]
+        The archival data, as well as the station's id.
+
+    Examples
+    --------
+    >>> station_id, rows = read_file("EUPQ1801.txt", ["1001"])
+    >>> rows[0]
+    OrderedDict([('ending_time', datetime.datetime(2018, 1, 1, 0, 15)),
+                 ('1001', 0.0)])
+    """
+
+    station_id, data = _read_mapped(path, columns)
+    return station_id, columns_to_rows(data)
+
+def read_file_columns(
+    path: PathLike,
+    columns: Optional[Iterable[str]] = None,
+) -> Tuple[int, Columns]:
+    """Read a local archival data file into typed columns.
+
+    See :func:`read_file` and :func:`parse_columns`.
+    """
+
+    return _read_mapped(path, columns)
+
+def read_files(
+    paths: Union[PathLike, Iterable[PathLike]],
+    columns: Optional[Iterable[str]] = None,
+    columnar: bool = False,
+) -> Iterator[Tuple[str, int, Union[List[Row], Columns]]]:
+    """Read local archival data files.
+
+    Parameters
+    ----------
+    paths : str, Path or Iterable
+        Paths to archival data files, or a directory to read all
+        archival data files (``*.txt``) from.
+    columns : Iterable[str], optional
+        Data columns to decode. All are decoded by default.
+    columnar : bool
+        Return typed columns, as from :func:`read_file_columns`,
+        instead of rows.
+
+    Returns
+    -------
+    Iterator[Tuple[str, int, Union[List[OrderedDict], Dict[str, array.array]]]]
+        Generator over the archival data files, with the filestem,
+        station id and archival data of each.
+    """
+
+    if isinstance(paths, (str, Path)):
+        files = sorted(Path(paths).glob("*.txt"))
+    else:
+        files = [Path(path) for path in paths]
+
+    selected = None if columns is None else list(columns)
+    for file in files:
+        data: Union[List[Row], Columns]
+        if columnar:
+            station_id, data = read_file_columns(file, selected)
+        else:
+            station_id, data = read_file(file, selected)
+        yield file.stem, station_id, data
 
 def read_raw(contents: str) -> Tuple[int, List[Row]]:
     """Marshal the contents of an archival data file.
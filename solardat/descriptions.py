@@ -1,13 +1,37 @@
 from collections import ChainMap
+from functools import lru_cache
 from pkgutil import get_data
-from typing import Dict, ChainMap as TChainMap
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional, Tuple
+from typing import ChainMap as TChainMap
 import json
+import re
+import sys
+
+from .decode import FLAG_SUFFIX
 
 
 QC_FLAG_LENGTH = 2
 OTHER_CODE_LENGTH = 3
 SPECTRAL_CODE_LENGTH = 4
 VALID_CODE_LENGTHS = (QC_FLAG_LENGTH, OTHER_CODE_LENGTH, SPECTRAL_CODE_LENGTH)
+INSTRUMENT_NUMBERS = "0123456789"
+
+# Columns of :func:`~solardat.decode.parse_header` that are not data elements.
+METADATA_DESCRIPTIONS = {
+    "doy": "Day of year",
+    "ending_time": "Interval ending time",
+}
+
+_UNITS_PATTERN = re.compile(r"\(([^)]+)\)")
+
+
+class ColumnDescription(NamedTuple):
+    """Description of an archival data file column."""
+
+    code: Optional[str]
+    description: str
+    units: Optional[str]
+    is_flag: bool
 
 
 def _get_tables() -> Dict[str, Dict[str, str]]:
@@ -25,28 +49,106 @@ def _get_tables() -> Dict[str, Dict[str, str]]:
 def _merge_tables(tables: Dict[str, Dict[str, str]]) -> TChainMap[str, str]:
     return ChainMap(*[table for table in tables.values()])
 
-tables = _get_tables()
-tablenames = set(tables)
-_merged_table = _merge_tables(tables)
+# The tables are loaded on first use, rather than on import.
+_load_tables = lru_cache(maxsize=None)(_get_tables)
+_merged_table: Optional[TChainMap[str, str]] = None
+
+def _get_merged_table() -> TChainMap[str, str]:
+    global _merged_table
+    if _merged_table is None:
+        _merged_table = _merge_tables(_load_tables())
+    return _merged_table
+
+def _build_index(merged_table: Mapping[str, str]) -> Dict[str, str]:
+    # Resolve codes with an instrument number ahead of time, taking
+    # care that a full code takes precedence, as in the merged table.
+    index = dict(merged_table)
+    for code, description in merged_table.items():
+        if len(code) == OTHER_CODE_LENGTH:
+            for instrument in INSTRUMENT_NUMBERS:
+                index.setdefault(f"{code}{instrument}", description)
+    return index
+
+_index: Optional[Dict[str, str]] = None
+
+def _get_index() -> Dict[str, str]:
+    global _index
+    if _index is None:
+        _index = _build_index(_get_merged_table())
+    return _index
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name: str) -> Any:
+        if name == "tables":
+            return _load_tables()
+        if name == "tablenames":
+            return set(_load_tables())
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+else:
+    # Module level `__getattr__` is not supported before Python 3.7.
+    tables = _load_tables()
+    tablenames = set(tables)
 
 def lookup_code(code: str) -> str:
     if len(code) not in VALID_CODE_LENGTHS:
         raise ValueError(f"The length of `code` must be one of {VALID_CODE_LENGTHS}")
 
-    if len(code) == QC_FLAG_LENGTH:
-        description = _merged_table[code]
-    elif len(code) == OTHER_CODE_LENGTH:
-        description = _merged_table[code]
-    else:
-        try:
-            description = _merged_table[code]
-        except KeyError:
-            # The code could be a data element with an instrument
-            # number (i.e. solar or meteorological). Drop it and
-            # try again.
-            try:
-                description = _merged_table[code[:OTHER_CODE_LENGTH]]
-            except KeyError:
-                raise ValueError("Unknown code: {code}")
-
-    return description
+    try:
+        return _get_index()[code]
+    except KeyError:
+        # Spectral codes, and data elements with an instrument
+        # number (i.e. solar or meteorological).
+        if len(code) == SPECTRAL_CODE_LENGTH:
+            raise ValueError(f"Unknown code: {code}")
+        raise
+
+def parse_units(description: str) -> Optional[str]:
+    match = _UNITS_PATTERN.search(description)
+    if match is None:
+        return None
+    return match.group(1)
+
+def _describe_column(column: str) -> ColumnDescription:
+    if column in METADATA_DESCRIPTIONS:
+        return ColumnDescription(None, METADATA_DESCRIPTIONS[column], None, False)
+
+    is_flag = column.endswith(FLAG_SUFFIX)
+    code = column[:-len(FLAG_SUFFIX)] if is_flag else column
+    description = lookup_code(code)
+    if is_flag:
+        return ColumnDescription(code, f"Quality control flag; {description}", None, True)
+    return ColumnDescription(code, description, parse_units(description), False)
+
+@lru_cache(maxsize=None)
+def _describe_columns(columns: Tuple[str, ...]) -> Tuple[ColumnDescription, ...]:
+    return tuple(map(_describe_column, columns))
+
+def describe_columns(columns: Iterable[str]) -> Dict[str, ColumnDescription]:
+    """Describe the columns of an archival data file.
+
+    Results are cached by column layout, as files from the same
+    station typically share one.
+
+    Parameters
+    ----------
+    columns : Iterable[str]
+        Column names, as from :func:`~solardat.decode.parse_header`.
+
+    Returns
+    -------
+    Dict[str, ColumnDescription]
+        The data element number, description and units of each
+        column, by column name. Quality control flag columns are
+        described by the data element they correspond to.
+
+    Examples
+    --------
+    >>> _, _, columns = parse_header(["94249", "2016", "1001", "0"])
+    >>> describe_columns(columns)["1001"]
+    ColumnDescription(code='1001', description='Global and total solar radiation
+    (watt hours per square meter per hour); Horizontal; Horizontal',
+    units='watt hours per square meter per hour', is_flag=False)
+    """
+
+    columns = tuple(columns)
+    return dict(zip(columns, _describe_columns(columns)))
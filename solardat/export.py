@@ -0,0 +1,259 @@
+"""Export archival data to Parquet or CSV files.
+
+Each archival data file is exported to its own file, named after the
+archival data file's stem. Rows are written in batches as they are
+decoded, so exporting does not require holding a whole file's rows.
+Parquet output requires ``pyarrow``, CSV output is always available.
+Only :func:`export_many` requires ``aiohttp``, which is imported when
+it is called.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from io import StringIO
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import csv
+
+from .decode import FLAG_SUFFIX, Row, batch_rows, iter_archival
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+PARQUET = "parquet"
+CSV = "csv"
+FORMATS = (PARQUET, CSV)
+# Rows per Parquet row group, or per CSV write.
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_LIMIT = 4
+
+PathLike = Union[str, Path]
+_Result = Tuple[str, int, Iterable[Row]]
+
+
+def default_format() -> str:
+    return PARQUET if pyarrow is not None else CSV
+
+def _check_format(fmt: Optional[str]) -> str:
+    if fmt is None:
+        return default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"`fmt` must be one of {FORMATS}")
+    if fmt == PARQUET and pyarrow is None:
+        raise RuntimeError("Parquet export requires pyarrow to be installed")
+    return fmt
+
+@lru_cache(maxsize=None)
+def parquet_schema(columns: Tuple[str, ...]) -> Any:
+    """Get the Parquet schema for a header layout.
+
+    Parameters
+    ----------
+    columns : Tuple[str, ...]
+        Row fields, as in the rows of :func:`~solardat.decode.read_raw`.
+    """
+
+    fields = [("station_id", pyarrow.int32())]
+    for column in columns:
+        if column == "ending_time":
+            kind = pyarrow.timestamp("s")
+        elif column.endswith(FLAG_SUFFIX):
+            kind = pyarrow.uint8()
+        else:
+            kind = pyarrow.float64()
+        fields.append((column, kind))
+    return pyarrow.schema(fields)
+
+def _write_parquet(
+    file: Path,
+    station_id: int,
+    columns: Tuple[str, ...],
+    batches: Iterable[List[Row]],
+) -> None:
+    schema = parquet_schema(columns)
+    with pyarrow.parquet.ParquetWriter(str(file), schema) as writer:
+        for batch in batches:
+            arrays = [pyarrow.array([station_id] * len(batch), pyarrow.int32())]
+            for column, field in zip(columns, list(schema)[1:]):
+                arrays.append(pyarrow.array([row[column] for row in batch], field.type))
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+def _write_csv(
+    file: Path,
+    station_id: int,
+    columns: Tuple[str, ...],
+    batches: Iterable[List[Row]],
+) -> None:
+    def to_record(row: Row) -> List[Any]:
+        ending_time: datetime = row["ending_time"]  # type: ignore
+        values = [row[column] for column in columns[1:]]
+        return [station_id, ending_time.isoformat(), *values]
+
+    with open(file, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["station_id", *columns])
+        for batch in batches:
+            writer.writerows(map(to_record, batch))
+
+def export_file(
+    filestem: str,
+    station_id: int,
+    rows: Iterable[Row],
+    directory: PathLike,
+    fmt: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Path:
+    """Export the rows of an archival data file.
+
+    Parameters
+    ----------
+    filestem : str
+        Stem of the archival data file, used to name the output.
+    station_id : int
+        The station's id, written as the first column.
+    rows : Iterable[OrderedDict]
+        The archival data, as from :func:`~solardat.decode.read_raw`
+        or :func:`~solardat.decode.iter_archival`.
+    directory : str or Path
+        Directory to write the output file to.
+    fmt : str, optional
+        Either "parquet" or "csv". Defaults to Parquet if ``pyarrow``
+        is installed, and CSV otherwise.
+    batch_size : int
+        Number of rows to decode before writing them out.
+
+    Returns
+    -------
+    Path
+        The output file.
+    """
+
+    fmt = _check_format(fmt)
+    file = Path(directory, f"{filestem}.{fmt}")
+    file.parent.mkdir(parents=True, exist_ok=True)
+
+    batches = batch_rows(rows, batch_size)
+    first = next(batches, [])
+    columns = tuple(first[0]) if first else ("ending_time",)
+
+    def all_batches() -> Iterator[List[Row]]:
+        if first:
+            yield first
+        yield from batches
+
+    write = _write_parquet if fmt == PARQUET else _write_csv
+    write(file, station_id, columns, all_batches())
+    return file
+
+def export(
+    results: Iterable[_Result],
+    directory: PathLike,
+    fmt: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Path]:
+    """Export archival data files.
+
+    Parameters
+    ----------
+    results : Iterable[Tuple[str, int, Iterable[OrderedDict]]]
+        Filestem, station id and rows of each archival data file,
+        as from :func:`~solardat.fetch.stream_compressed`.
+    directory : str or Path
+        Directory to write the output files to.
+    fmt : str, optional
+        Either "parquet" or "csv", see :func:`export_file`.
+    batch_size : int
+        Number of rows to decode before writing them out.
+
+    Returns
+    -------
+    List[Path]
+        The output files.
+
+    Examples
+    --------
+    >>> zipfile_path = find_compressed(start, end, ["Eugene"])
+    >>> export(stream_compressed(zipfile_path), "warehouse")
+    [PosixPath('warehouse/EUPF1801.parquet'), ...]
+    """
+
+    return [
+        export_file(filestem, station_id, rows, directory, fmt, batch_size)
+        for filestem, station_id, rows in results
+    ]
+
+def _export_contents(
+    filestem: str,
+    contents: str,
+    directory: PathLike,
+    fmt: Optional[str],
+    batch_size: int,
+) -> Path:
+    with StringIO(contents) as buffer:
+        station_id, rows = iter_archival(buffer)
+        return export_file(filestem, station_id, rows, directory, fmt, batch_size)
+
+async def export_many(
+    session: Any,
+    paths: Iterable[str],
+    directory: PathLike,
+    fmt: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Path]:
+    """Download and export archival data files.
+
+    Downloads run concurrently with decoding and writing, which happen
+    in worker threads. At most `limit` files are held in memory at
+    once.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        The client session to use.
+    paths : Iterable[str]
+        URL path components to the archival data files to be
+        exported.
+    directory : str or Path
+        Directory to write the output files to.
+    fmt : str, optional
+        Either "parquet" or "csv", see :func:`export_file`.
+    limit : int
+        Maximum number of files being downloaded or exported at once.
+    batch_size : int
+        Number of rows to decode before writing them out.
+
+    Returns
+    -------
+    List[Path]
+        The output files, in the order of `paths`.
+    """
+
+    from .async_fetch import get_response
+
+    fmt = _check_format(fmt)
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(limit)
+
+    with ThreadPoolExecutor(max_workers=limit) as executor:
+        async def export_path(path: str) -> Path:
+            async with semaphore:
+                response = await get_response(session, path)
+                contents = response.text
+                return await loop.run_in_executor(
+                    executor,
+                    _export_contents,
+                    Path(path).stem,
+                    contents,
+                    directory,
+                    fmt,
+                    batch_size,
+                )
+
+        return list(await asyncio.gather(*map(export_path, paths)))
@@ -1,14 +1,39 @@
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import date
 from urllib.parse import urlparse
-from io import BytesIO
+from io import BytesIO, StringIO, TextIOWrapper
 from pathlib import Path
-from typing import Dict, Iterator, List, Tuple
+from tempfile import TemporaryFile
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from zipfile import ZipFile
+import requests
+import threading
 
 from .compressed import make_zipfile_form, prepare_zipfile, zipfile_link
-from .decode import Row, read_raw
-from .http import dispatch
+from .decode import Row, iter_archival, parse_columns, read_raw
+from .http import (
+    DEFAULT_POOL_SIZE,
+    SingleFlight,
+    _throttled,
+    dispatch,
+    make_session,
+    should_retry,
+)
 from .search import extract_rel_links, rel_links_page
+from .series import TimeSeries
+from .throttle import retry
+
+
+# Threads downloading files at once.
+DEFAULT_WORKERS = DEFAULT_POOL_SIZE
+# Bytes requested at once by ranged downloads.
+DEFAULT_CHUNK_SIZE = 8 * 2 ** 20
+# Statuses of servers that do not support HEAD requests.
+NO_HEAD_STATUSES = frozenset([405, 501])
+
+# Decoding of files in flight, by path.
+_decoding = SingleFlight()
 
 
 def find_files(start: date, end: date, stations: List[str]) -> Dict[str, List[str]]:
@@ -54,6 +79,8 @@ def fetch_file(path: str) -> Tuple[int, List[Row]]:
     """Get the contents of an archival data file.
 
     For the format of the returned data, see :func:`~solardat.decode.read_raw`.
+    Concurrent calls for the same path share one download and decode,
+    and receive the same rows, which should not be modified.
 
     Parameters
     ----------
@@ -84,10 +111,102 @@ def fetch_file(path: str) -> Tuple[int, List[Row]]:
                  ])
     """
 
-    response = dispatch("GET", path)
+    return _decoding.do(path, _fetch_file, path)
+
+def _fetch_file(
+    path: str,
+    session: Optional[requests.Session] = None,
+) -> Tuple[int, List[Row]]:
+    response = dispatch("GET", path, session)
     station_id, rows = read_raw(response.text)
     return station_id, rows
 
+def fetch_many(
+    paths: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    failed: Optional[Dict[str, Exception]] = None,
+) -> List[Tuple[str, int, List[Row]]]:
+    """Get the contents of multiple archival data files with threads.
+
+    Synchronous version of :func:`~solardat.async_fetch.fetch_many`.
+    Files are downloaded by a pool of threads sharing one session, so
+    that connections are reused.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        URL path components to the archival data files to
+        be retrieved.
+    workers : int
+        Number of files to download at once.
+    failed : Dict[str, Exception], optional
+        If given, files that could not be retrieved are left out of the
+        results, and their errors are added to it by path. Otherwise,
+        the first error is raised once all files are done.
+
+    Returns
+    -------
+    List[Tuple[str, int, List[OrderedDict]]
+        Archival data from each file in the order of `paths`, as well
+        as the station id and the file's stem.
+
+    Raises
+    ------
+    requests.HTTPError
+        If any of the files could not be retrieved, after retrying,
+        and `failed` is not given.
+
+    Examples
+    --------
+    >>> paths = ["download/Archive/EUPH1801.txt", "download/Archive/EUPH1802.txt"]
+    >>> for filestem, station_id, rows in fetch_many(paths, workers=2):
+    ...     print(filestem, station_id, len(rows))
+    EUPH1801 94255 744
+    EUPH1802 94255 672
+    """
+
+    if workers < 1:
+        raise ValueError("`workers` must be at least 1")
+
+    paths = list(paths)
+    with make_session(workers) as session:
+        def fetch(path: str) -> Tuple[str, int, List[Row]]:
+            station_id, rows = _decoding.do(path, _fetch_file, path, session)
+            return Path(path).stem, station_id, rows
+
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [executor.submit(fetch, path) for path in paths]
+
+    results = []
+    for path, future in zip(paths, futures):
+        exc = future.exception()
+        if exc is None:
+            results.append(future.result())
+        elif failed is None or not isinstance(exc, Exception):
+            raise exc
+        else:
+            failed[path] = exc
+    return results
+
+def fetch_series(path: str) -> TimeSeries:
+    """Get the contents of an archival data file as a time series.
+
+    See :func:`fetch_file` and :class:`~solardat.series.TimeSeries`.
+
+    Examples
+    --------
+    >>> series = fetch_series("download/Archive/EUPQ1801.txt")
+    >>> series.rows(datetime(2018, 1, 1, 12), datetime(2018, 1, 1, 13))
+    [OrderedDict([('ending_time', datetime.datetime(2018, 1, 1, 12, 0)),
+                  ...]),
+     ...]
+    """
+
+    response = dispatch("GET", path)
+    with StringIO(response.text) as buffer:
+        station_id, columns = parse_columns(buffer)
+    return TimeSeries(station_id, columns)
+
 def find_compressed(start: date, end: date, stations: List[str]) -> str:
     """Search for archival data files and return the zipfile path.
 
@@ -132,19 +251,169 @@ def find_compressed(start: date, end: date, stations: List[str]) -> str:
     parsed = urlparse(url)
     return parsed.path.lstrip("/")
 
-def fetch_compressed(path: str) -> Iterator[Tuple[str, int, List[Row]]]:
+class _InvalidRange(ValueError):
+    pass
+
+def _should_retry_range(exc: Exception) -> Optional[float]:
+    # Short or full responses to range requests may be cut off
+    # connections, and are retried.
+    if isinstance(exc, _InvalidRange):
+        return 0.
+    return should_retry(exc)
+
+def _uncached(
+    session: requests.Session,
+    method: str,
+    path: str,
+    check: Optional[Callable[[requests.Response], None]] = None,
+    **kwds,
+) -> requests.Response:
+    # Throttled and retried as by `dispatch`, but bypassing the cache.
+    # Checked ranges are of a larger download, whose latency depends on
+    # the throughput of the other ranges and is not tracked.
+    def send() -> requests.Response:
+        response = _throttled(session, method, path, kwds, track_latency=check is None)
+        response.raise_for_status()
+        if check is not None:
+            check(response)
+        return response
+    return retry(send, should_retry if check is None else _should_retry_range)
+
+def _head(session: requests.Session, path: str) -> Optional[requests.Response]:
+    try:
+        return _uncached(session, "HEAD", path, allow_redirects=True)
+    except requests.HTTPError as exc:
+        if exc.response is not None and exc.response.status_code in NO_HEAD_STATUSES:
+            return None
+        raise
+
+def download_ranged(
+    path: str,
+    file: BinaryIO,
+    workers: int = DEFAULT_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Download a large file with concurrent range requests.
+
+    If the server accepts byte ranges, the file is preallocated and
+    its chunks are requested by a pool of threads and written in
+    place. Otherwise, including if the server does not support HEAD
+    requests, the file is downloaded in a single stream. Chunks are
+    retried if their response is incomplete, and the download stops at
+    the first chunk that fails. Responses are not cached.
+
+    Parameters
+    ----------
+    path : str
+        URL path component to the file.
+    file : BinaryIO
+        Seekable file opened for writing, that the download is written
+        into from its current position.
+    workers : int
+        Number of chunks requested at once.
+    chunk_size : int
+        Size of each chunk in bytes.
+
+    Returns
+    -------
+    int
+        The size of the file in bytes.
+
+    Examples
+    --------
+    >>> with open("search.zip", "wb") as file:
+    ...     download_ranged(find_compressed(start, end, stations), file)
+    """
+
+    if workers < 1:
+        raise ValueError("`workers` must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("`chunk_size` must be at least 1")
+
+    offset = file.tell()
+    with make_session(workers) as session:
+        head = _head(session, path)
+        headers = {} if head is None else head.headers
+        size = int(headers.get("Content-Length") or 0)
+        accepts_ranges = headers.get("Accept-Ranges", "").lower() == "bytes"
+
+        if not accepts_ranges or size <= chunk_size or workers == 1:
+            with _uncached(session, "GET", path, stream=True) as response:
+                written = 0
+                for data in response.iter_content(chunk_size=2 ** 16):
+                    file.write(data)
+                    written += len(data)
+            return written
+
+        # Preallocating lets each chunk be written as it arrives.
+        file.truncate(offset + size)
+        lock = threading.Lock()
+
+        def fetch_chunk(start: int) -> None:
+            end = min(start + chunk_size, size) - 1
+
+            def check(response: requests.Response) -> None:
+                expected = end - start + 1
+                if response.status_code != 206 or len(response.content) != expected:
+                    raise _InvalidRange(
+                        f"Invalid response to range {start}-{end} of {path}"
+                    )
+
+            headers = {"Range": f"bytes={start}-{end}"}
+            response = _uncached(session, "GET", path, check, headers=headers)
+            with lock:
+                file.seek(offset + start)
+                file.write(response.content)
+
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(fetch_chunk, start)
+                for start in range(0, size, chunk_size)
+            ]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            # Raises the first error, if any.
+            for future in done:
+                future.result()
+
+    file.seek(offset + size)
+    return size
+
+@contextmanager
+def _open_compressed(path: str, workers: Optional[int]) -> Iterator[ZipFile]:
+    if workers is None:
+        response = dispatch("GET", path)
+        with BytesIO(response.content) as buffer:
+            with ZipFile(buffer) as zf:
+                yield zf
+        return
+
+    with TemporaryFile() as buffer:
+        download_ranged(path, buffer, workers)
+        buffer.seek(0)
+        with ZipFile(buffer) as zf:
+            yield zf
+
+def fetch_compressed(
+    path: str,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, int, List[Row]]]:
     """Get the contents of compressed archival data files.
 
-    The entire zipfile is brought into memory and the contents of
-    each archival data file returned.
+    By default, the entire zipfile is brought into memory and the
+    contents of each archival data file returned. If `workers` is
+    given, the zipfile is downloaded into a temporary file with
+    :func:`download_ranged` instead, which is faster for large files.
 
     For the format of the returned data, see :func:`~solardat.decode.read_raw`.
 
     Parameters
     ----------
     path : str
-        URL path component to the archival data file to
-        be retrieved.
+        URL path component to the zipfile to be retrieved.
+    workers : int, optional
+        Number of chunks of the zipfile to download at once.
 
     Returns
     -------
@@ -167,11 +436,33 @@ def fetch_compressed(path: str) -> Iterator[Tuple[str, int, List[Row]]]:
     EUPQ1801 94255 2976
     """
 
-    response = dispatch("GET", path)
-    with BytesIO(response.content) as buffer:
-        with ZipFile(buffer) as zf:
-            for filename in zf.namelist():
-                file = Path(filename)
-                file_contents = zf.read(filename).decode()
-                station_id, rows = read_raw(file_contents)
+    with _open_compressed(path, workers) as zf:
+        for filename in zf.namelist():
+            file = Path(filename)
+            file_contents = zf.read(filename).decode()
+            station_id, rows = read_raw(file_contents)
+            yield file.stem, station_id, rows
+
+def stream_compressed(
+    path: str,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, int, Iterator[Row]]]:
+    """Get the contents of compressed archival data files lazily.
+
+    As :func:`fetch_compressed`, but each file's rows are decoded
+    as they are consumed, rather than collected into a list. Each
+    file's rows must be consumed before advancing to the next file.
+
+    Examples
+    --------
+    >>> for filestem, station_id, rows in stream_compressed(zipfile_path):
+    >>>     for row in rows:
+    ...         process(row)
+    """
+
+    with _open_compressed(path, workers) as zf:
+        for filename in zf.namelist():
+            file = Path(filename)
+            with TextIOWrapper(zf.open(filename), encoding="utf-8") as handle:
+                station_id, rows = iter_archival(handle)
                 yield file.stem, station_id, rows
@@ -0,0 +1,15 @@
+"""Local file utilities."""
+
+from pathlib import Path
+import os
+
+
+def write_atomic(file: Path, content: bytes) -> None:
+    """Write a file such that readers never see a partial write."""
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_name(f".{file.name}.part")
+    with open(tmp, "wb") as fh:
+        fh.write(content)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, file)
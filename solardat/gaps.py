@@ -0,0 +1,320 @@
+"""Detect gaps and duplicates in the interval end times of archival data.
+
+End times are handled as seconds since the epoch, as in the output of
+:func:`~solardat.decode.parse_columns`. Differences between consecutive
+end times are computed and scanned with ``map`` and ``compress``, so
+no Python code runs per row, and only irregular positions are visited.
+
+Results are kept in a :class:`GapIndex`, by filestem, which can be
+saved alongside mirrored files or a column store and queried for the
+gaps in a time interval.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import compress
+from operator import sub
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+import json
+
+from .archive import INTERVALS, parse_filename
+from .decode import TIMESTAMP_TYPECODE, Columns, Row, to_timestamp
+from .files import write_atomic
+
+
+INDEX_NAME = "gaps.json"
+FORMAT_VERSION = 1
+
+PathLike = Union[str, Path]
+
+
+class Gap(NamedTuple):
+    """Missing intervals between two consecutive end times.
+
+    Gaps at the edges of the expected end times, see :func:`find_gaps`,
+    start one interval before the first expected end time, or end one
+    interval after the last.
+    """
+
+    start: int
+    end: int
+    missing: int
+
+
+class Duplicate(NamedTuple):
+    """An end time that occurs more than once."""
+
+    time: int
+    occurrences: int
+
+
+class FileGaps(NamedTuple):
+    """Gaps and duplicates of an archival data file's end times.
+
+    Irregular steps are consecutive end times that are out of order,
+    or not a multiple of the interval apart.
+    """
+
+    interval: int
+    n_rows: int
+    first: int
+    last: int
+    gaps: List[Gap]
+    duplicates: List[Duplicate]
+    irregular: List[Gap]
+
+    @property
+    def missing(self) -> int:
+        return sum(gap.missing for gap in self.gaps)
+
+    @property
+    def is_regular(self) -> bool:
+        return not (self.gaps or self.duplicates or self.irregular)
+
+    def gaps_between(self, start: int, end: int) -> List[Gap]:
+        """List the gaps overlapping an interval of end times, in seconds.
+
+        Gaps are only ordered if the end times were in order.
+        """
+        # Gaps are ordered by start time and do not overlap, so only
+        # the gap before the first to start within the interval can
+        # also overlap it.
+        lo = bisect_left(self.gaps, (start,))
+        if lo > 0 and self.gaps[lo - 1].end > start:
+            lo -= 1
+        hi = bisect_left(self.gaps, (end,))
+        return self.gaps[lo:hi]
+
+
+def time_diffs(times: Sequence[int]) -> array:
+    """Get the differences between consecutive end times."""
+    return array(TIMESTAMP_TYPECODE, map(sub, times[1:], times[:-1]))
+
+def row_times(rows: Iterable[Row]) -> array:
+    """Get the end times of rows, as seconds since the epoch."""
+    return array(
+        TIMESTAMP_TYPECODE,
+        [to_timestamp(row["ending_time"]) for row in rows],  # type: ignore
+    )
+
+def infer_interval(times: Sequence[int], file_type: Optional[str] = None) -> int:
+    """Get the sampling interval of end times, in seconds.
+
+    Parameters
+    ----------
+    times : Sequence[int]
+        Interval end times, as seconds since the epoch.
+    file_type : str, optional
+        File type letter of the file the end times are from. If not
+        given, the interval is the most common positive difference.
+    """
+
+    if file_type is not None:
+        return int(INTERVALS[file_type].total_seconds())
+
+    counts = Counter(time_diffs(times))
+    for diff, _ in counts.most_common():
+        if diff > 0:
+            return diff
+    raise ValueError("Cannot infer the interval of fewer than two distinct times")
+
+def _add_step(
+    before: int,
+    after: int,
+    interval: int,
+    gaps: List[Gap],
+    irregular: List[Gap],
+) -> None:
+    diff = after - before
+    if diff > interval and diff % interval == 0:
+        gaps.append(Gap(before, after, diff // interval - 1))
+    else:
+        irregular.append(Gap(before, after, 0))
+
+def find_gaps(
+    times: Sequence[int],
+    interval: Optional[int] = None,
+    file_type: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> FileGaps:
+    """Find gaps and duplicates in interval end times.
+
+    Parameters
+    ----------
+    times : Sequence[int]
+        Interval end times, as seconds since the epoch.
+    interval : int, optional
+        Sampling interval, in seconds. Inferred with
+        :func:`infer_interval` if not given.
+    file_type : str, optional
+        File type letter, used to infer the interval.
+    start, end : int, optional
+        First and last expected end times, e.g. of the month of the
+        file. Missing intervals before the first end time and after the
+        last are reported as gaps, or as irregular steps if they are
+        not a multiple of the interval. Without bounds, only gaps
+        between end times are found.
+
+    Returns
+    -------
+    FileGaps
+
+    Examples
+    --------
+    >>> station_id, columns = read_file_columns("EUPO1801.txt", [])
+    >>> result = find_gaps(columns["ending_time"], file_type="O")
+    >>> result.gaps
+    [Gap(start=1515166200, end=1515168000, missing=29)]
+    """
+
+    if start is not None and end is not None and start > end:
+        raise ValueError("`start` must not be after `end`")
+    if interval is None:
+        interval = infer_interval(times, file_type)
+    n_rows = len(times)
+    # Expected end times are compared with the times just outside of
+    # the bounds, as if they were present.
+    before = None if start is None else start - interval
+    after = None if end is None else end + interval
+
+    gaps: List[Gap] = []
+    duplicates: Dict[int, int] = OrderedDict()
+    irregular: List[Gap] = []
+
+    if n_rows == 0:
+        if before is not None and after is not None:
+            _add_step(before, after, interval, gaps, irregular)
+        return FileGaps(interval, 0, 0, 0, gaps, [], irregular)
+
+    if before is not None and times[0] - before > interval:
+        _add_step(before, times[0], interval, gaps, irregular)
+
+    # Positions of the differences that are not the interval.
+    diffs = map(sub, times[1:], times[:-1])
+    for i in compress(range(n_rows - 1), map(interval.__ne__, diffs)):
+        if times[i + 1] == times[i]:
+            duplicates[times[i]] = duplicates.get(times[i], 1) + 1
+        else:
+            _add_step(times[i], times[i + 1], interval, gaps, irregular)
+
+    if after is not None and after - times[-1] > interval:
+        _add_step(times[-1], after, interval, gaps, irregular)
+
+    return FileGaps(
+        interval=interval,
+        n_rows=n_rows,
+        first=times[0],
+        last=times[-1],
+        gaps=gaps,
+        duplicates=[Duplicate(time, count) for time, count in duplicates.items()],
+        irregular=irregular,
+    )
+
+
+class GapIndex(object):
+    """Gaps and duplicates of archival data files, by filestem.
+
+    Examples
+    --------
+    >>> index = GapIndex.load("mirror/gaps.json")
+    >>> for filestem, _, columns in read_files("mirror/EUP", [], columnar=True):
+    ...     index.add_columns(filestem, columns)
+    >>> index.save()
+    >>> index.incomplete()
+    ['EUPO1801']
+    """
+
+    def __init__(self, path: Optional[PathLike] = None) -> None:
+        self.path = None if path is None else Path(path)
+        self.files: Dict[str, FileGaps] = OrderedDict()
+
+    def __contains__(self, filestem: str) -> bool:
+        return filestem in self.files
+
+    def __getitem__(self, filestem: str) -> FileGaps:
+        return self.files[filestem]
+
+    def add(
+        self,
+        filestem: str,
+        times: Sequence[int],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> FileGaps:
+        """Check the end times of a file, using the interval of its file type.
+
+        See :func:`find_gaps` for the expected `start` and `end` times.
+        """
+
+        file_type = parse_filename(filestem).file_type
+        result = find_gaps(times, file_type=file_type, start=start, end=end)
+        self.files[filestem] = result
+        return result
+
+    def add_columns(
+        self,
+        filestem: str,
+        columns: Columns,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> FileGaps:
+        return self.add(filestem, columns["ending_time"], start, end)
+
+    def incomplete(self) -> List[str]:
+        """List the files with gaps, duplicates or irregular steps."""
+        return [stem for stem, result in self.files.items() if not result.is_regular]
+
+    def gaps_between(self, filestem: str, start: int, end: int) -> List[Gap]:
+        return self.files[filestem].gaps_between(start, end)
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": FORMAT_VERSION,
+            "files": {
+                stem: {
+                    "interval": result.interval,
+                    "n_rows": result.n_rows,
+                    "first": result.first,
+                    "last": result.last,
+                    "gaps": [list(gap) for gap in result.gaps],
+                    "duplicates": [list(duplicate) for duplicate in result.duplicates],
+                    "irregular": [list(step) for step in result.irregular],
+                }
+                for stem, result in sorted(self.files.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, path: Optional[PathLike] = None) -> "GapIndex":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported gap index version: {data.get('version')}")
+
+        index = cls(path)
+        for stem, values in data["files"].items():
+            index.files[stem] = FileGaps(
+                interval=values["interval"],
+                n_rows=values["n_rows"],
+                first=values["first"],
+                last=values["last"],
+                gaps=[Gap(*gap) for gap in values["gaps"]],
+                duplicates=[Duplicate(*duplicate) for duplicate in values["duplicates"]],
+                irregular=[Gap(*step) for step in values["irregular"]],
+            )
+        return index
+
+    def save(self, path: Optional[PathLike] = None) -> None:
+        file = Path(path) if path is not None else self.path
+        if file is None:
+            raise ValueError("No path to save the gap index to")
+        write_atomic(file, json.dumps(self.to_dict(), indent=2).encode())
+
+    @classmethod
+    def load(cls, path: PathLike) -> "GapIndex":
+        """Load a gap index, or create an empty one if it does not exist."""
+        file = Path(path)
+        if not file.exists():
+            return cls(file)
+        return cls.from_dict(json.loads(file.read_text()), file)
@@ -1,27 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
 from requests.models import Response
-from typing import Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
 import requests
+import threading
+import time
+
+from .throttle import RETRY_STATUSES, Throttle, retry, retry_after
 
 
 BASE_URL = "http://solardat.uoregon.edu"
+# Connections kept open per host by a session.
+DEFAULT_POOL_SIZE = 8
+
+T = TypeVar("T")
+
+
+class Revalidation(NamedTuple):
+    changed: List[str]
+    unchanged: List[str]
+    failed: Dict[str, Exception]
 
 
 class _ResponseCache(object):
-    """Cache for HTTP responses."""
+    """Cache for HTTP responses.
 
-    def __init__(self) -> None:
+    The time each response was last fetched or revalidated is kept, so
+    that recently validated responses need not be requested again.
+    The cache may be shared by threads, so it is only accessed while
+    holding its lock.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self._lock = threading.RLock()
         self._cache: Dict[str, Optional[Response]] = {}
+        self._validated: Dict[str, float] = {}
 
     def __getitem__(self, path: str) -> Optional[Response]:
-        if path not in self._cache:
-            self._cache[path] = None
-        return self._cache[path]
+        with self._lock:
+            return self._cache.setdefault(path, None)
 
     def __setitem__(self, path: str, value: Optional[Response]) -> None:
-        self._cache[path] = value
+        with self._lock:
+            self._cache[path] = value
 
     def clear(self) -> None:
-        self._cache = {}
+        with self._lock:
+            self._cache = {}
+            self._validated = {}
+
+    def validated_at(self, path: str) -> Optional[float]:
+        """Get when the cached response was last fetched or revalidated."""
+        with self._lock:
+            return self._validated.get(path)
+
+    def mark_validated(self, path: str) -> None:
+        with self._lock:
+            self._validated[path] = self.clock()
+
+    def is_fresh(self, path: str, max_age: float) -> bool:
+        validated_at = self.validated_at(path)
+        return validated_at is not None and self.clock() - validated_at < max_age
 
     def get_etag(self, path: str) -> Optional[str]:
         cached_response = self[path]
@@ -34,6 +85,7 @@ class _ResponseCache(object):
 
         if response.status_code != 304:
             self[path] = response
+            self.mark_validated(path)
             return response
 
         cached_response = self[path]
@@ -41,10 +93,62 @@ class _ResponseCache(object):
             # Should not occur if the cache is only mutated
             # through this method.
             raise RuntimeError
+        self.mark_validated(path)
         return cached_response
 
 _cache = _ResponseCache()
 
+
+class _Call(object):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight(object):
+    """Share one call among concurrent callers with the same key.
+
+    The first caller for a key runs the call, and callers arriving
+    while it is in flight wait for it and receive the same result, or
+    the same exception. Results are not kept once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, function: Callable[..., T], *args, **kwds) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwds)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+# Downloads in flight, by path.
+_flights = SingleFlight()
+# Limits requests sent by `dispatch`, shared by all threads.
+_throttle = Throttle()
+
 def add_etag(path: str, headers: Dict[str, str]) -> Dict[str, str]:
     etag = _cache.get_etag(path)
     if etag is None:
@@ -54,13 +158,195 @@ def add_etag(path: str, headers: Dict[str, str]) -> Dict[str, str]:
 def make_url(path: str) -> str:
     return f"{BASE_URL}/{path}"
 
-def dispatch(method: str, path: str, **kwds) -> requests.Response:
+def make_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Make a session with a connection pool for `pool_size` threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def dispatch(
+    method: str,
+    path: str,
+    session: Optional[requests.Session] = None,
+    **kwds,
+) -> requests.Response:
+    """Send a request for a path, revalidating any cached response.
+
+    Requests are throttled to what the server sustains, see
+    :mod:`~solardat.throttle`, and GET requests that fail as the
+    server is unavailable or overloaded are retried with backoff.
+    Concurrent GET requests for the same path without additional
+    parameters share one download and receive the same response.
+    Requests are sent with `session` if given, so that its connections
+    are reused.
+    """
+
     if method not in ("GET", "POST"):
         raise ValueError
 
+    if method == "GET" and not kwds:
+        return _flights.do(path, _request, method, path, session)
+    return _request(method, path, session, **kwds)
+
+def _request(
+    method: str,
+    path: str,
+    session: Optional[requests.Session] = None,
+    **kwds,
+) -> requests.Response:
     headers = add_etag(path, kwds.get("headers", {}))
     if headers:
         kwds["headers"] = headers
 
-    response = requests.request(method, make_url(path), **kwds)
-    return _cache.check_response(path, response)
+    client: Any = requests if session is None else session
+    if method != "GET":
+        return _send(client, method, path, kwds)
+    return retry(lambda: _send(client, method, path, kwds), should_retry)
+
+def _send(client: Any, method: str, path: str, kwds: Dict[str, Any]) -> Response:
+    return _cache.check_response(path, _throttled(client, method, path, kwds))
+
+def _throttled(
+    client: Any,
+    method: str,
+    path: str,
+    kwds: Dict[str, Any],
+    track_latency: bool = True,
+) -> Response:
+    _throttle.acquire()
+    ok = False
+    latency = None
+    try:
+        response = client.request(method, make_url(path), **kwds)
+        ok = response.status_code not in RETRY_STATUSES
+        # The time to the headers, which does not depend on the size of
+        # the response.
+        if track_latency:
+            latency = response.elapsed.total_seconds()
+    finally:
+        _throttle.release(ok, latency)
+    return response
+
+def should_retry(exc: Exception) -> Optional[float]:
+    """Get whether a failed request should be retried.
+
+    See :func:`~solardat.throttle.retry`. Connection errors, timeouts
+    and responses with a status in
+    :data:`~solardat.throttle.RETRY_STATUSES` are retried.
+    """
+
+    if isinstance(exc, HTTPError):
+        response = exc.response
+        if response is None or response.status_code not in RETRY_STATUSES:
+            return None
+        return retry_after(response.headers) or 0.
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return 0.
+    return None
+
+def _to_revalidate(
+    paths: Iterable[str],
+    max_age: Optional[float],
+    result: Revalidation,
+) -> Dict[str, str]:
+    """Get the ETags of paths to be revalidated.
+
+    Paths without an ETag are added to the changed paths of `result`,
+    and those validated within `max_age` to its unchanged paths.
+    """
+
+    etags = {}
+    for path in sorted(set(paths)):
+        etag = _cache.get_etag(path)
+        if etag is None:
+            result.changed.append(path)
+        elif max_age is not None and _cache.is_fresh(path, max_age):
+            result.unchanged.append(path)
+        else:
+            etags[path] = etag
+    return etags
+
+def _is_unchanged(client: Any, path: str, etag: str) -> bool:
+    def head() -> Response:
+        headers = {"If-None-Match": etag}
+        response = _throttled(client, "HEAD", path, {"headers": headers})
+        response.raise_for_status()
+        return response
+
+    response = retry(head, should_retry)
+    # Some servers answer conditional HEAD requests in full.
+    if response.status_code == 304 or response.headers.get("ETag") == etag:
+        _cache.mark_validated(path)
+        return True
+    return False
+
+def revalidate(
+    paths: Iterable[str],
+    workers: int = DEFAULT_POOL_SIZE,
+    max_age: Optional[float] = None,
+    session: Optional[requests.Session] = None,
+) -> Revalidation:
+    """Check which cached responses are out of date, without downloading them.
+
+    Conditional HEAD requests with the cached ETags are sent
+    concurrently. Responses found unchanged are marked as revalidated
+    in the cache, while changed ones are left as they are, to be
+    replaced when next fetched.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        URL path components of the cached responses.
+    workers : int
+        Number of requests sent at once.
+    max_age : float, optional
+        Responses fetched or revalidated within this many seconds are
+        taken to be unchanged without a request.
+    session : requests.Session, optional
+        The session to send requests with. A new session is used by
+        default.
+
+    Returns
+    -------
+    Revalidation
+        The paths that changed, that were unchanged and that failed,
+        with their exception. Paths without a cached ETag cannot be
+        revalidated, and are counted as changed.
+
+    Examples
+    --------
+    >>> result = revalidate(mirrored_paths, workers=16)
+    >>> for filestem, station_id, rows in fetch_many(result.changed):
+    ...     ...
+    """
+
+    result = Revalidation([], [], {})
+    etags = _to_revalidate(paths, max_age, result)
+
+    client = make_session(workers) if session is None else session
+    try:
+        with ThreadPoolExecutor(workers) as executor:
+            futures = {
+                path: executor.submit(_is_unchanged, client, path, etag)
+                for path, etag in etags.items()
+            }
+    finally:
+        if session is None:
+            client.close()
+
+    for path, future in futures.items():
+        exc = future.exception()
+        if exc is not None and not isinstance(exc, Exception):
+            raise exc
+        if exc is not None:
+            result.failed[path] = exc
+        elif future.result():
+            result.unchanged.append(path)
+        else:
+            result.changed.append(path)
+
+    result.changed.sort()
+    result.unchanged.sort()
+    return result
@@ -0,0 +1,238 @@
+"""Local index of archival data files.
+
+Archival data file paths are predictable from the station's file
+prefix, the file type and the month. Once the files available for a
+station over a time interval have been seen in search results, later
+searches within the interval can be answered locally instead of by the
+search CGI.
+"""
+
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple, Union
+import json
+
+from .archive import ArchiveFile, parse_filename
+
+
+FORMAT_VERSION = 1
+
+_Month = Tuple[int, int]
+# Station name -> file prefix -> file type -> months.
+_Entries = DefaultDict[str, DefaultDict[str, DefaultDict[str, Set[_Month]]]]
+
+
+def _make_entries() -> _Entries:
+    return defaultdict(lambda: defaultdict(lambda: defaultdict(set)))
+
+def _to_month(day: date) -> _Month:
+    return day.year, day.month
+
+def _month_range(first: _Month, last: _Month) -> List[_Month]:
+    """List the months from `first` to `last`, inclusive."""
+    first_no = first[0] * 12 + first[1] - 1
+    last_no = last[0] * 12 + last[1] - 1
+    return [(no // 12, no % 12 + 1) for no in range(first_no, last_no + 1)]
+
+def _format_month(month: _Month) -> str:
+    year, month_no = month
+    return f"{year:04d}-{month_no:02d}"
+
+def _parse_month(value: str) -> _Month:
+    year, month_no = value.split("-")
+    return int(year), int(month_no)
+
+def _matches(station: str, name: str) -> bool:
+    # Search results give a location with the station name,
+    # e.g. "Eugene" is returned as "Eugene, OR".
+    return name == station or name.startswith(f"{station},")
+
+
+class ArchiveIndex(object):
+    """Index of the archival data files available for each station.
+
+    Examples
+    --------
+    >>> index = ArchiveIndex.load("index.json")
+    >>> index.refresh(date(2018, 1, 1), date(2018, 12, 1), ["Eugene"])
+    >>> index.save("index.json")
+    >>> index.find_files(date(2018, 1, 1), date(2018, 2, 1), ["Eugene"], ["H"])
+    {'Eugene, OR': ['download/Archive/EUPH1801.txt',
+      'download/Archive/EUPH1802.txt']}
+    """
+
+    def __init__(self) -> None:
+        self._entries = _make_entries()
+        # Searched station -> months covered by its searches.
+        self._searched: DefaultDict[str, Set[_Month]] = defaultdict(set)
+
+    def __contains__(self, station: str) -> bool:
+        return any(_matches(station, name) for name in self._entries)
+
+    @property
+    def stations(self) -> List[str]:
+        return sorted(self._entries)
+
+    def add(self, station: str, path: str) -> ArchiveFile:
+        file = parse_filename(path)
+        self._entries[station][file.prefix][file.file_type].add((file.year, file.month))
+        return file
+
+    def update(self, links: Dict[str, List[str]]) -> None:
+        """Add search results, as from :func:`~solardat.search.extract_rel_links`."""
+        for station, paths in links.items():
+            for path in paths:
+                self.add(station, path)
+
+    def mark_searched(self, start: date, end: date, stations: List[str]) -> None:
+        """Record that the files of stations over an interval are indexed.
+
+        Called by :meth:`refresh`. Search results added with
+        :meth:`update` should be recorded with the search parameters,
+        so that :meth:`find_files` does not search again.
+        """
+
+        months = _month_range(_to_month(start), _to_month(end))
+        for station in stations:
+            self._searched[station].update(months)
+
+    def is_searched(self, start: date, end: date, station: str) -> bool:
+        """Get whether the files of a station over an interval are indexed."""
+        months = _month_range(_to_month(start), _to_month(end))
+        return self._searched.get(station, set()).issuperset(months)
+
+    def refresh(self, start: date, end: date, stations: List[str]) -> None:
+        """Search for archival data files and add them to the index.
+
+        See :func:`~solardat.fetch.find_files` for a description of the
+        parameters.
+        """
+
+        # Deferred so that loading an index does not require the
+        # search dependencies.
+        from .search import extract_rel_links, rel_links_page
+
+        page = rel_links_page(start, end, stations)
+        self.update(extract_rel_links(page))
+        self.mark_searched(start, end, stations)
+
+    def files(self, station: str) -> List[ArchiveFile]:
+        """List the indexed files of a station, by its search result name."""
+        return sorted(
+            ArchiveFile(prefix, file_type, year, month)
+            for prefix, file_types in self._entries.get(station, {}).items()
+            for file_type, months in file_types.items()
+            for year, month in months
+        )
+
+    def find_files(
+        self,
+        start: date,
+        end: date,
+        stations: List[str],
+        file_types: Optional[Iterable[str]] = None,
+        refresh: bool = False,
+    ) -> Dict[str, List[str]]:
+        """Search the index for archival data files.
+
+        Results are in the same format as :func:`~solardat.fetch.find_files`.
+        Stations whose files over the interval are not all indexed are
+        searched for, and added to the index, first.
+
+        Parameters
+        ----------
+        start: date
+            Start of the search interval. Only the month and year
+            are used.
+        end: date
+            End of the search interval, inclusive. Only the month
+            and year are used.
+        stations: List[str]
+            Stations to be included in the search results.
+        file_types: Iterable[str], optional
+            File type letters to restrict the results to.
+        refresh: bool
+            Search for all stations, even if they are indexed.
+
+        Returns
+        -------
+        paths : Dict[str, List[str]]
+            URL path components to the data files matching the query,
+            organized by station.
+        """
+
+        missing = stations if refresh else [
+            station for station in stations if not self.is_searched(start, end, station)
+        ]
+        if missing:
+            self.refresh(start, end, missing)
+
+        types = None if file_types is None else set(file_types)
+        first, last = _to_month(start), _to_month(end)
+
+        results: Dict[str, List[str]] = {}
+        for name in self.stations:
+            if not any(_matches(station, name) for station in stations):
+                continue
+
+            paths = [
+                file.path
+                for file in self.files(name)
+                if first <= (file.year, file.month) <= last
+                if types is None or file.file_type in types
+            ]
+            if paths:
+                results[name] = sorted(paths)
+
+        return results
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": FORMAT_VERSION,
+            "stations": {
+                station: {
+                    prefix: {
+                        file_type: [_format_month(month) for month in sorted(months)]
+                        for file_type, months in file_types.items()
+                    }
+                    for prefix, file_types in prefixes.items()
+                }
+                for station, prefixes in self._entries.items()
+            },
+            "searched": {
+                station: [_format_month(month) for month in sorted(months)]
+                for station, months in self._searched.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ArchiveIndex":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+
+        index = cls()
+        for station, prefixes in data["stations"].items():
+            for prefix, file_types in prefixes.items():
+                for file_type, months in file_types.items():
+                    index._entries[station][prefix][file_type].update(
+                        map(_parse_month, months)
+                    )
+        # Indexes saved before searches were recorded are searched again.
+        for station, months in data.get("searched", {}).items():
+            index._searched[station].update(map(_parse_month, months))
+        return index
+
+    def save(self, path: Union[str, Path]) -> None:
+        file = Path(path)
+        tmp = file.with_name(f"{file.name}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2, sort_keys=True))
+        tmp.replace(file)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ArchiveIndex":
+        """Load an index, or create an empty one if it does not exist."""
+        file = Path(path)
+        if not file.exists():
+            return cls()
+        return cls.from_dict(json.loads(file.read_text()))
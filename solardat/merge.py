@@ -0,0 +1,103 @@
+"""Merge archival data across stations and files by time.
+
+Rows of an archival data file are in time order, so data from many
+files can be combined into one time-ordered stream with a k-way merge,
+rather than by concatenating and sorting. Rows are consumed lazily.
+"""
+
+from collections import OrderedDict
+from heapq import merge as heap_merge
+from itertools import groupby
+from typing import Iterable, Iterator, Tuple
+
+from .decode import Row
+
+
+SEPARATOR = ":"
+
+_Labelled = Tuple[str, Iterable[Row]]
+
+
+def _ending_time(item: Tuple[str, Row]):
+    _, row = item
+    return row["ending_time"]
+
+def _label_rows(label: str, rows: Iterable[Row]) -> Iterator[Tuple[str, Row]]:
+    for row in rows:
+        yield label, row
+
+def merge_rows(streams: Iterable[_Labelled]) -> Iterator[Tuple[str, Row]]:
+    """Merge time-ordered rows into a single time-ordered stream.
+
+    Parameters
+    ----------
+    streams : Iterable[Tuple[str, Iterable[OrderedDict]]]
+        Label and rows of each stream, e.g. the filestem and rows of
+        an archival data file. Each stream's rows must be ordered by
+        interval end time.
+
+    Returns
+    -------
+    Iterator[Tuple[str, OrderedDict]]
+        Rows from all streams, with their stream's label, ordered by
+        interval end time. Rows with the same end time are ordered
+        as their streams are.
+
+    Examples
+    --------
+    >>> streams = [(filestem, rows) for filestem, _, rows in results]
+    >>> for label, row in merge_rows(streams):
+    ...     print(label, row["ending_time"])
+    EUPO1801 2018-01-01 00:01:00
+    SIRO1801 2018-01-01 00:01:00
+    EUPO1801 2018-01-01 00:02:00
+    ...
+    """
+
+    labelled = [_label_rows(label, rows) for label, rows in streams]
+    return heap_merge(*labelled, key=_ending_time)
+
+def align_rows(
+    streams: Iterable[_Labelled],
+    separator: str = SEPARATOR,
+) -> Iterator[Row]:
+    """Align time-ordered rows into wide rows keyed by interval end time.
+
+    Parameters
+    ----------
+    streams : Iterable[Tuple[str, Iterable[OrderedDict]]]
+        Label and rows of each stream, see :func:`merge_rows`. Files
+        with consecutive months from the same station can share a
+        label.
+    separator : str
+        Separator between a stream's label and a column name.
+
+    Returns
+    -------
+    Iterator[OrderedDict]
+        A row per distinct interval end time, with the columns of
+        each stream that has data for it, prefixed by the stream's
+        label. Streams without data for an end time are left out
+        of that row.
+
+    Examples
+    --------
+    >>> streams = [("EUP", eugene_rows), ("SIR", silver_lake_rows)]
+    >>> next(align_rows(streams))
+    OrderedDict([('ending_time', datetime.datetime(2018, 1, 1, 0, 1)),
+                 ('EUP:1001', 0.0),
+                 ('EUP:1001_FLAG', 11),
+                 ...
+                 ('SIR:1001', 0.0),
+                 ('SIR:1001_FLAG', 11),
+                 ...])
+    """
+
+    for ending_time, items in groupby(merge_rows(streams), key=_ending_time):
+        aligned: Row = OrderedDict()
+        aligned["ending_time"] = ending_time
+        for label, row in items:
+            for column, value in row.items():
+                if column != "ending_time":
+                    aligned[f"{label}{separator}{column}"] = value
+        yield aligned
@@ -0,0 +1,223 @@
+"""Quality control flags of archival data.
+
+Flags are handled as unsigned byte arrays, as in the output of
+:func:`~solardat.decode.parse_columns`, and masks as ``bytes`` with one
+byte per row, 1 where the row is selected and 0 otherwise. Masks are
+built with ``bytes.translate``, combined as integers and applied with
+``itertools.compress`` or by copying runs of selected rows, so that
+no Python code runs per row.
+
+Examples
+--------
+>>> station_id, columns = read_file_columns("EUPO1801.txt")
+>>> mask = all_good(columns, ["1001", "2011"])
+>>> good = filter_columns(columns, mask)
+"""
+
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import compress
+from typing import (
+    AbstractSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import re
+
+from .decode import (
+    BAD_FLAGS,
+    FLAG_SUFFIX,
+    FLAG_TYPECODE,
+    Columns,
+    Row,
+)
+
+
+_BYTE_VALUES = 256
+_INVERT_TABLE = bytes([1, 0]) + bytes(_BYTE_VALUES - 2)
+_RUN_PATTERN = re.compile(b"\x01+")
+
+
+class Categorical(NamedTuple):
+    """Flags encoded as indices into the flags of the quality table.
+
+    The categories are the same for all arrays, followed by any flags
+    present that are not in the quality table.
+    """
+
+    codes: array
+    categories: List[int]
+
+    @property
+    def descriptions(self) -> List[str]:
+        return [describe_flag(flag) for flag in self.categories]
+
+
+@lru_cache(maxsize=None)
+def describe_flag(flag: int) -> str:
+    """Describe a quality control flag, as in the quality table."""
+    from .descriptions import tables
+
+    # Only the quality table is searched, as other tables have codes
+    # that look like flags, e.g. "100".
+    try:
+        return tables["quality"][f"{flag:02d}"]
+    except KeyError:
+        return f"Unknown flag: {flag}"
+
+def flag_table(flags: AbstractSet[int], selected: bool = True) -> bytes:
+    """Make a translation table from flag values to mask bytes.
+
+    Flags in `flags` are translated to 1 if `selected`, and to 0
+    otherwise. Other flags are translated to the opposite.
+    """
+
+    table = bytearray([not selected] * _BYTE_VALUES)
+    for flag in flags:
+        table[flag] = selected
+    return bytes(table)
+
+def good_table(bad_flags: AbstractSet[int] = BAD_FLAGS) -> bytes:
+    """Make a translation table from flag values to 1 if good, or 0 if bad."""
+    return flag_table(bad_flags, selected=False)
+
+def flag_array(rows: Iterable[Row], column: str) -> array:
+    """Collect a flag column of rows, as from :func:`~solardat.decode.read_raw`."""
+    return array(FLAG_TYPECODE, [row[column] for row in rows])  # type: ignore
+
+def flag_columns(rows: Sequence[Row]) -> Columns:
+    """Collect the flag columns of rows into unsigned byte arrays."""
+    if not rows:
+        return OrderedDict()
+    names = [name for name in rows[0] if name.endswith(FLAG_SUFFIX)]
+    return OrderedDict((name, flag_array(rows, name)) for name in names)
+
+def good_mask(flags: array, bad_flags: AbstractSet[int] = BAD_FLAGS) -> bytes:
+    """Mask the rows whose flag is not a bad flag."""
+    return flags.tobytes().translate(good_table(bad_flags))
+
+def isin(flags: array, values: AbstractSet[int]) -> bytes:
+    """Mask the rows whose flag is one of `values`."""
+    return flags.tobytes().translate(flag_table(values))
+
+def combine_all(masks: Iterable[bytes]) -> bytes:
+    """Mask the rows selected by every mask."""
+    return _combine(masks, any_=False)
+
+def combine_any(masks: Iterable[bytes]) -> bytes:
+    """Mask the rows selected by at least one mask."""
+    return _combine(masks, any_=True)
+
+def _combine(masks: Iterable[bytes], any_: bool) -> bytes:
+    # Mask bytes are 0 or 1, so combining masks as integers combines
+    # them bytewise.
+    iterator = iter(masks)
+    first = next(iterator, None)
+    if first is None:
+        raise ValueError("At least one mask is required")
+
+    length = len(first)
+    combined = int.from_bytes(first, "little")
+    for mask in iterator:
+        if len(mask) != length:
+            raise ValueError("Masks must have the same length")
+        value = int.from_bytes(mask, "little")
+        combined = combined | value if any_ else combined & value
+    return combined.to_bytes(length, "little")
+
+def invert(mask: bytes) -> bytes:
+    return mask.translate(_INVERT_TABLE)
+
+def all_good(
+    columns: Columns,
+    elements: Optional[Iterable[str]] = None,
+    bad_flags: AbstractSet[int] = BAD_FLAGS,
+) -> bytes:
+    """Mask the rows where every element has a good flag.
+
+    Parameters
+    ----------
+    columns : Dict[str, array.array]
+        Archival data, as from :func:`~solardat.decode.parse_columns`.
+    elements : Iterable[str], optional
+        Data element numbers to check. Defaults to all elements with
+        a flag column.
+    bad_flags : AbstractSet[int]
+        Quality control flags of bad samples.
+
+    Returns
+    -------
+    bytes
+        A byte per row, 1 if the row is good and 0 otherwise.
+    """
+
+    if elements is None:
+        names = [name for name in columns if name.endswith(FLAG_SUFFIX)]
+    else:
+        names = [f"{element}{FLAG_SUFFIX}" for element in elements]
+
+    missing = [name for name in names if name not in columns]
+    if missing:
+        raise ValueError(f"Flag columns not in data: {missing}")
+
+    n_rows = len(columns["ending_time"])
+    masks = [good_mask(columns[name], bad_flags) for name in names]
+    return combine_all([b"\x01" * n_rows, *masks])
+
+def selected_runs(mask: bytes) -> List[Tuple[int, int]]:
+    """Find the start and end of each run of selected rows."""
+    return [match.span() for match in _RUN_PATTERN.finditer(mask)]
+
+def filter_columns(columns: Columns, mask: bytes) -> Columns:
+    """Select the rows of columnar data where `mask` is 1."""
+    # Runs of selected rows are copied as bytes, rather than through
+    # Python objects.
+    runs = selected_runs(mask)
+    out: Columns = OrderedDict()
+    for name, column in columns.items():
+        view = memoryview(column).cast("B")
+        size = column.itemsize
+        selected = array(column.typecode)
+        selected.frombytes(b"".join([view[lo * size:hi * size] for lo, hi in runs]))
+        out[name] = selected
+    return out
+
+def filter_rows(rows: Iterable[Row], mask: bytes) -> List[Row]:
+    """Select the rows where `mask` is 1."""
+    return list(compress(rows, mask))
+
+@lru_cache(maxsize=None)
+def quality_flags() -> Tuple[int, ...]:
+    """List the flags of the quality table, in order."""
+    from .descriptions import tables
+
+    return tuple(sorted(int(flag) for flag in tables["quality"]))
+
+def categorize(flags: array) -> Categorical:
+    """Encode flags as indices into the flags of the quality table.
+
+    Flags have the same code in every array, so that categorized
+    arrays can be compared and combined. Flags that are not in the
+    quality table are given codes after those of the table.
+
+    Examples
+    --------
+    >>> categorical = categorize(columns["1001_FLAG"])
+    >>> categorical.codes[:2]
+    array('B', [1, 20])
+    >>> [categorical.descriptions[code] for code in categorical.codes[:2]]
+    ['Observed data; Raw data', 'Missing or bad data; Missing or bad data']
+    """
+
+    raw = flags.tobytes()
+    known = quality_flags()
+    categories = [*known, *sorted(set(raw).difference(known))]
+    table = bytearray(_BYTE_VALUES)
+    for code, flag in enumerate(categories):
+        table[flag] = code
+    return Categorical(array(FLAG_TYPECODE, raw.translate(table)), categories)
@@ -0,0 +1,212 @@
+"""Choose among archival data files of a station-month at different resolutions.
+
+A station usually has several files for the same month, e.g.
+``EUPO1801``, ``EUPF1801``, ``EUPQ1801`` and ``EUPH1801`` with one,
+five, fifteen and sixty minute data, many of which carry the same
+elements. Reconciling picks the finest resolution file for each
+element, using only the files' header lines, so that only those files
+are downloaded and decoded. Coarser data can then be derived locally
+with :mod:`~solardat.resample`.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from io import StringIO
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+import requests
+
+from .archive import INTERVALS, ArchiveFile, parse_filename, to_path
+from .decode import DELIMITER, FLAG_SUFFIX, Columns, parse_columns, parse_header
+from .http import _throttled, dispatch, make_session, should_retry
+from .resample import STATISTICS, Period, resample_columns
+from .throttle import retry
+
+
+# File types from the finest to the coarsest resolution.
+RESOLUTION_ORDER = tuple(sorted(INTERVALS, key=INTERVALS.__getitem__))
+
+Header = Tuple[int, int, List[str]]
+HeaderReader = Callable[[str], Header]
+
+# Shared by header reads, so that their connections are reused.
+_session: Optional[requests.Session] = None
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = make_session()
+    return _session
+
+
+class Selection(NamedTuple):
+    """An archival data file and the elements to be read from it."""
+
+    path: str
+    file_type: str
+    elements: List[str]
+
+    @property
+    def columns(self) -> List[str]:
+        """Data columns of the elements and their flags."""
+        return [
+            column
+            for element in self.elements
+            for column in (element, f"{element}{FLAG_SUFFIX}")
+        ]
+
+
+def header_elements(columns: Iterable[str]) -> List[str]:
+    """Get the data element numbers of the columns of a header."""
+    return [
+        column for column in columns
+        if column not in ("doy", "ending_time") and not column.endswith(FLAG_SUFFIX)
+    ]
+
+@lru_cache(maxsize=None)
+def read_header(path: str) -> Header:
+    """Read the header line of an archival data file.
+
+    Only the start of the file is downloaded. The response is
+    streamed outside of :func:`~solardat.http.dispatch`, so that a
+    partially read response is never cached as the file's contents,
+    but the request is throttled and retried in the same way.
+
+    Parameters
+    ----------
+    path : str
+        URL path component to the archival data file.
+
+    Returns
+    -------
+    station_id, year, columns : Tuple[int, int, List[str]]
+        As from :func:`~solardat.decode.parse_header`.
+    """
+
+    def send() -> requests.Response:
+        response = _throttled(_get_session(), "GET", path, {"stream": True})
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+
+    with retry(send, should_retry) as response:
+        line = next(response.iter_lines(), b"")
+
+    if not line:
+        raise ValueError(f"Empty archival data file: {path}")
+    return parse_header(line.decode("ascii").split(DELIMITER))
+
+def _station_month(file: ArchiveFile) -> Tuple[str, int, int]:
+    return file.prefix, file.year, file.month
+
+def reconcile(
+    paths: Iterable[str],
+    elements: Optional[Iterable[str]] = None,
+    header_reader: HeaderReader = read_header,
+) -> List[Selection]:
+    """Pick the finest resolution file for each element of each station-month.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        URLs or URL path components to archival data files, as from
+        :func:`~solardat.fetch.find_files`.
+    elements : Iterable[str], optional
+        Data element numbers to be read. All elements of each
+        station-month are read by default. Elements that are not in
+        any file of a station-month are left out.
+    header_reader : Callable[[str], Tuple[int, int, List[str]]]
+        Function to get the header of a file by its path.
+
+    Returns
+    -------
+    List[Selection]
+        The files to be read and the elements to read from each.
+        Files that no element is read from are left out.
+
+    Examples
+    --------
+    >>> paths = ["download/Archive/EUPF1801.txt", "download/Archive/EUPH1801.txt",
+    ...          "download/Archive/EUPO1801.txt", "download/Archive/EUPQ1801.txt"]
+    >>> reconcile(paths, ["1001", "9301"])
+    [Selection(path='download/Archive/EUPO1801.txt', file_type='O',
+               elements=['1001']),
+     Selection(path='download/Archive/EUPH1801.txt', file_type='H',
+               elements=['9301'])]
+    """
+
+    wanted = None if elements is None else list(elements)
+    groups: Dict[Tuple[str, int, int], List[ArchiveFile]] = OrderedDict()
+    for path in sorted(set(map(to_path, paths))):
+        file = parse_filename(path)
+        groups.setdefault(_station_month(file), []).append(file)
+
+    selections = []
+    for files in groups.values():
+        files.sort(key=lambda file: RESOLUTION_ORDER.index(file.file_type))
+        chosen: Dict[str, List[str]] = OrderedDict()
+        taken: Set[str] = set()
+        for file in files:
+            # Coarser files are not looked at once every element is found.
+            if wanted is not None and taken.issuperset(wanted):
+                break
+
+            _, _, columns = header_reader(file.path)
+            available = header_elements(columns)
+            for element in available if wanted is None else wanted:
+                if element in available and element not in taken:
+                    taken.add(element)
+                    chosen.setdefault(file.path, []).append(element)
+
+        for file in files:
+            if file.path in chosen:
+                selections.append(Selection(file.path, file.file_type, chosen[file.path]))
+
+    return selections
+
+def fetch_reconciled(
+    paths: Iterable[str],
+    elements: Optional[Iterable[str]] = None,
+    period: Optional[Period] = None,
+    statistics: Iterable[str] = STATISTICS,
+) -> Iterator[Tuple[Selection, int, Columns]]:
+    """Fetch the finest resolution data of each element.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        URLs or URL path components to archival data files.
+    elements : Iterable[str], optional
+        Data element numbers to be read, see :func:`reconcile`.
+    period : str or timedelta, optional
+        If given, the data is resampled to this period, e.g. "H" for
+        hourly data, see :func:`~solardat.resample.resample_columns`.
+    statistics : Iterable[str]
+        Statistics to compute when resampling.
+
+    Returns
+    -------
+    Iterator[Tuple[Selection, int, Dict[str, array.array]]]
+        Generator over the selected files, with the station id and
+        the selected columns of each.
+    """
+
+    for selection in reconcile(paths, elements):
+        response = dispatch("GET", selection.path)
+        with StringIO(response.text) as buffer:
+            station_id, columns = parse_columns(buffer, selection.columns)
+        if period is not None:
+            columns = resample_columns(columns, period, statistics)
+        yield selection, station_id, columns
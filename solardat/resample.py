@@ -0,0 +1,291 @@
+"""Aggregate archival data over fixed time windows.
+
+Windows are labelled by their end time, like the intervals of archival
+data files: a window includes the samples ending after the previous
+window's end, up to and including its own. For example, the hourly
+window ending at 01:00 includes samples ending at 00:01 through 01:00,
+and the daily window ending at midnight includes the "24:00" sample.
+
+Samples with a bad quality control flag are left out of every
+statistic other than the fraction of good samples.
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import compress
+from typing import AbstractSet, Dict, Iterable, Iterator, Optional, Tuple, Union
+import math
+
+from .archive import INTERVALS
+from .decode import (
+    BAD_FLAGS,
+    FLAG_SUFFIX,
+    MEASURE_TYPECODE,
+    TIMESTAMP_TYPECODE,
+    Columns,
+    Row,
+    from_timestamp,
+    to_timestamp,
+)
+from .qc import good_table
+
+
+STATISTICS = ("mean", "sum", "min", "max", "count", "good_fraction")
+# Typecode of the "count" columns of resampled columnar data, which are
+# integers, unlike the other statistics.
+COUNT_TYPECODE = "q"
+
+Period = Union[str, timedelta]
+
+
+def period_seconds(period: Period) -> int:
+    """Get the length of a window in seconds.
+
+    Parameters
+    ----------
+    period : str or timedelta
+        Window length, or a file type letter with the interval length
+        to use, e.g. "H" for hourly windows.
+    """
+
+    if isinstance(period, str):
+        if period not in INTERVALS:
+            raise ValueError(f"Unknown file type: {period}")
+        period = INTERVALS[period]
+
+    seconds = period // timedelta(seconds=1)
+    if seconds <= 0:
+        raise ValueError("`period` must be at least one second")
+    return seconds
+
+def window_end(timestamp: int, seconds: int) -> int:
+    """Get the end of the window containing an interval end time."""
+    return -(-timestamp // seconds) * seconds
+
+def _check_statistics(statistics: Iterable[str]) -> Tuple[str, ...]:
+    selected = tuple(statistics)
+    unknown = set(selected) - set(STATISTICS)
+    if unknown:
+        raise ValueError(f"Unknown statistics: {sorted(unknown)}")
+    return selected
+
+def _compute(
+    statistics: Tuple[str, ...],
+    samples: int,
+    count: int,
+    total: float,
+    minimum: float,
+    maximum: float,
+) -> Dict[str, float]:
+    values = {
+        "mean": total / count if count else math.nan,
+        "sum": total,
+        "min": minimum if count else math.nan,
+        "max": maximum if count else math.nan,
+        "count": count,
+        "good_fraction": count / samples if samples else math.nan,
+    }
+    return {statistic: values[statistic] for statistic in statistics}
+
+
+class _Accumulator(object):
+    __slots__ = ("samples", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.count = 0
+        self.total = 0.
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float, good: bool) -> None:
+        self.samples += 1
+        if good:
+            self.count += 1
+            self.total += value
+            if value < self.minimum:
+                self.minimum = value
+            if value > self.maximum:
+                self.maximum = value
+
+    def compute(self, statistics: Tuple[str, ...]) -> Dict[str, float]:
+        return _compute(
+            statistics,
+            self.samples,
+            self.count,
+            self.total,
+            self.minimum,
+            self.maximum,
+        )
+
+
+def _window_row(
+    window: int,
+    accumulators: Dict[str, _Accumulator],
+    statistics: Tuple[str, ...],
+) -> Row:
+    row: Row = OrderedDict()
+    row["ending_time"] = from_timestamp(window)
+    for element, accumulator in accumulators.items():
+        for statistic, value in accumulator.compute(statistics).items():
+            row[f"{element}_{statistic}"] = value
+    return row
+
+def resample_rows(
+    rows: Iterable[Row],
+    period: Period,
+    statistics: Iterable[str] = STATISTICS,
+    bad_flags: AbstractSet[int] = BAD_FLAGS,
+) -> Iterator[Row]:
+    """Aggregate rows of archival data over fixed time windows.
+
+    Rows are aggregated as they are consumed, so only one window's
+    statistics are held at a time.
+
+    Parameters
+    ----------
+    rows : Iterable[OrderedDict]
+        Archival data ordered by interval end time, as from
+        :func:`~solardat.decode.iter_archival`. Rows of consecutive
+        files can be chained together.
+    period : str or timedelta
+        Window length, or a file type letter with the interval length
+        to use, e.g. "H" for hourly windows.
+    statistics : Iterable[str]
+        Statistics to compute for each data element, from
+        :data:`STATISTICS`.
+    bad_flags : AbstractSet[int]
+        Quality control flags of samples to leave out.
+
+    Returns
+    -------
+    Iterator[OrderedDict]
+        A row per window with any samples, with the window's end time
+        and a "<element>_<statistic>" field for each data element and
+        statistic. Elements without good samples in a window have a
+        mean, minimum and maximum of NaN.
+
+    Examples
+    --------
+    >>> with open("EUPO1801.txt") as fh:
+    ...     _, rows = iter_archival(fh)
+    ...     hourly = list(resample_rows(rows, "H", ["mean", "good_fraction"]))
+    >>> hourly[0]
+    OrderedDict([('ending_time', datetime.datetime(2018, 1, 1, 1, 0)),
+                 ('1001_mean', 0.0),
+                 ('1001_good_fraction', 1.0),
+                 ...])
+    """
+
+    seconds = period_seconds(period)
+    selected = _check_statistics(statistics)
+    bad = frozenset(bad_flags)
+
+    flag_columns: Dict[str, str] = {}
+    current: Optional[int] = None
+    accumulators: Dict[str, _Accumulator] = OrderedDict()
+
+    for row in rows:
+        window = window_end(to_timestamp(row["ending_time"]), seconds)  # type: ignore
+        if window != current:
+            if current is not None:
+                yield _window_row(current, accumulators, selected)
+            current = window
+            accumulators = OrderedDict()
+
+        for column, value in row.items():
+            if column == "ending_time" or column.endswith(FLAG_SUFFIX):
+                continue
+            if column not in flag_columns:
+                flag_columns[column] = f"{column}{FLAG_SUFFIX}"
+            flag = row.get(flag_columns[column])
+
+            if column not in accumulators:
+                accumulators[column] = _Accumulator()
+            accumulators[column].add(value, flag not in bad)  # type: ignore
+
+    if current is not None:
+        yield _window_row(current, accumulators, selected)
+
+def resample_columns(
+    columns: Columns,
+    period: Period,
+    statistics: Iterable[str] = STATISTICS,
+    bad_flags: AbstractSet[int] = BAD_FLAGS,
+) -> Columns:
+    """Aggregate columnar archival data over fixed time windows.
+
+    Windows are located by bisecting the interval end times, and each
+    window's statistics are computed over slices of the columns.
+
+    Parameters
+    ----------
+    columns : Dict[str, array.array]
+        Archival data ordered by interval end time, as from
+        :func:`~solardat.decode.parse_columns`.
+    period : str or timedelta
+        Window length, or a file type letter with the interval length
+        to use, e.g. "H" for hourly windows.
+    statistics : Iterable[str]
+        Statistics to compute for each data element, from
+        :data:`STATISTICS`.
+    bad_flags : AbstractSet[int]
+        Quality control flags of samples to leave out.
+
+    Returns
+    -------
+    Dict[str, array.array]
+        Window end times, as seconds since the epoch, and a
+        "<element>_<statistic>" column for each data element and
+        statistic, of integers for "count" and doubles otherwise. See
+        :func:`resample_rows`.
+    """
+
+    seconds = period_seconds(period)
+    selected = _check_statistics(statistics)
+    table = good_table(bad_flags)
+
+    times = columns["ending_time"]
+    elements = [
+        name for name in columns
+        if name != "ending_time" and not name.endswith(FLAG_SUFFIX)
+    ]
+    # One byte per sample, 1 if the sample is good and 0 otherwise.
+    masks = {}
+    for element in elements:
+        flags = columns.get(f"{element}{FLAG_SUFFIX}")
+        masks[element] = (
+            b"\x01" * len(times) if flags is None else flags.tobytes().translate(table)
+        )
+
+    out: Columns = OrderedDict()
+    out["ending_time"] = array(TIMESTAMP_TYPECODE)
+    for element in elements:
+        for statistic in selected:
+            typecode = COUNT_TYPECODE if statistic == "count" else MEASURE_TYPECODE
+            out[f"{element}_{statistic}"] = array(typecode)
+
+    lo = 0
+    while lo < len(times):
+        window = window_end(times[lo], seconds)
+        hi = bisect_right(times, window, lo)
+        out["ending_time"].append(window)
+
+        for element in elements:
+            good = list(compress(columns[element][lo:hi], masks[element][lo:hi]))
+            values = _compute(
+                selected,
+                hi - lo,
+                len(good),
+                sum(good, 0.),
+                min(good, default=math.nan),
+                max(good, default=math.nan),
+            )
+            for statistic, value in values.items():
+                out[f"{element}_{statistic}"].append(value)
+
+        lo = hi
+
+    return out
@@ -0,0 +1,234 @@
+"""Schedule fetches of archival data files by priority.
+
+A :class:`FetchScheduler` runs fetches submitted by many callers with a
+fixed number of workers sharing one client session. Jobs are taken:
+
+- by priority class, so that :data:`INTERACTIVE` requests go ahead of
+  :data:`BACKGROUND` backfills,
+- round robin over stations within a class, so that a backfill of one
+  station does not hold up the others,
+- smallest files first within a station, i.e. hourly data ("H") before
+  one-minute data ("O"), then in order of submission.
+
+Some workers are reserved for interactive requests, so that they do
+not wait for a running backfill download to finish. Interactive fetches
+are also marked urgent, so that they go ahead of backfill requests
+waiting for the shared throttle of
+:func:`~solardat.async_fetch.fetch_file`.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+
+from .archive import INTERVALS, parse_filename
+from .decode import Row
+
+
+# Priority classes, most urgent first.
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# File types from the smallest to the largest files.
+SIZE_ORDER = tuple(sorted(INTERVALS, key=INTERVALS.__getitem__, reverse=True))
+
+DEFAULT_WORKERS = 8
+DEFAULT_RESERVED = 1
+
+Fetch = Callable[..., Awaitable[Tuple[int, List[Row]]]]
+
+
+def job_key(path: str) -> Tuple[str, int]:
+    """Get the station and size rank of a path, for scheduling.
+
+    Paths that are not archival data files are given an empty station
+    and scheduled after the largest files.
+    """
+
+    try:
+        file = parse_filename(path)
+    except ValueError:
+        return "", len(SIZE_ORDER)
+    return file.prefix, SIZE_ORDER.index(file.file_type)
+
+
+class _Job(object):
+    __slots__ = ("path", "priority", "future")
+
+    def __init__(self, path: str, priority: int, future: asyncio.Future) -> None:
+        self.path = path
+        self.priority = priority
+        self.future = future
+
+class _Class(object):
+    """Jobs of one priority class, by station."""
+
+    def __init__(self) -> None:
+        # Stations in round robin order, with a heap of jobs each.
+        self.stations: Dict[str, List[Tuple[int, int, _Job]]] = OrderedDict()
+        self.size = 0
+
+    def push(self, station: str, rank: int, order: int, job: _Job) -> None:
+        heapq.heappush(self.stations.setdefault(station, []), (rank, order, job))
+        self.size += 1
+
+    def pop(self) -> _Job:
+        station, jobs = next(iter(self.stations.items()))
+        _, _, job = heapq.heappop(jobs)
+        del self.stations[station]
+        # The station goes to the back of the line.
+        if jobs:
+            self.stations[station] = jobs
+        self.size -= 1
+        return job
+
+
+class FetchScheduler(object):
+    """Run fetches of archival data files by priority.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        The client session shared by all fetches.
+    workers : int
+        Number of fetches run at once.
+    reserved : int
+        Number of the workers that only run interactive fetches.
+    fetch : Callable
+        Coroutine function of the session and a path fetching the
+        file, also given whether the fetch is interactive as the
+        `urgent` keyword argument. Defaults to
+        :func:`~solardat.async_fetch.fetch_file`.
+
+    Examples
+    --------
+    >>> async with aiohttp.ClientSession() as session:
+    ...     async with FetchScheduler(session) as scheduler:
+    ...         backfill = [scheduler.submit(path) for path in paths]
+    ...         station_id, rows = await scheduler.submit(
+    ...             "download/Archive/EUPQ1801.txt", INTERACTIVE
+    ...         )
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        workers: int = DEFAULT_WORKERS,
+        reserved: int = DEFAULT_RESERVED,
+        fetch: Optional[Fetch] = None,
+    ) -> None:
+        if not 0 <= reserved < workers:
+            raise ValueError("Expected 0 <= reserved < workers")
+        if fetch is None:
+            from .async_fetch import fetch_file
+            fetch = fetch_file
+
+        self.session = session
+        self.workers = workers
+        self.reserved = reserved
+        self.fetch = fetch
+        self._classes = {priority: _Class() for priority in PRIORITIES}
+        self._order = itertools.count()
+        self._available: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Future] = []
+
+    async def __aenter__(self) -> "FetchScheduler":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return sum(jobs.size for jobs in self._classes.values())
+
+    def start(self) -> None:
+        """Start the workers in the running event loop."""
+        if self._tasks:
+            raise RuntimeError("The scheduler is already started")
+        self._available = asyncio.Event()
+        self._tasks = [
+            asyncio.ensure_future(
+                self._work(INTERACTIVE if worker < self.reserved else BACKGROUND)
+            )
+            for worker in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        """Stop the workers, cancelling fetches that have not finished."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for jobs in self._classes.values():
+            while jobs.size:
+                jobs.pop().future.cancel()
+
+    def submit(self, path: str, priority: int = BACKGROUND) -> asyncio.Future:
+        """Schedule a fetch of a file.
+
+        Parameters
+        ----------
+        path : str
+            URL path component to the archival data file.
+        priority : int
+            :data:`INTERACTIVE` or :data:`BACKGROUND`.
+
+        Returns
+        -------
+        asyncio.Future
+            Future of the station id and rows of the file, see
+            :func:`~solardat.async_fetch.fetch_file`. Cancelling it
+            removes the fetch from the schedule if it has not started.
+        """
+
+        if priority not in self._classes:
+            raise ValueError(f"Unknown priority: {priority!r}")
+        if self._available is None:
+            raise RuntimeError("The scheduler is not started")
+
+        job = _Job(path, priority, asyncio.get_event_loop().create_future())
+        station, rank = job_key(path)
+        self._classes[priority].push(station, rank, next(self._order), job)
+        self._available.set()
+        return job.future
+
+    def _next_job(self, lowest: int) -> Optional[_Job]:
+        for priority in PRIORITIES:
+            if priority > lowest:
+                break
+            jobs = self._classes[priority]
+            while jobs.size:
+                job = jobs.pop()
+                if not job.future.cancelled():
+                    return job
+        return None
+
+    async def _work(self, lowest: int) -> None:
+        assert self._available is not None
+        while True:
+            job = self._next_job(lowest)
+            if job is None:
+                # Workers are woken by each submitted job, and those that
+                # find none to run wait again.
+                self._available.clear()
+                await self._available.wait()
+                continue
+
+            try:
+                result = await self.fetch(
+                    self.session, job.path, urgent=job.priority == INTERACTIVE
+                )
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as exc:
+                if not job.future.done():
+                    job.future.set_exception(exc)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
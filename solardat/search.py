@@ -1,7 +1,9 @@
 from collections import defaultdict
 from datetime import date
-from lxml import html
-from typing import DefaultDict, Dict, List
+from io import BytesIO
+from lxml import etree, html
+from lxml.html.defs import link_attrs
+from typing import DefaultDict, Dict, List, Optional
 import re
 
 from .http import dispatch
@@ -10,6 +12,12 @@ from .http import dispatch
 ARCHIVAL_PATH = "SelectArchival.html"
 LIST_FILES_PATH = "cgi-bin/ShowArchivalFiles.cgi"
 
+_DOWNLOAD_URL_PATTERN = re.compile(r"download/Archive/\w+?\.txt")
+# Attributes identifying the search results table.
+_RESULTS_TABLE_ATTRIBUTES = {"border": "1", "cellspacing": "0", "cellpadding": "2"}
+# Attributes identifying a cell with a station subheading.
+_SUBHEADING_ATTRIBUTES = {"align": "CENTER", "colspan": "3"}
+
 
 def fetch_stations() -> List[str]:
     """List stations that can be searched for archival data.
@@ -48,8 +56,7 @@ def make_search_form(start: date, end: date, stations: List[str]) -> Dict[str, s
     }
 
 def is_download_url(url: str) -> bool:
-    pattern = r"download/Archive/\w+?\.txt"
-    match = re.search(pattern, url)
+    match = _DOWNLOAD_URL_PATTERN.search(url)
     return match is not None
 
 def rel_links_page(start: date, end: date, stations: List[str]) -> bytes:
@@ -57,44 +64,69 @@ def rel_links_page(start: date, end: date, stations: List[str]) -> bytes:
     response = dispatch("POST", LIST_FILES_PATH, data=form)
     return response.content
 
-def extract_rel_links(page: bytes) -> Dict[str, List[str]]:
-    tree = html.fromstring(page)
+def _has_attributes(element: etree._Element, attributes: Dict[str, str]) -> bool:
+    return all(element.get(key) == value for key, value in attributes.items())
 
-    # Find the table with the actual search results in it.
-    table_xpath = (
-        '//table[@border="1" and '
-        '@cellspacing="0" and '
-        '@cellpadding="2"]'
-    )
-    tables = tree.xpath(table_xpath)
-    if not tables:
-        raise RuntimeError("Unable to find links")
+def _find_subheading(row: etree._Element) -> Optional[etree._Element]:
+    for cell in row:
+        if cell.tag == "td" and _has_attributes(cell, _SUBHEADING_ATTRIBUTES):
+            return cell
+    return None
 
-    # NB: The website does not wrap the rows in a `tbody` tag.
-    body = tables[0]
+def _download_links(row: etree._Element) -> List[str]:
+    return [
+        value
+        for element in row.iter(etree.Element)
+        for key, value in element.items()
+        if key in link_attrs and is_download_url(value)
+    ]
+
+def extract_rel_links(page: bytes) -> Dict[str, List[str]]:
+    # The page is parsed incrementally, and each row of the search
+    # results table discarded once it has been seen, as the table
+    # can have tens of thousands of rows.
+    events = etree.iterparse(
+        BytesIO(page), events=("start", "end"), tag=("table", "tr"), html=True
+    )
 
     # Stations are "delimited" by having a full table width row
     # with the station name in it. All rows after are associated
     # with that station, until another full width row appears or
     # the footer row appears.
-    subheading_xpath = 'td[@align="CENTER" and @colspan="3"]'
     all_links: DefaultDict[str, List[str]] = defaultdict(list)
     station = None
-    for row in body:
-        # Check that the row contains the station subheader.
-        subheadings = row.xpath(subheading_xpath)
-        if subheadings:
-            subheading = subheadings[0]
-            wrapper = subheading[0]
-            station = wrapper.text
+    body = None
+    for event, element in events:
+        if body is None:
+            # Find the table with the actual search results in it.
+            if event == "start" and element.tag == "table":
+                if _has_attributes(element, _RESULTS_TABLE_ATTRIBUTES):
+                    body = element
             continue
 
-        if station is None:
+        if event == "end" and element is body:
+            break
+
+        # NB: The website does not wrap the rows in a `tbody` tag.
+        if event != "end" or element.getparent() is not body:
             continue
 
-        for _, _, link, _ in row.iterlinks():
+        row = element
+        subheading = _find_subheading(row)
+        if subheading is not None:
+            wrapper = subheading[0]
+            station = wrapper.text
+        elif station is not None:
             # TODO: check assumption that one row = one link
-            if is_download_url(link):
-                all_links[station].append(link)
+            links = _download_links(row)
+            if links:
+                all_links[station].extend(links)
+
+        row.clear()
+        while row.getprevious() is not None:
+            del body[0]
+
+    if body is None:
+        raise RuntimeError("Unable to find links")
 
     return dict(all_links)
@@ -0,0 +1,208 @@
+"""Time-indexed archival data.
+
+A :class:`TimeSeries` keeps decoded archival data as typed columns in
+order of interval end time, so a time window is located by bisecting
+the end times and returned as views into the columns, without copying
+or scanning rows.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from operator import le
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .decode import (
+    Columns,
+    Row,
+    columns_to_rows,
+    from_timestamp,
+    read_file_columns,
+    rows_to_columns,
+    to_timestamp,
+)
+
+
+PathLike = Union[str, Path]
+Views = Dict[str, memoryview]
+
+
+class TimeSeries(object):
+    """Archival data of a station, ordered by interval end time.
+
+    Windows are returned as ``memoryview`` objects into the columns.
+    The columns cannot be resized while views into them exist.
+
+    Examples
+    --------
+    >>> series = read_series("EUPO1801.txt", ["1001"])
+    >>> window = series.window(datetime(2018, 1, 2, 12), datetime(2018, 1, 2, 13))
+    >>> len(window["1001"]), sum(window["1001"])
+    (61, 13540.0)
+    """
+
+    def __init__(self, station_id: int, columns: Columns) -> None:
+        times = columns["ending_time"]
+        if not all(map(le, times[:-1], times[1:])):
+            raise ValueError("Interval end times are not in order")
+
+        self.station_id = station_id
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["ending_time"])
+
+    def __repr__(self) -> str:
+        return (
+            f"TimeSeries(station_id={self.station_id}, rows={len(self)}, "
+            f"columns={list(self.columns)})"
+        )
+
+    @property
+    def first(self) -> Optional[datetime]:
+        return self.end_time(0) if len(self) else None
+
+    @property
+    def last(self) -> Optional[datetime]:
+        return self.end_time(-1) if len(self) else None
+
+    def end_time(self, index: int) -> datetime:
+        return from_timestamp(self.columns["ending_time"][index])
+
+    @classmethod
+    def from_rows(cls, station_id: int, rows: Sequence[Row]) -> "TimeSeries":
+        """Make a time series from the rows of :func:`~solardat.decode.read_raw`."""
+        return cls(station_id, rows_to_columns(rows))
+
+    @classmethod
+    def concat(cls, series: Iterable["TimeSeries"]) -> "TimeSeries":
+        """Join the time series of consecutive files from one station.
+
+        The series are ordered by their first end time, and must have
+        the same columns and not overlap.
+        """
+
+        parts = sorted(
+            (part for part in series if len(part)),
+            key=lambda part: part.columns["ending_time"][0],
+        )
+        if not parts:
+            raise ValueError("At least one non-empty time series is required")
+
+        station_ids = {part.station_id for part in parts}
+        if len(station_ids) > 1:
+            raise ValueError(f"Time series are from several stations: {station_ids}")
+        names = list(parts[0].columns)
+        if any(list(part.columns) != names for part in parts):
+            raise ValueError("Time series have different columns")
+
+        columns: Columns = OrderedDict()
+        for name in names:
+            column = array(parts[0].columns[name].typecode)
+            for part in parts:
+                column.extend(part.columns[name])
+            columns[name] = column
+        return cls(parts[0].station_id, columns)
+
+    def locate(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Tuple[int, int]:
+        """Get the range of row indices with end times from `start` to `end`."""
+        times = self.columns["ending_time"]
+        lo = 0 if start is None else bisect_left(times, to_timestamp(start))
+        hi = len(times) if end is None else bisect_right(times, to_timestamp(end))
+        return lo, max(lo, hi)
+
+    def window(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Iterable[str]] = None,
+    ) -> Views:
+        """Get views of the data with end times from `start` to `end`.
+
+        Parameters
+        ----------
+        start : datetime, optional
+            Earliest interval end time to include.
+        end : datetime, optional
+            Latest interval end time to include.
+        columns : Iterable[str], optional
+            Columns to include. Interval end times are always included.
+
+        Returns
+        -------
+        Dict[str, memoryview]
+            Views into the columns, in the format of
+            :func:`~solardat.decode.parse_columns`.
+        """
+
+        lo, hi = self.locate(start, end)
+        names = list(self.columns) if columns is None else list(columns)
+        if "ending_time" not in names:
+            names.insert(0, "ending_time")
+        return OrderedDict(
+            (name, memoryview(self.columns[name])[lo:hi]) for name in names
+        )
+
+    def slice(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> "TimeSeries":
+        """Copy the data with end times from `start` to `end`."""
+        lo, hi = self.locate(start, end)
+        columns = OrderedDict(
+            (name, column[lo:hi]) for name, column in self.columns.items()
+        )
+        return TimeSeries(self.station_id, columns)
+
+    def rows(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Row]:
+        """Get the rows with end times from `start` to `end`.
+
+        Rows are in the format of :func:`~solardat.decode.read_raw`.
+        """
+
+        return columns_to_rows(self.slice(start, end).columns)
+
+
+def read_series(path: PathLike, columns: Optional[Iterable[str]] = None) -> TimeSeries:
+    """Read a local archival data file into a time series.
+
+    See :func:`~solardat.decode.read_file_columns`.
+    """
+
+    station_id, data = read_file_columns(path, columns)
+    return TimeSeries(station_id, data)
+
+def read_station_series(
+    paths: Iterable[PathLike],
+    columns: Optional[Iterable[str]] = None,
+) -> TimeSeries:
+    """Read local archival data files of one station into a time series.
+
+    Parameters
+    ----------
+    paths : Iterable[str or Path]
+        Paths to archival data files of consecutive months from one
+        station, with the same columns.
+    columns : Iterable[str], optional
+        Data columns to decode. All are decoded by default.
+
+    Examples
+    --------
+    >>> paths = sorted(Path("mirror/EUP").glob("EUPO18*.txt"))
+    >>> series = read_station_series(paths, ["1001", "1001_FLAG"])
+    >>> january = series.window(datetime(2018, 1, 1), datetime(2018, 2, 1))
+    """
+
+    selected = None if columns is None else list(columns)
+    return TimeSeries.concat(read_series(path, selected) for path in paths)
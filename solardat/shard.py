@@ -0,0 +1,172 @@
+"""Fetch and decode archival data files with several processes.
+
+Decoding is CPU bound, so a single process cannot make use of more
+than one core however many downloads it runs at once. Sharding splits
+the files across worker processes, each with its own event loop and
+client session. Every shard writes decoded files into a shared
+:class:`~solardat.store.ColumnStore` under its own catalog, and the
+shard catalogs are merged into the store's catalog once all shards
+finish.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+import asyncio
+import os
+
+from .archive import parse_filename, to_path
+from .decode import parse_columns
+from .store import ColumnStore
+
+
+# Concurrent downloads per shard.
+DEFAULT_LIMIT = 4
+
+PathLike = Union[str, Path]
+
+
+class ShardResult(NamedTuple):
+    written: List[str]
+    # Failed paths, with a description of the error. Exceptions are
+    # not returned, as they may not be picklable.
+    failed: Dict[str, str]
+
+
+def shard_catalog_name(shard: int) -> str:
+    return f"catalog-{shard:03d}.json"
+
+def partition(paths: Iterable[str], n_shards: int) -> List[List[str]]:
+    """Split paths into shards of nearly equal size.
+
+    Paths are dealt out in sorted order, so that each shard gets a
+    similar mix of stations and file types.
+    """
+
+    if n_shards < 1:
+        raise ValueError("`n_shards` must be at least 1")
+
+    unique = sorted(set(map(to_path, paths)))
+    return [unique[shard::n_shards] for shard in range(n_shards)]
+
+async def _fetch_shard(
+    paths: Sequence[str],
+    store: ColumnStore,
+    limit: int,
+) -> ShardResult:
+    import aiohttp
+    from .async_fetch import get_response
+
+    result = ShardResult([], {})
+    semaphore = asyncio.Semaphore(limit)
+
+    async with aiohttp.ClientSession() as session:
+        async def fetch(path: str) -> None:
+            try:
+                async with semaphore:
+                    response = await get_response(session, path)
+                contents = response.text
+
+                with StringIO(contents) as buffer:
+                    station_id, columns = parse_columns(buffer)
+                store.write(parse_filename(path).stem, station_id, columns)
+                result.written.append(path)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                result.failed[path] = repr(exc)
+
+        await asyncio.gather(*map(fetch, paths))
+
+    return result
+
+def run_shard(
+    shard: int,
+    paths: Sequence[str],
+    root: PathLike,
+    limit: int = DEFAULT_LIMIT,
+) -> ShardResult:
+    """Fetch and store a shard of archival data files.
+
+    Runs in a worker process, with its own event loop. Written
+    partitions are recorded in the shard's own catalog.
+    """
+
+    store = ColumnStore(root, shard_catalog_name(shard))
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(_fetch_shard(paths, store, limit))
+    finally:
+        loop.close()
+        store.save()
+    return result
+
+def merge_catalogs(root: PathLike, shards: Iterable[int]) -> ColumnStore:
+    """Merge shard catalogs into the store's catalog, and remove them."""
+    store = ColumnStore(root)
+    catalogs = [Path(root, shard_catalog_name(shard)) for shard in shards]
+    for catalog in catalogs:
+        if catalog.exists():
+            store.partitions.update(ColumnStore(root, catalog.name).partitions)
+    store.save()
+
+    for catalog in catalogs:
+        if catalog.exists():
+            catalog.unlink()
+    return store
+
+def fetch_sharded(
+    paths: Iterable[str],
+    root: PathLike,
+    processes: Optional[int] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> ShardResult:
+    """Fetch archival data files into a column store with several processes.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        URLs or URL path components to the archival data files, as
+        from :func:`~solardat.fetch.find_files`.
+    root : str or Path
+        Directory of the column store to write to.
+    processes : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    limit : int
+        Maximum number of concurrent downloads per process.
+
+    Returns
+    -------
+    ShardResult
+        The paths that were written and that failed, over all shards.
+
+    Examples
+    --------
+    >>> results = find_files(date(2010, 1, 1), date(2019, 12, 1), ["Eugene"])
+    >>> paths = [url for urls in results.values() for url in urls]
+    >>> result = fetch_sharded(paths, "store", processes=32)
+    >>> store = ColumnStore("store")
+    """
+
+    n_shards = processes or os.cpu_count() or 1
+    shards = partition(paths, n_shards)
+    Path(root).mkdir(parents=True, exist_ok=True)
+
+    combined = ShardResult([], {})
+    try:
+        with ProcessPoolExecutor(max_workers=n_shards) as executor:
+            futures = [
+                executor.submit(run_shard, shard, shard_paths, root, limit)
+                for shard, shard_paths in enumerate(shards)
+                if shard_paths
+            ]
+            for future in futures:
+                result = future.result()
+                combined.written.extend(result.written)
+                combined.failed.update(result.failed)
+    finally:
+        merge_catalogs(root, range(n_shards))
+
+    combined.written.sort()
+    return combined
@@ -0,0 +1,209 @@
+"""Load archival data into SQLite.
+
+Rows from all archival data files are loaded into a single table, with
+the file's stem and station id. Columns are added to the table as data
+elements are first seen, following the layout of each file's header.
+"""
+
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+import sqlite3
+
+from .decode import FLAG_SUFFIX, Row, batch_rows
+
+
+DEFAULT_TABLE = "observations"
+# Rows inserted per transaction.
+DEFAULT_BATCH_SIZE = 20000
+
+_Result = Tuple[str, int, Iterable[Row]]
+
+_FIXED_COLUMNS = (
+    ("filestem", "TEXT NOT NULL"),
+    ("station_id", "INTEGER NOT NULL"),
+    ("ending_time", "TEXT NOT NULL"),
+)
+
+
+def quote(identifier: str) -> str:
+    escaped = identifier.replace('"', '""')
+    return f'"{escaped}"'
+
+def column_type(column: str) -> str:
+    return "INTEGER" if column.endswith(FLAG_SUFFIX) else "REAL"
+
+def format_time(value: datetime) -> str:
+    # ISO 8601 text sorts chronologically and works with SQLite's
+    # date and time functions.
+    return value.isoformat(" ")
+
+
+class SQLiteSink(object):
+    """Batched loader of archival data into a SQLite table.
+
+    Indexes are created by :meth:`create_indexes`, or on leaving the
+    sink's context, so that they are built once after a bulk load
+    instead of maintained on every insert.
+
+    Examples
+    --------
+    >>> connection = sqlite3.connect("solardat.db")
+    >>> with SQLiteSink(connection) as sink:
+    ...     for filestem, station_id, rows in stream_compressed(zipfile_path):
+    ...         sink.write(filestem, station_id, rows)
+    """
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        table: str = DEFAULT_TABLE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.connection = connection
+        self.table = table
+        self.batch_size = batch_size
+        self._columns: List[str] = []
+        self._statements: Dict[Tuple[str, ...], str] = {}
+
+    def __enter__(self) -> "SQLiteSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.create_indexes()
+
+    def _existing_columns(self) -> List[str]:
+        cursor = self.connection.execute(f"PRAGMA table_info({quote(self.table)})")
+        return [name for _, name, *_ in cursor]
+
+    def ensure_columns(self, columns: Iterable[str]) -> None:
+        """Create the table, or add columns to it, as needed."""
+        if not self._columns:
+            self._columns = self._existing_columns()
+
+        with self.connection:
+            if not self._columns:
+                definitions = [f"{quote(name)} {kind}" for name, kind in _FIXED_COLUMNS]
+                self.connection.execute(
+                    f"CREATE TABLE {quote(self.table)} ({', '.join(definitions)})"
+                )
+                self._columns = [name for name, _ in _FIXED_COLUMNS]
+
+            for column in columns:
+                if column in self._columns:
+                    continue
+                self.connection.execute(
+                    f"ALTER TABLE {quote(self.table)} "
+                    f"ADD COLUMN {quote(column)} {column_type(column)}"
+                )
+                self._columns.append(column)
+
+    def _insert_statement(self, columns: Tuple[str, ...]) -> str:
+        # Statements are reused for files sharing a header layout.
+        if columns not in self._statements:
+            self.ensure_columns(columns)
+            names = [name for name, _ in _FIXED_COLUMNS] + list(columns)
+            placeholders = ", ".join("?" * len(names))
+            self._statements[columns] = (
+                f"INSERT INTO {quote(self.table)} "
+                f"({', '.join(map(quote, names))}) VALUES ({placeholders})"
+            )
+        return self._statements[columns]
+
+    def write(self, filestem: str, station_id: int, rows: Iterable[Row]) -> int:
+        """Insert the rows of an archival data file.
+
+        Rows are consumed lazily and inserted in batches, one
+        transaction per batch.
+
+        Parameters
+        ----------
+        filestem : str
+            Stem of the archival data file.
+        station_id : int
+            The station's id.
+        rows : Iterable[OrderedDict]
+            The archival data, as from :func:`~solardat.decode.read_raw`
+            or :func:`~solardat.decode.iter_archival`.
+
+        Returns
+        -------
+        int
+            Number of rows inserted.
+        """
+
+        iterator = iter(rows)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            return 0
+
+        columns = tuple(key for key in first if key != "ending_time")
+        statement = self._insert_statement(columns)
+
+        n_rows = 0
+        for batch in batch_rows(chain([first], iterator), self.batch_size):
+            values = [
+                (
+                    filestem,
+                    station_id,
+                    format_time(row["ending_time"]),  # type: ignore
+                    *(row[column] for column in columns),
+                )
+                for row in batch
+            ]
+            with self.connection:
+                self.connection.executemany(statement, values)
+            n_rows += len(values)
+
+        return n_rows
+
+    def write_many(self, results: Iterable[_Result]) -> int:
+        """Insert archival data files, see :func:`load`."""
+        return sum(self.write(*result) for result in results)
+
+    def create_indexes(self) -> None:
+        name = quote(f"{self.table}_station_time")
+        with self.connection:
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON {quote(self.table)} (station_id, ending_time)"
+            )
+
+
+def load(
+    connection: sqlite3.Connection,
+    results: Iterable[_Result],
+    table: str = DEFAULT_TABLE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Load archival data files into a SQLite table.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the database to load into.
+    results : Iterable[Tuple[str, int, Iterable[OrderedDict]]]
+        Filestem, station id and rows of each archival data file,
+        as from :func:`~solardat.fetch.stream_compressed`.
+    table : str
+        Name of the table to load into. It is created if it does
+        not exist.
+    batch_size : int
+        Number of rows to insert per transaction.
+
+    Returns
+    -------
+    int
+        Number of rows inserted.
+
+    Examples
+    --------
+    >>> connection = sqlite3.connect("solardat.db")
+    >>> load(connection, stream_compressed(zipfile_path))
+    44640
+    """
+
+    with SQLiteSink(connection, table, batch_size) as sink:
+        return sink.write_many(results)
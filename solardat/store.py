@@ -0,0 +1,304 @@
+"""Partitioned columnar storage of decoded archival data.
+
+Decoded archival data files are stored as one binary file per column,
+partitioned by station, year, month, and file prefix and type::
+
+    <root>/catalog.json
+    <root>/94255/2018/01/EUPQ/ending_time.bin
+    <root>/94255/2018/01/EUPQ/1001.bin
+    <root>/94255/2018/01/EUPQ/1001_FLAG.bin
+    ...
+
+Column files hold the raw values of the typed arrays produced by
+:func:`~solardat.decode.parse_columns`, so they can be memory-mapped
+and read without decoding. The catalog records each partition's
+columns, so that queries only open the partitions and columns they
+need.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+import json
+import mmap
+import shutil
+import sys
+
+from .archive import parse_filename
+from .decode import Columns, column_typecode, to_timestamp
+from .files import write_atomic
+
+
+CATALOG_NAME = "catalog.json"
+FORMAT_VERSION = 2
+COLUMN_SUFFIX = ".bin"
+
+PathLike = Union[str, Path]
+
+
+class Partition(NamedTuple):
+    """A decoded archival data file in the store."""
+
+    station_id: int
+    year: int
+    month: int
+    file_type: str
+    filestem: str
+    n_rows: int
+    columns: List[str]
+    # First and last interval end times, as seconds since the epoch,
+    # or zero if there are no rows.
+    first: int
+    last: int
+
+    @property
+    def prefix(self) -> str:
+        return parse_filename(self.filestem).prefix
+
+    @property
+    def key(self) -> str:
+        # Stations may have series of files with different prefixes.
+        series = f"{self.prefix}{self.file_type}"
+        return f"{self.station_id}/{self.year:04d}/{self.month:02d}/{series}"
+
+
+def _empty_view(typecode: str) -> memoryview:
+    return memoryview(array(typecode))
+
+
+class ColumnStore(object):
+    """Columnar store of decoded archival data.
+
+    Examples
+    --------
+    >>> store = ColumnStore("store")
+    >>> with open("EUPO1801.txt") as fh:
+    ...     station_id, columns = parse_columns(fh)
+    >>> store.write("EUPO1801", station_id, columns)
+    >>> store.save()
+    >>> data = store.read(94255, ["1001"], file_type="O")
+    >>> len(data["ending_time"]), len(data["1001"])
+    (44640, 44640)
+    """
+
+    def __init__(self, root: PathLike, catalog_name: str = CATALOG_NAME) -> None:
+        self.root = Path(root)
+        self.catalog_path = self.root / catalog_name
+        self.partitions: Dict[str, Partition] = OrderedDict()
+        self.byteorder = sys.byteorder
+
+        if self.catalog_path.exists():
+            self._load_catalog()
+
+    def _load_catalog(self) -> None:
+        catalog = json.loads(self.catalog_path.read_text())
+        if catalog.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog version: {catalog.get('version')}")
+
+        self.byteorder = catalog["byteorder"]
+        for values in catalog["partitions"]:
+            partition = Partition(**values)
+            self.partitions[partition.key] = partition
+
+    def save(self) -> None:
+        """Write the catalog, making written partitions visible to readers."""
+        catalog = {
+            "version": FORMAT_VERSION,
+            "byteorder": self.byteorder,
+            "partitions": [
+                partition._asdict()
+                for _, partition in sorted(self.partitions.items())
+            ],
+        }
+        write_atomic(self.catalog_path, json.dumps(catalog, indent=2).encode())
+
+    def directory(self, partition: Partition) -> Path:
+        return self.root.joinpath(partition.key)
+
+    def write(self, filestem: str, station_id: int, columns: Columns) -> Partition:
+        """Add decoded data to the store, replacing its partition if present.
+
+        The catalog is not written, see :meth:`save`.
+
+        Parameters
+        ----------
+        filestem : str
+            Stem of the archival data file the data was decoded
+            from, e.g. "EUPO1801".
+        station_id : int
+            The station's id.
+        columns : Dict[str, array.array]
+            Decoded data, as from :func:`~solardat.decode.parse_columns`.
+
+        Returns
+        -------
+        Partition
+        """
+
+        if sys.byteorder != self.byteorder:
+            raise ValueError("Store was written on a machine with a different byte order")
+
+        file = parse_filename(filestem)
+        names = list(columns)
+        times = columns["ending_time"]
+        partition = Partition(
+            station_id=station_id,
+            year=file.year,
+            month=file.month,
+            file_type=file.file_type,
+            filestem=filestem,
+            n_rows=len(times),
+            columns=names,
+            first=times[0] if times else 0,
+            last=times[-1] if times else 0,
+        )
+
+        # Columns of an earlier version of the partition are removed.
+        directory = self.directory(partition)
+        if directory.exists():
+            shutil.rmtree(directory)
+        for name in names:
+            write_atomic(directory / f"{name}{COLUMN_SUFFIX}", columns[name].tobytes())
+
+        self.partitions[partition.key] = partition
+        return partition
+
+    def find_partitions(
+        self,
+        station_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        file_type: Optional[str] = None,
+        prefix: Optional[str] = None,
+    ) -> List[Partition]:
+        """List a station's partitions with data in a time interval."""
+        lower = None if start is None else to_timestamp(start)
+        upper = None if end is None else to_timestamp(end)
+
+        found = []
+        for partition in self.partitions.values():
+            if partition.station_id != station_id or partition.n_rows == 0:
+                continue
+            if file_type is not None and partition.file_type != file_type:
+                continue
+            if prefix is not None and partition.prefix != prefix:
+                continue
+            if lower is not None and partition.last < lower:
+                continue
+            if upper is not None and partition.first > upper:
+                continue
+            found.append(partition)
+
+        return sorted(found, key=lambda partition: partition.first)
+
+    def open_column(self, partition: Partition, name: str) -> memoryview:
+        """Memory-map a column of a partition.
+
+        Returns
+        -------
+        memoryview
+            Read-only view of the column's values.
+        """
+
+        typecode = column_typecode(name)
+        if name not in partition.columns:
+            raise KeyError(f"{partition.filestem} has no column {name}")
+        if partition.n_rows == 0:
+            return _empty_view(typecode)
+
+        path = self.directory(partition) / f"{name}{COLUMN_SUFFIX}"
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode)  # type: ignore
+
+    def read(
+        self,
+        station_id: int,
+        columns: Iterable[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        file_type: Optional[str] = None,
+        prefix: Optional[str] = None,
+    ) -> Columns:
+        """Read columns of a station's data over a time interval.
+
+        Parameters
+        ----------
+        station_id : int
+            The station's id.
+        columns : Iterable[str]
+            Data columns to be read. Interval end times are always
+            included.
+        start : datetime, optional
+            Earliest interval end time to include.
+        end : datetime, optional
+            Latest interval end time to include.
+        file_type : str, optional
+            File type letter to read data from. Stations usually
+            have files of several types covering the same months, whose
+            data can not be combined, so it must be given if the
+            interval has data of more than one type.
+        prefix : str, optional
+            File prefix to read data from, which must be given if the
+            station has several series of files covering the same
+            months.
+
+        Returns
+        -------
+        Dict[str, array.array]
+            The selected data, in the format of
+            :func:`~solardat.decode.parse_columns`.
+
+        Raises
+        ------
+        ValueError
+            If `file_type` is not given and the interval has data of
+            several file types, or `prefix` is not given and several
+            series of files cover the same months.
+        KeyError
+            If a column is missing from some of the partitions read.
+        """
+
+        names = ["ending_time", *(name for name in columns if name != "ending_time")]
+        out: Columns = OrderedDict((name, array(column_typecode(name))) for name in names)
+        lower = None if start is None else to_timestamp(start)
+        upper = None if end is None else to_timestamp(end)
+
+        partitions = self.find_partitions(station_id, start, end, file_type, prefix)
+        file_types = sorted({partition.file_type for partition in partitions})
+        if len(file_types) > 1:
+            raise ValueError(
+                f"Station {station_id} has data of file types {', '.join(file_types)}"
+                " in the interval, choose one with `file_type`"
+            )
+        months = [(partition.year, partition.month) for partition in partitions]
+        if len(set(months)) < len(months):
+            prefixes = sorted({partition.prefix for partition in partitions})
+            raise ValueError(
+                f"Station {station_id} has files with prefixes {', '.join(prefixes)}"
+                " for the same months, choose one with `prefix`"
+            )
+        # Checked before reading, rather than failing part way through.
+        for name in names:
+            missing = [p.filestem for p in partitions if name not in p.columns]
+            if missing:
+                raise KeyError(f"Column {name} is missing from {', '.join(missing)}")
+
+        for partition in partitions:
+            times = self.open_column(partition, "ending_time")
+            lo = 0 if lower is None else bisect_left(times, lower)
+            hi = len(times) if upper is None else bisect_right(times, upper)
+            if lo >= hi:
+                continue
+
+            for name in names:
+                if name == "ending_time":
+                    view = times
+                else:
+                    view = self.open_column(partition, name)
+                out[name].frombytes(view[lo:hi].cast("B"))
+
+        return out
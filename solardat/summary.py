@@ -0,0 +1,225 @@
+"""Summary statistics of archival data elements.
+
+Statistics are accumulated in one pass over the rows, using Welford's
+algorithm for the mean and variance, so files are summarized as they
+are decoded. Summaries of the same element can be merged, e.g. to
+summarize a station's data over many files.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import AbstractSet, Any, Dict, Iterable, Optional, Tuple, Union
+import math
+
+from .decode import BAD_FLAGS, FLAG_SUFFIX, MISSING_FLAG, Row, iter_archival
+
+
+PathLike = Union[str, Path]
+Summaries = Dict[str, "ElementSummary"]
+
+
+class ElementSummary(object):
+    """Summary statistics of a data element.
+
+    Samples flagged as missing are counted in `missing`, and samples
+    with another flag in the summarizer's bad flags in `bad`. Neither
+    are included in the other statistics.
+    """
+
+    __slots__ = (
+        "count",
+        "missing",
+        "bad",
+        "minimum",
+        "maximum",
+        "mean",
+        "_m2",
+        "first",
+        "last",
+    )
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.missing = 0
+        self.bad = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.mean = 0.
+        # Sum of squared differences from the mean.
+        self._m2 = 0.
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def __repr__(self) -> str:
+        return (
+            f"ElementSummary(count={self.count}, missing={self.missing}, "
+            f"bad={self.bad}, minimum={self.minimum}, maximum={self.maximum}, "
+            f"mean={self.mean}, variance={self.variance}, "
+            f"first={self.first!r}, last={self.last!r})"
+        )
+
+    @property
+    def samples(self) -> int:
+        return self.count + self.missing + self.bad
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the good samples, or NaN for fewer than two."""
+        if self.count < 2:
+            return math.nan
+        return self._m2 / (self.count - 1)
+
+    def add(
+        self,
+        value: float,
+        ending_time: datetime,
+        missing: bool = False,
+        bad: bool = False,
+    ) -> None:
+        if self.first is None:
+            self.first = ending_time
+        self.last = ending_time
+
+        if missing:
+            self.missing += 1
+            return
+        if bad:
+            self.bad += 1
+            return
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: "ElementSummary") -> "ElementSummary":
+        """Combine with the summary of other samples of the element.
+
+        Returns
+        -------
+        ElementSummary
+            A new summary, as if all samples had been added to one.
+        """
+
+        merged = ElementSummary()
+        merged.count = self.count + other.count
+        merged.missing = self.missing + other.missing
+        merged.bad = self.bad + other.bad
+        merged.minimum = min(self.minimum, other.minimum)
+        merged.maximum = max(self.maximum, other.maximum)
+
+        if merged.count:
+            delta = other.mean - self.mean
+            merged.mean = self.mean + delta * other.count / merged.count
+            correction = delta * delta * self.count * other.count / merged.count
+            merged._m2 = self._m2 + other._m2 + correction
+
+        firsts = [dt for dt in (self.first, other.first) if dt is not None]
+        lasts = [dt for dt in (self.last, other.last) if dt is not None]
+        merged.first = min(firsts, default=None)
+        merged.last = max(lasts, default=None)
+        return merged
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the statistics, with NaN for those without good samples."""
+        return OrderedDict([
+            ("count", self.count),
+            ("missing", self.missing),
+            ("bad", self.bad),
+            ("minimum", self.minimum if self.count else math.nan),
+            ("maximum", self.maximum if self.count else math.nan),
+            ("mean", self.mean if self.count else math.nan),
+            ("variance", self.variance),
+            ("first", self.first),
+            ("last", self.last),
+        ])
+
+
+def summarize_rows(
+    rows: Iterable[Row],
+    bad_flags: AbstractSet[int] = BAD_FLAGS,
+) -> Summaries:
+    """Summarize each data element of archival data in one pass.
+
+    Parameters
+    ----------
+    rows : Iterable[OrderedDict]
+        Archival data, as from :func:`~solardat.decode.iter_archival`.
+    bad_flags : AbstractSet[int]
+        Quality control flags of samples to leave out of the
+        statistics, in addition to missing data.
+
+    Returns
+    -------
+    Dict[str, ElementSummary]
+        Summary of each data element, by data element number.
+    """
+
+    bad = frozenset(bad_flags) - {MISSING_FLAG}
+    summaries: Summaries = OrderedDict()
+    flag_columns: Dict[str, str] = {}
+
+    for row in rows:
+        ending_time: datetime = row["ending_time"]  # type: ignore
+        for column, value in row.items():
+            if column == "ending_time" or column.endswith(FLAG_SUFFIX):
+                continue
+            if column not in flag_columns:
+                flag_columns[column] = f"{column}{FLAG_SUFFIX}"
+                summaries[column] = ElementSummary()
+
+            flag = row.get(flag_columns[column])
+            summaries[column].add(
+                value,  # type: ignore
+                ending_time,
+                missing=flag == MISSING_FLAG,
+                bad=flag in bad,
+            )
+
+    return summaries
+
+def summarize_file(
+    path: PathLike,
+    bad_flags: AbstractSet[int] = BAD_FLAGS,
+) -> Tuple[int, Summaries]:
+    """Summarize a local archival data file as it is decoded.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the archival data file.
+    bad_flags : AbstractSet[int]
+        See :func:`summarize_rows`.
+
+    Returns
+    -------
+    station_id, summaries : Tuple[int, Dict[str, ElementSummary]]
+        Summary of each data element, as well as the station's id.
+
+    Examples
+    --------
+    >>> station_id, summaries = summarize_file("EUPO1801.txt")
+    >>> summaries["1001"].to_dict()
+    OrderedDict([('count', 44640), ('missing', 0), ('bad', 0),
+                 ('minimum', 0.0), ('maximum', 417.0), ...])
+    """
+
+    with open(path) as fh:
+        station_id, rows = iter_archival(fh)
+        return station_id, summarize_rows(rows, bad_flags)
+
+def merge_summaries(summaries: Iterable[Summaries]) -> Summaries:
+    """Merge summaries of several files, by data element number."""
+    merged: Summaries = OrderedDict()
+    for file_summaries in summaries:
+        for element, summary in file_summaries.items():
+            if element in merged:
+                merged[element] = merged[element].merge(summary)
+            else:
+                merged[element] = summary
+    return merged
@@ -0,0 +1,282 @@
+"""Keep a local mirror of archival data files up to date.
+
+A manifest of each mirrored file's ETag, size and fetch time is kept
+alongside the files, so only new or changed files are downloaded. The
+manifest is saved as files complete, so an interrupted sync resumes
+where it left off.
+"""
+
+from aiohttp import ClientSession
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+import asyncio
+import json
+import time
+
+from .archive import parse_filename, to_path
+from .async_fetch import get_response
+from .files import write_atomic
+
+
+MANIFEST_NAME = "manifest.json"
+DEFAULT_LIMIT = 8
+# Save the manifest after this many completed files.
+SAVE_EVERY = 25
+
+PathLike = Union[str, Path]
+# Called with the path and the downloaded content of each completed
+# file, or None if it was unchanged.
+ProgressCallback = Callable[[str, Optional[bytes]], None]
+# Called with the path and the error of each file that failed.
+FailureCallback = Callable[[str, Exception], None]
+
+
+class ManifestEntry(NamedTuple):
+    etag: Optional[str]
+    size: int
+    fetched_at: float
+
+
+class SyncResult(NamedTuple):
+    fetched: List[str]
+    unchanged: List[str]
+    failed: Dict[str, Exception]
+
+
+def local_path(root: PathLike, path: str) -> Path:
+    """Get the location of a mirrored archival data file.
+
+    Files are organized by station prefix, e.g.
+    ``download/Archive/EUPQ1801.txt`` is mirrored to
+    ``<root>/EUP/EUPQ1801.txt``.
+    """
+
+    file = parse_filename(path)
+    return Path(root, file.prefix, f"{file.stem}.txt")
+
+
+class Manifest(object):
+    """Record of the mirrored archival data files.
+
+    A manifest without a path is only kept in memory.
+    """
+
+    def __init__(self, path: Optional[PathLike]) -> None:
+        self.path = None if path is None else Path(path)
+        self.entries: Dict[str, ManifestEntry] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        return self.entries.get(path)
+
+    def __setitem__(self, path: str, entry: ManifestEntry) -> None:
+        self.entries[path] = entry
+
+    @classmethod
+    def load(cls, path: PathLike) -> "Manifest":
+        manifest = cls(path)
+        if Path(path).exists():
+            data = json.loads(Path(path).read_text())
+            manifest.entries = {
+                key: ManifestEntry(**value) for key, value in data.items()
+            }
+        return manifest
+
+    def to_json(self) -> bytes:
+        data = {key: entry._asdict() for key, entry in sorted(self.entries.items())}
+        return json.dumps(data, indent=2).encode()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        write_atomic(self.path, self.to_json())
+
+
+def discover(start: date, end: date, stations: List[str]) -> List[str]:
+    """Search for archival data files to be mirrored.
+
+    See :func:`~solardat.fetch.find_files` for a description of the
+    parameters.
+
+    Returns
+    -------
+    paths : List[str]
+        URL path components to the data files matching the query.
+    """
+
+    from .fetch import find_files
+
+    results = find_files(start, end, stations)
+    return sorted(to_path(url) for urls in results.values() for url in urls)
+
+
+class _Syncer(object):
+    def __init__(
+        self,
+        session: ClientSession,
+        root: Path,
+        manifest: Manifest,
+        limit: int,
+        max_age: Optional[float],
+        progress: Optional[ProgressCallback],
+        failure: Optional[FailureCallback],
+    ) -> None:
+        self.session = session
+        self.root = root
+        self.manifest = manifest
+        self.semaphore = asyncio.Semaphore(limit)
+        self.max_age = max_age
+        self.progress = progress
+        self.failure = failure
+        self.result = SyncResult([], [], {})
+        self._unsaved = 0
+        self._saving = asyncio.Lock()
+
+    def is_fresh(self, entry: ManifestEntry) -> bool:
+        if self.max_age is None:
+            return False
+        return time.time() - entry.fetched_at < self.max_age
+
+    def report(self, path: str, content: Optional[bytes]) -> None:
+        if self.progress is not None:
+            self.progress(path, content)
+
+    async def write(self, file: Path, content: bytes) -> None:
+        # Written in a thread, as writes wait for the disk to sync.
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, write_atomic, file, content)
+
+    async def mark_changed(self) -> None:
+        self._unsaved += 1
+        if self._unsaved < SAVE_EVERY or self.manifest.path is None:
+            return
+        self._unsaved = 0
+        # The manifest is copied as it is now, and saves are written one
+        # at a time, in order.
+        content = self.manifest.to_json()
+        async with self._saving:
+            await self.write(self.manifest.path, content)
+
+    async def sync_file(self, path: str) -> None:
+        file = local_path(self.root, path)
+        entry = self.manifest.get(path)
+
+        # The local copy is only trusted if it is what was recorded.
+        headers = {}
+        if entry is not None and file.exists() and file.stat().st_size == entry.size:
+            if self.is_fresh(entry):
+                self.result.unchanged.append(path)
+                self.report(path, None)
+                return
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+
+        async with self.semaphore:
+            response = await get_response(self.session, path, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            self.manifest[path] = entry._replace(fetched_at=time.time())
+            self.result.unchanged.append(path)
+            await self.mark_changed()
+            self.report(path, None)
+            return
+
+        content = response.content
+        etag = response.headers.get("ETag")
+
+        await self.write(file, content)
+        self.manifest[path] = ManifestEntry(etag, len(content), time.time())
+        self.result.fetched.append(path)
+        await self.mark_changed()
+        self.report(path, content)
+
+    async def sync_or_fail(self, path: str) -> None:
+        try:
+            await self.sync_file(path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.result.failed[path] = exc
+            if self.failure is not None:
+                self.failure(path, exc)
+
+
+async def sync_files(
+    session: ClientSession,
+    paths: Iterable[str],
+    root: PathLike,
+    limit: int = DEFAULT_LIMIT,
+    max_age: Optional[float] = None,
+    progress: Optional[ProgressCallback] = None,
+    manifest: Optional[Manifest] = None,
+    failure: Optional[FailureCallback] = None,
+) -> SyncResult:
+    """Mirror archival data files into a local directory.
+
+    Files that are already mirrored are revalidated with their
+    recorded ETag and only downloaded if they changed. Requests are
+    throttled and retried, see :func:`~solardat.async_fetch.get_response`.
+    Failures are collected rather than raised, so that one bad file
+    does not lose the rest of the sync.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession
+        The client session to use.
+    paths : Iterable[str]
+        URLs or URL path components to the archival data files to
+        be mirrored.
+    root : str or Path
+        Directory to mirror the files into. The manifest is kept at
+        its top level.
+    limit : int
+        Maximum number of concurrent requests.
+    max_age : float, optional
+        Files fetched or revalidated within this many seconds are
+        not requested at all.
+    progress : Callable[[str, Optional[bytes]], None], optional
+        Called as each file completes, with its path and downloaded
+        content, or None if it was unchanged.
+    manifest : Manifest, optional
+        Record of the mirrored files to use instead of the manifest at
+        the top level of `root`, e.g. an in-memory manifest when the
+        validators are kept elsewhere.
+    failure : Callable[[str, Exception], None], optional
+        Called as each file fails, with its path and error.
+
+    Returns
+    -------
+    SyncResult
+        The paths that were fetched, that were unchanged and that
+        failed, with their exception.
+
+    Examples
+    --------
+    >>> paths = discover(date(2018, 1, 1), date(2018, 12, 1), ["Eugene"])
+    >>> async def driver(paths):
+    ...     async with aiohttp.ClientSession() as session:
+    ...         return await sync_files(session, paths, "mirror")
+    >>> loop = asyncio.get_event_loop()
+    >>> result = loop.run_until_complete(driver(paths))
+    >>> len(result.fetched), len(result.unchanged)
+    (44, 4)
+    """
+
+    root = Path(root)
+    if manifest is None:
+        manifest = Manifest.load(root / MANIFEST_NAME)
+    syncer = _Syncer(session, root, manifest, limit, max_age, progress, failure)
+
+    try:
+        unique = sorted(set(map(to_path, paths)))
+        await asyncio.gather(*map(syncer.sync_or_fail, unique))
+    finally:
+        manifest.save()
+
+    return syncer.result
@@ -0,0 +1,423 @@
+"""Rate limiting, adaptive concurrency and retries of requests.
+
+The server starts failing requests when too many are sent at once, and
+the sustainable number depends on its load at the time. A
+:class:`Throttle` combines an optional :class:`TokenBucket`, which caps
+the request rate, with an :class:`AdaptiveLimit` on the number of
+requests in flight. The limit grows by about one request per round
+trip while responses are healthy, and is halved when a request fails
+or its latency spikes, the additive increase and multiplicative
+decrease used by TCP congestion control.
+
+Failed idempotent requests are retried after exponential backoff with
+full jitter, see :func:`backoff`, so that throttled clients do not
+retry in lockstep.
+"""
+
+from typing import Any, Awaitable, Callable, MutableMapping, Optional, TypeVar
+from weakref import WeakKeyDictionary
+import asyncio
+import random
+import threading
+import time
+
+
+DEFAULT_ATTEMPTS = 4
+# Base and maximum delay of the backoff between attempts, in seconds.
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.
+# Response statuses worth retrying, as the server may recover.
+RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+
+T = TypeVar("T")
+Clock = Callable[[], float]
+
+
+def backoff(
+    attempt: int,
+    base: float = DEFAULT_BACKOFF,
+    cap: float = DEFAULT_MAX_BACKOFF,
+    rand: Callable[[float, float], float] = random.uniform,
+) -> float:
+    """Get the delay before retrying after a number of failed attempts.
+
+    The delay is drawn uniformly up to an exponentially growing bound,
+    i.e. exponential backoff with full jitter.
+    """
+
+    return rand(0., min(cap, base * 2 ** (attempt - 1)))
+
+def retry_after(headers: Any, cap: float = DEFAULT_MAX_BACKOFF) -> Optional[float]:
+    """Get the delay asked for by a ``Retry-After`` header, in seconds.
+
+    Only delays given in seconds are supported. Delays are capped at
+    `cap`, as for :func:`backoff`, so that one response can not stall
+    the client for long.
+    """
+
+    value = None if headers is None else headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        return None
+    # Also rejects NaN, which fails every comparison.
+    if not delay >= 0.:
+        return 0.
+    return min(delay, cap)
+
+
+class TokenBucket(object):
+    """Limit the rate of requests, allowing short bursts.
+
+    Tokens are added at `rate` per second up to `burst`, and each
+    request takes one. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("`rate` must be positive")
+        if burst < 1:
+            raise ValueError("`burst` must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Take a token, and get the time to wait until it is available."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Tokens may go negative, queueing later requests behind
+            # earlier reservations.
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.)
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveLimit(object):
+    """Limit on requests in flight, adapted to the health of responses.
+
+    Parameters
+    ----------
+    initial : int
+        Starting limit.
+    minimum, maximum : int
+        Bounds of the limit.
+    decrease : float
+        Factor the limit is multiplied by on failures and latency
+        spikes.
+    latency_factor : float
+        A response is a latency spike if it takes this many times the
+        average latency.
+    smoothing : float
+        Weight of each new latency in the average.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease: float = 0.5,
+        latency_factor: float = 3.,
+        smoothing: float = 0.1,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("Expected 1 <= minimum <= initial <= maximum")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._limit = float(initial)
+        self._latency: Optional[float] = None
+        self._decreased: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Average latency of successful requests, in seconds."""
+        return self._latency
+
+    def _decrease(self) -> None:
+        # Requests in flight during a decrease complete within about
+        # one round trip, and their failures or delays do not decrease
+        # the limit again.
+        now = self.clock()
+        if self._decreased is not None and now - self._decreased < (self._latency or 0.):
+            return
+        self._decreased = now
+        self._limit = max(self.minimum, self._limit * self.decrease)
+
+    def success(self, latency: Optional[float] = None) -> None:
+        """Record a successful request.
+
+        Parameters
+        ----------
+        latency : float, optional
+            Time to the response headers in seconds. Latency spikes
+            decrease the limit. If not given, the request only counts
+            towards increasing the limit.
+        """
+
+        with self._lock:
+            if latency is not None:
+                average = self._latency
+                spike = average is not None and latency > self.latency_factor * average
+                # Every sample is averaged, so that the average follows
+                # lasting changes in latency, after which later
+                # responses are no longer spikes.
+                self._latency = latency if average is None else (
+                    average + self.smoothing * (latency - average)
+                )
+                if spike:
+                    self._decrease()
+                    return
+
+            # Grows by about one per round trip of `limit` requests.
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def failure(self) -> None:
+        """Record a request that failed, e.g. as the server is overloaded."""
+        with self._lock:
+            self._decrease()
+
+
+class _Gate(object):
+    def __init__(
+        self,
+        rate: Optional[float],
+        burst: int,
+        limit: Optional[AdaptiveLimit],
+        clock: Clock,
+    ) -> None:
+        self.bucket = None if rate is None else TokenBucket(rate, burst, clock)
+        self.limit = AdaptiveLimit(clock=clock) if limit is None else limit
+        self.clock = clock
+
+    def record(self, ok: bool, latency: Optional[float]) -> None:
+        if ok:
+            self.limit.success(latency)
+        else:
+            self.limit.failure()
+
+class Throttle(_Gate):
+    """Rate and concurrency limit of requests sent from threads.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Maximum requests per second. Not limited by default.
+    burst : int
+        Requests that may be sent at once after a pause, if `rate` is
+        given.
+    limit : AdaptiveLimit, optional
+        Limit on requests in flight. Defaults to an
+        :class:`AdaptiveLimit` with its default parameters.
+
+    Examples
+    --------
+    >>> throttle = Throttle(rate=20.)
+    >>> throttle.acquire()
+    >>> try:
+    ...     response = requests.get(url)
+    ... finally:
+    ...     throttle.release(response.ok, response.elapsed.total_seconds())
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        limit: Optional[AdaptiveLimit] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        super().__init__(rate, burst, limit, clock)
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with self._condition:
+            self._condition.wait_for(lambda: self.active < self.limit.limit)
+            self.active += 1
+
+    def release(self, ok: bool, latency: Optional[float] = None) -> None:
+        """Record the outcome of a request.
+
+        Parameters
+        ----------
+        ok : bool
+            Whether the server handled the request, even if with a
+            client error.
+        latency : float, optional
+            Time to the response headers in seconds, see
+            :meth:`AdaptiveLimit.success`. Large downloads should give
+            the time to their headers, or no latency at all, so that
+            their size is not taken for a slow server.
+        """
+
+        self.record(ok, latency)
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+class _LoopState(object):
+    def __init__(self) -> None:
+        self.condition = asyncio.Condition()
+        self.active = 0
+
+class AsyncThrottle(_Gate):
+    """Rate and concurrency limit of requests sent from coroutines.
+
+    Asynchronous version of :class:`Throttle`. Requests in flight are
+    counted per event loop, while the limit is shared. Urgent requests,
+    e.g. for a user waiting on them, are sent at once, see
+    :meth:`acquire`.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        limit: Optional[AdaptiveLimit] = None,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        super().__init__(rate, burst, limit, clock)
+        # Conditions are bound to the event loop they are used in.
+        self._states: MutableMapping[Any, _LoopState] = WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_event_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+        return state
+
+    @property
+    def active(self) -> int:
+        """Number of requests in flight in the running event loop."""
+        return self._state().active
+
+    async def acquire(self, urgent: bool = False) -> None:
+        """Wait until a request may be sent.
+
+        Parameters
+        ----------
+        urgent : bool
+            Send the request at once, ahead of requests waiting for the
+            rate or concurrency limit. It still takes a token and counts
+            towards the requests in flight, so that other requests wait
+            longer in its place.
+        """
+
+        state = self._state()
+        if urgent:
+            if self.bucket is not None:
+                self.bucket.reserve()
+            state.active += 1
+            return
+
+        if self.bucket is not None:
+            await self.bucket.acquire_async()
+        async with state.condition:
+            await state.condition.wait_for(lambda: state.active < self.limit.limit)
+            state.active += 1
+
+    async def release(self, ok: bool, latency: Optional[float] = None) -> None:
+        """Record the outcome of a request, see :meth:`Throttle.release`."""
+        self.record(ok, latency)
+        state = self._state()
+        async with state.condition:
+            state.active -= 1
+            state.condition.notify_all()
+
+
+def retry(
+    function: Callable[[], T],
+    should_retry: Callable[[Exception], Optional[float]],
+    attempts: int = DEFAULT_ATTEMPTS,
+    delay: Callable[[int], float] = backoff,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """Call a function until it succeeds or runs out of attempts.
+
+    Parameters
+    ----------
+    function : Callable[[], T]
+        The function to call, which should be idempotent.
+    should_retry : Callable[[Exception], Optional[float]]
+        Function of an exception raised by `function`, returning None
+        if it should not be retried, or otherwise a minimum delay in
+        seconds before the next attempt.
+    attempts : int
+        Maximum number of calls.
+    delay : Callable[[int], float]
+        Function of the number of failed attempts giving the delay
+        before the next one, see :func:`backoff`.
+
+    Returns
+    -------
+    T
+        The result of the first successful call. The last exception
+        is raised if all attempts fail.
+    """
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return function()
+        except Exception as exc:
+            wait = should_retry(exc)
+            if wait is None or attempt == attempts:
+                raise
+        sleep(max(wait, delay(attempt)))
+    raise ValueError("`attempts` must be at least 1")
+
+async def retry_async(
+    function: Callable[[], Awaitable[T]],
+    should_retry: Callable[[Exception], Optional[float]],
+    attempts: int = DEFAULT_ATTEMPTS,
+    delay: Callable[[int], float] = backoff,
+) -> T:
+    """Asynchronous version of :func:`retry`."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return await function()
+        except Exception as exc:
+            wait = should_retry(exc)
+            if wait is None or attempt == attempts:
+                raise
+        await asyncio.sleep(max(wait, delay(attempt)))
+    raise ValueError("`attempts` must be at least 1")
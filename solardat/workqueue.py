@@ -0,0 +1,402 @@
+"""Shared work queue of archival data files, backed by SQLite.
+
+Workers on several hosts claim batches of paths from a queue file in a
+shared directory. A claim is a lease: the worker must renew it with
+heartbeats while it works, and paths whose lease expires, e.g. because
+their worker crashed, are claimed again by other workers. Completed
+paths are recorded so that they are not fetched again, along with
+their validators, so that workers do not share a manifest file.
+
+SQLite relies on file locks to coordinate writers. Many network file
+systems, including older NFS setups, implement them unreliably, which
+can corrupt the queue. Only share a queue file on a file system with
+working POSIX locks, e.g. NFSv4 with locking enabled.
+
+Examples
+--------
+>>> queue = WorkQueue("/shared/backfill.db")
+>>> queue.add(discover(date(2010, 1, 1), date(2019, 12, 1), ["Eugene"]))
+>>> # On each worker host:
+>>> result = work(WorkQueue("/shared/backfill.db"), "/shared/mirror")
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .sync import DEFAULT_LIMIT, ManifestEntry, SyncResult
+
+
+# Seconds a claim is held without a heartbeat.
+DEFAULT_LEASE = 300.
+DEFAULT_BATCH_SIZE = 16
+# Claims of a path before it is given up on.
+DEFAULT_MAX_ATTEMPTS = 3
+
+PathLike = Union[str, Path]
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    etag TEXT,
+    size INTEGER,
+    fetched_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+"""
+# Columns added since the first version of the schema.
+_ADDED_COLUMNS = {"etag": "TEXT", "size": "INTEGER", "fetched_at": "REAL"}
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue(object):
+    """Lease-based queue of archival data file paths."""
+
+    def __init__(
+        self,
+        path: PathLike,
+        lease: float = DEFAULT_LEASE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.clock = clock
+        # Transactions are managed explicitly, so that claims take the
+        # write lock before reading. The connection is used from
+        # executor threads by :func:`process_queue`, one at a time.
+        self.connection = sqlite3.connect(
+            str(path), timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self.connection.executescript(_SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in columns:
+                self.connection.execute(
+                    f"ALTER TABLE jobs ADD COLUMN {column} {column_type}"
+                )
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self.connection, self._lock)
+
+    def add(self, paths: Iterable[str]) -> int:
+        """Add paths to the queue, ignoring those already in it.
+
+        Returns
+        -------
+        int
+            The number of paths added.
+        """
+
+        now = self.clock()
+        with self._transaction():
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO jobs (path, state, updated_at) VALUES (?, ?, ?)",
+                ((path, PENDING, now) for path in paths),
+            )
+            return self.connection.total_changes - before
+
+    def claim(self, worker: str, batch_size: int = DEFAULT_BATCH_SIZE) -> List[str]:
+        """Lease a batch of pending paths, or paths with an expired lease.
+
+        Returns
+        -------
+        List[str]
+            The claimed paths, empty if there is no work available.
+        """
+
+        now = self.clock()
+        with self._transaction():
+            paths = [path for path, in self.connection.execute(
+                """
+                SELECT path FROM jobs
+                WHERE state = ?
+                    OR (state = ? AND lease_expires < ? AND attempts < ?)
+                ORDER BY path
+                LIMIT ?
+                """,
+                (PENDING, LEASED, now, self.max_attempts, batch_size),
+            )]
+            self.connection.executemany(
+                """
+                UPDATE jobs
+                SET state = ?, owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE path = ?
+                """,
+                ((LEASED, worker, now + self.lease, now, path) for path in paths),
+            )
+        return paths
+
+    def heartbeat(self, worker: str) -> int:
+        """Renew the worker's leases.
+
+        Returns
+        -------
+        int
+            The number of leases renewed. Leases that expired and were
+            claimed by another worker are not renewed.
+        """
+
+        now = self.clock()
+        with self._transaction():
+            cursor = self.connection.execute(
+                """
+                UPDATE jobs SET lease_expires = ?, updated_at = ?
+                WHERE state = ? AND owner = ?
+                """,
+                (now + self.lease, now, LEASED, worker),
+            )
+            return cursor.rowcount
+
+    def complete(
+        self,
+        worker: str,
+        paths: Iterable[str],
+        validators: Optional[Mapping[str, ManifestEntry]] = None,
+    ) -> int:
+        """Record that leased paths were completed.
+
+        Parameters
+        ----------
+        worker : str
+            Identifier of the worker holding the leases.
+        paths : Iterable[str]
+            The completed paths.
+        validators : Mapping[str, ManifestEntry], optional
+            Manifest entries of the mirrored files, kept for
+            revalidating them later, see :meth:`validators`.
+        """
+
+        validators = validators or {}
+        now = self.clock()
+        with self._transaction():
+            return sum(
+                self.connection.execute(
+                    """
+                    UPDATE jobs
+                    SET state = ?, lease_expires = NULL, updated_at = ?,
+                        etag = ?, size = ?, fetched_at = ?
+                    WHERE path = ? AND state = ? AND owner = ?
+                    """,
+                    (
+                        DONE, now, *validators.get(path, (None, None, None)),
+                        path, LEASED, worker,
+                    ),
+                ).rowcount
+                for path in paths
+            )
+
+    def fail(self, worker: str, errors: Dict[str, str]) -> None:
+        """Release failed paths, to be retried until they run out of attempts."""
+        now = self.clock()
+        with self._transaction():
+            self.connection.executemany(
+                """
+                UPDATE jobs
+                SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    lease_expires = NULL, error = ?, updated_at = ?
+                WHERE path = ? AND state = ? AND owner = ?
+                """,
+                (
+                    (self.max_attempts, FAILED, PENDING, error, now, path, LEASED, worker)
+                    for path, error in errors.items()
+                ),
+            )
+
+    def reclaim(self) -> int:
+        """Release paths with expired leases.
+
+        Paths that have run out of attempts are marked as failed, and
+        the others returned to the queue. Expired leases can also be
+        taken over directly by :meth:`claim`.
+
+        Returns
+        -------
+        int
+            The number of leases released.
+        """
+
+        now = self.clock()
+        with self._transaction():
+            cursor = self.connection.execute(
+                """
+                UPDATE jobs
+                SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE state = ? AND lease_expires < ?
+                """,
+                (self.max_attempts, FAILED, PENDING, now, LEASED, now),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Count the paths in each state."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        query = "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+        with self._lock:
+            counts.update(self.connection.execute(query))
+        return counts
+
+    def validators(
+        self, paths: Optional[Iterable[str]] = None
+    ) -> Dict[str, ManifestEntry]:
+        """Get the recorded manifest entries of mirrored files.
+
+        Parameters
+        ----------
+        paths : Iterable[str], optional
+            Paths to get the entries of. Defaults to all paths.
+
+        Returns
+        -------
+        Dict[str, ManifestEntry]
+            The entries by path, of the paths that were mirrored. They
+            can be saved as the manifest of the mirror, see
+            :class:`~solardat.sync.Manifest`.
+        """
+
+        query = "SELECT path, etag, size, fetched_at FROM jobs WHERE size IS NOT NULL"
+        with self._lock:
+            rows = self.connection.execute(query).fetchall()
+        wanted = None if paths is None else set(paths)
+        return {
+            path: ManifestEntry(*entry)
+            for path, *entry in rows
+            if wanted is None or path in wanted
+        }
+
+
+class _Transaction(object):
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock) -> None:
+        self.connection = connection
+        self.lock = lock
+
+    def __enter__(self) -> None:
+        self.lock.acquire()
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+async def _call(function: Callable[..., Any], *args: Any) -> Any:
+    # Queue calls wait on the file lock, so they are run off the loop.
+    return await asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+async def _heartbeat(queue: WorkQueue, worker: str) -> None:
+    while True:
+        await asyncio.sleep(queue.lease / 3)
+        await _call(queue.heartbeat, worker)
+
+async def process_queue(
+    queue: WorkQueue,
+    root: PathLike,
+    worker: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: int = DEFAULT_LIMIT,
+) -> SyncResult:
+    """Mirror batches of paths claimed from a queue until it is empty.
+
+    Claimed paths are mirrored with :func:`~solardat.sync.sync_files`,
+    with the worker's leases renewed in the background. The validators
+    of mirrored files are kept in the queue rather than in a manifest
+    in `root`, which workers would overwrite, see
+    :meth:`WorkQueue.validators`.
+
+    Parameters
+    ----------
+    queue : WorkQueue
+        The queue to claim paths from.
+    root : str or Path
+        Directory to mirror the files into.
+    worker : str, optional
+        Identifier of the worker. Defaults to the host name and
+        process id.
+    batch_size : int
+        Number of paths to claim at once.
+    limit : int
+        Maximum number of concurrent requests.
+
+    Returns
+    -------
+    SyncResult
+        The paths this worker fetched, found unchanged and failed on.
+    """
+
+    import aiohttp
+    from .sync import Manifest, sync_files
+
+    worker = worker or default_worker_id()
+    total = SyncResult([], [], {})
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            await _call(queue.reclaim)
+            paths = await _call(queue.claim, worker, batch_size)
+            if not paths:
+                return total
+
+            manifest = Manifest(None)
+            manifest.entries = await _call(queue.validators, paths)
+            heartbeat = asyncio.ensure_future(_heartbeat(queue, worker))
+            try:
+                result = await sync_files(
+                    session, paths, root, limit=limit, manifest=manifest
+                )
+            finally:
+                heartbeat.cancel()
+
+            completed = [*result.fetched, *result.unchanged]
+            await _call(queue.complete, worker, completed, manifest.entries)
+            failed = {path: repr(exc) for path, exc in result.failed.items()}
+            await _call(queue.fail, worker, failed)
+            total.fetched.extend(result.fetched)
+            total.unchanged.extend(result.unchanged)
+            total.failed.update(result.failed)
+
+def work(queue: WorkQueue, root: PathLike, **kwds) -> SyncResult:
+    """Run :func:`process_queue` in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(process_queue(queue, root, **kwds))
+    finally:
+        loop.close()
@@ -1,3 +1,5 @@
+from aioresponses import aioresponses
+import aiohttp
 import pytest
 
 from solardat.http import _cache
@@ -8,6 +10,16 @@ def clear_response_cache():
     yield
     _cache.clear()
 
+@pytest.fixture
+def mock_rsps():
+    with aioresponses() as mocked:
+        yield mocked
+
+@pytest.fixture
+async def session():
+    async with aiohttp.ClientSession() as session:
+        yield session
+
 @pytest.fixture(scope="module")
 def search_results_page():
     with open("tests/data/eugene-silver-lake-stripped.html") as fh:
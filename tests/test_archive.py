@@ -0,0 +1,39 @@
+import pytest
+
+from solardat.archive import ArchiveFile, expand_year, parse_filename, to_path
+from solardat.http import BASE_URL
+
+
+class TestParseFilename(object):
+    @pytest.mark.parametrize("path", [
+        "EUPQ1801.txt",
+        "download/Archive/EUPQ1801.txt",
+        f"{BASE_URL}/download/Archive/EUPQ1801.txt",
+    ], ids=["filename", "path", "url"])
+    def test_parses(self, path):
+        expected = ArchiveFile("EUP", "Q", 2018, 1)
+        assert parse_filename(path) == expected
+
+    def test_raises(self):
+        with pytest.raises(ValueError):
+            parse_filename("download/temp/12345.zip")
+
+    def test_round_trips(self):
+        path = "download/Archive/SIRO9912.txt"
+        file = parse_filename(path)
+        assert file.year == 1999
+        assert file.path == path
+
+class TestExpandYear(object):
+    @pytest.mark.parametrize("year, expected", [
+        (75, 1975),
+        (0, 2000),
+        (18, 2018),
+        (2018, 2018),
+    ])
+    def test_expands(self, year, expected):
+        assert expand_year(year) == expected
+
+def test_to_path():
+    url = f"{BASE_URL}/download/Archive/EUPQ1801.txt"
+    assert to_path(url) == "download/Archive/EUPQ1801.txt"
@@ -1,21 +1,10 @@
-from aioresponses import aioresponses
-import aiohttp
+import asyncio
 import pytest
 
 from solardat.http import BASE_URL, _cache
-from solardat.async_fetch import fetch_file, fetch_many
+from solardat.async_fetch import _flights, fetch_file, fetch_many, revalidate
 
 
-@pytest.fixture
-def mock_rsps():
-    with aioresponses() as mocked:
-        yield mocked
-
-@pytest.fixture
-async def session():
-    async with aiohttp.ClientSession() as session:
-        yield session
-
 @pytest.mark.usefixtures("clear_response_cache")
 @pytest.mark.asyncio
 class TestFetchFile(object):
@@ -37,6 +26,34 @@ class TestFetchFile(object):
         cached_response = _cache[self.filepath]
         assert cached_response.content
 
+    async def test_retries(self, mock_rsps, session, archival_data):
+        url = f"{BASE_URL}/{self.filepath}"
+        mock_rsps.add(url, "GET", status=503, headers={"Retry-After": "0"})
+        mock_rsps.add(url, "GET", body=archival_data)
+
+        station_id, rows = await fetch_file(session, self.filepath)
+        assert len(rows) == self.n_rows
+
+    async def test_coalesces(self, mock_rsps, session, archival_data):
+        # Only one response is mocked, so a second download would fail.
+        mock_rsps.add(f"{BASE_URL}/{self.filepath}", "GET", body=archival_data)
+
+        results = await asyncio.gather(*(
+            fetch_file(session, self.filepath) for _ in range(4)
+        ))
+        assert all(result is results[0] for result in results)
+        assert len(_flights) == 0
+
+    async def test_coalesces_errors(self, mock_rsps, session):
+        mock_rsps.add(f"{BASE_URL}/{self.filepath}", "GET", status=404)
+
+        results = await asyncio.gather(
+            *(fetch_file(session, self.filepath) for _ in range(2)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, Exception) for result in results)
+        assert len(_flights) == 0
+
     async def test_external(self, session):
         station_id, rows = await fetch_file(session, self.filepath)
         assert station_id == self.station_id
@@ -62,9 +79,35 @@ class TestFetchMany(object):
         assert all(station_id == self.station_id for station_id in station_ids)
         assert all(len(rows) == self.n_rows for rows in all_rows)
 
+    async def test_failed(self, mock_rsps, session, archival_data):
+        first, second = self.filepaths
+        mock_rsps.add(f"{BASE_URL}/{first}", "GET", status=404)
+        mock_rsps.add(f"{BASE_URL}/{second}", "GET", body=archival_data)
+
+        failed = {}
+        results = await fetch_many(session, self.filepaths, failed=failed)
+        assert [filestem for filestem, _, _ in results] == ["SIRF1602"]
+        assert list(failed) == [first]
+
     async def test_external(self, session):
         results = await fetch_many(session, self.filepaths)
         filestems, station_ids, all_rows = zip(*results)
         assert filestems == ("SIRF1601", "SIRF1602")
         assert all(station_id == self.station_id for station_id in station_ids)
         assert all(len(rows) >= self.n_rows for rows in all_rows)
+
+
+@pytest.mark.usefixtures("clear_response_cache")
+@pytest.mark.asyncio
+async def test_revalidate(mock_rsps, session, archival_data):
+    paths = [f"download/Archive/SIRF160{month}.txt" for month in (1, 2, 3)]
+    for path in paths[:2]:
+        mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data, headers={"ETag": path})
+    await fetch_many(session, paths[:2])
+
+    mock_rsps.head(f"{BASE_URL}/{paths[0]}", status=304)
+    mock_rsps.head(f"{BASE_URL}/{paths[1]}", headers={"ETag": "new"})
+    result = await revalidate(session, paths)
+    assert result.unchanged == paths[:1]
+    assert result.changed == paths[1:]
+    assert not result.failed
@@ -0,0 +1,152 @@
+from datetime import date
+from io import StringIO
+from aioresponses import aioresponses
+import pytest
+
+import solardat.fetch
+import solardat.search
+import solardat.sync
+from solardat.cli import JOB_NAME, DownloadJob, ThroughputReporter, main, make_parser
+from solardat.http import BASE_URL
+from solardat.sync import MANIFEST_NAME
+
+
+PATHS = [
+    "download/Archive/SIRF1604.txt",
+    "download/Archive/SIRO1604.txt",
+]
+
+
+class TestParser(object):
+    def test_search(self):
+        args = make_parser().parse_args([
+            "search", "--start", "2018-01", "--end", "2018-03",
+            "--file-type", "H", "--file-type", "Q", "Eugene", "Silver Lake",
+        ])
+        assert args.start == date(2018, 1, 1)
+        assert args.end == date(2018, 3, 1)
+        assert args.file_types == ["H", "Q"]
+        assert args.stations == ["Eugene", "Silver Lake"]
+
+    @pytest.mark.parametrize("argv", [
+        ["search", "--start", "2018-1-5", "--end", "2018-03", "Eugene"],
+        ["download", "--start", "2018-01", "--end", "2018-03", "-o", "out",
+         "-j", "0", "Eugene"],
+        ["download", "--start", "2018-01", "--end", "2018-03", "Eugene"],
+    ])
+    def test_invalid(self, argv, capsys):
+        with pytest.raises(SystemExit):
+            make_parser().parse_args(argv)
+
+
+def test_reporter():
+    clock = iter([0., 1., 1.5, 2., 3.]).__next__
+    stream = StringIO()
+    reporter = ThroughputReporter(4, stream, interval=1., clock=clock)
+
+    reporter("a", b"header\n1\n2\n")
+    reporter("b", None)
+    reporter("c", b"header\n" + b"1\n" * 1000)
+    reporter.failed("d", ValueError())
+    lines = stream.getvalue().splitlines()
+    assert lines == [
+        "1/4 files, 0 failed, 1.0 files/s, 0.00 MB/s, 2 rows/s",
+        "3/4 files, 0 failed, 1.5 files/s, 0.00 MB/s, 501 rows/s",
+        "4/4 files, 1 failed, 1.0 files/s, 0.00 MB/s, 334 rows/s",
+    ]
+
+def test_job(tmp_path):
+    job = DownloadJob(tmp_path / JOB_NAME, PATHS, done=PATHS[:1])
+    assert job.pending == set(PATHS[1:])
+    job(PATHS[1], None)
+    job.save()
+
+    loaded = DownloadJob.load(tmp_path / JOB_NAME)
+    assert loaded.pending == set()
+    assert loaded.done == set(PATHS)
+
+def test_stations(monkeypatch, capsys):
+    stations = ["Eugene", "Hermiston"]
+    monkeypatch.setattr(solardat.search, "fetch_stations", lambda: stations)
+    assert main(["stations"]) == 0
+    assert capsys.readouterr().out == "Eugene\nHermiston\n"
+
+def test_search(monkeypatch, capsys):
+    results = {"Silver Lake, OR": [f"{BASE_URL}/{path}" for path in PATHS]}
+    monkeypatch.setattr(solardat.fetch, "find_files", lambda *args: results)
+
+    argv = ["search", "--start", "2016-04", "--end", "2016-04", "--file-type", "O"]
+    assert main([*argv, "Silver Lake"]) == 0
+    assert capsys.readouterr().out == f"Silver Lake, OR\t{PATHS[1]}\n"
+
+class TestDownload(object):
+    @pytest.fixture(autouse=True)
+    def discover(self, monkeypatch):
+        monkeypatch.setattr(solardat.sync, "discover", lambda *args: PATHS)
+
+    def argv(self, output):
+        return [
+            "download", "--start", "2016-04", "--end", "2016-04",
+            "-o", str(output), "Silver Lake",
+        ]
+
+    def test_downloads(self, tmp_path, archival_data, capsys):
+        with aioresponses() as mocked:
+            for path in PATHS:
+                mocked.get(f"{BASE_URL}/{path}", body=archival_data)
+            assert main(self.argv(tmp_path)) == 0
+
+        assert (tmp_path / "SIR" / "SIRO1604.txt").read_text() == archival_data
+        assert (tmp_path / MANIFEST_NAME).exists()
+        assert DownloadJob.load(tmp_path / JOB_NAME).done == set(PATHS)
+        err = capsys.readouterr().err
+        assert "2/2 files" in err
+        assert "2 fetched, 0 unchanged, 0 failed" in err
+
+    def test_failures(self, tmp_path, archival_data, capsys):
+        with aioresponses() as mocked:
+            mocked.get(f"{BASE_URL}/{PATHS[0]}", body=archival_data)
+            mocked.get(f"{BASE_URL}/{PATHS[1]}", status=404)
+            assert main([*self.argv(tmp_path), "--quiet"]) == 1
+
+        err = capsys.readouterr().err
+        assert "files/s" not in err
+        assert f"Failed: {PATHS[1]}" in err
+
+    def test_resume(self, tmp_path, archival_data, capsys):
+        with aioresponses() as mocked:
+            mocked.get(f"{BASE_URL}/{PATHS[0]}", body=archival_data)
+            mocked.get(f"{BASE_URL}/{PATHS[1]}", status=404)
+            assert main(self.argv(tmp_path)) == 1
+        job = DownloadJob.load(tmp_path / JOB_NAME)
+        assert job.pending == set(PATHS[1:])
+        assert "2/2 files, 1 failed" in capsys.readouterr().err
+
+        # Only the pending path is requested again.
+        with aioresponses() as mocked:
+            mocked.get(f"{BASE_URL}/{PATHS[1]}", body=archival_data)
+            assert main(["resume", "-o", str(tmp_path)]) == 0
+        assert DownloadJob.load(tmp_path / JOB_NAME).done == set(PATHS)
+        assert "1 fetched, 0 unchanged, 0 failed" in capsys.readouterr().err
+
+    def test_resume_missing(self, tmp_path, capsys):
+        assert main(["resume", "-o", str(tmp_path)]) == 2
+        assert "No download to resume" in capsys.readouterr().err
+
+
+def test_queue(monkeypatch, tmp_path, archival_data, capsys):
+    monkeypatch.setattr(solardat.sync, "discover", lambda *args: PATHS)
+    queue = str(tmp_path / "queue.db")
+    argv = ["enqueue", "--queue", queue, "--start", "2016-04", "--end", "2016-04", "X"]
+    assert main(argv) == 0
+    assert main(argv) == 0
+    assert "0 added, 2 in queue" in capsys.readouterr().err
+
+    with aioresponses() as mocked:
+        for path in PATHS:
+            mocked.get(f"{BASE_URL}/{path}", body=archival_data)
+        assert main(["work", "--queue", queue, "-o", str(tmp_path / "mirror")]) == 0
+
+    err = capsys.readouterr().err
+    assert "2 fetched, 0 unchanged, 0 failed" in err
+    assert "2 done" in err
@@ -6,10 +6,18 @@ import pytest
 from solardat.decode import (
     add_hours_minutes,
     cast_row,
+    from_timestamp,
+    iter_archival,
+    make_timestamps,
     parse_archival,
+    parse_columns,
     parse_header,
     parse_timestamp,
+    read_file,
+    read_file_columns,
+    read_files,
     read_raw,
+    to_timestamp,
 )
 
 
@@ -137,6 +145,62 @@ class TestParseArchival(object):
 
         assert out
 
+class TestIterArchival(object):
+    def test_lazy(self, archival_data, buffer):
+        station_id, records = iter_archival(buffer)
+        assert station_id == 94249
+        assert next(records) == read_raw(archival_data)[1][0]
+        assert len(list(records)) == 99
+
+class TestTimestamps(object):
+    def test_round_trips(self):
+        dt = datetime(2016, 4, 1, 12, 30)
+        assert from_timestamp(to_timestamp(dt)) == dt
+
+    def test_make_timestamps(self):
+        expected = [
+            datetime(2016, 1, 1, 0, 1),
+            datetime(2016, 2, 1, 15, 0),
+            datetime(2016, 2, 2, 0, 0),
+        ]
+
+        out = make_timestamps(2016, ["1", "32", "32"], ["1", "1500", "2400"])
+        assert list(map(from_timestamp, out)) == expected
+
+class TestParseColumns(object):
+    def test_matches_rows(self, archival_data):
+        _, rows = read_raw(archival_data)
+        with StringIO(archival_data) as buffer:
+            station_id, columns = parse_columns(buffer)
+
+        assert station_id == 94249
+        assert list(columns) == list(rows[0])
+        assert list(map(from_timestamp, columns["ending_time"])) == [
+            row["ending_time"] for row in rows
+        ]
+        for name in list(columns)[1:]:
+            assert list(columns[name]) == [row[name] for row in rows]
+
+    def test_typecodes(self, buffer):
+        _, columns = parse_columns(buffer)
+        assert columns["ending_time"].typecode == "q"
+        assert columns["1001"].typecode == "d"
+        assert columns["1001_FLAG"].typecode == "B"
+
+    def test_selects(self, buffer):
+        _, columns = parse_columns(buffer, ["9301_FLAG", "1001"])
+        assert list(columns) == ["ending_time", "1001", "9301_FLAG"]
+
+    def test_raises_missing(self, buffer):
+        with pytest.raises(ValueError):
+            parse_columns(buffer, ["1000"])
+
+    def test_empty(self):
+        with StringIO("94249\t2016\t1001\t0\n") as buffer:
+            _, columns = parse_columns(buffer)
+        assert list(columns) == ["ending_time", "1001", "1001_FLAG"]
+        assert all(len(values) == 0 for values in columns.values())
+
 class TestReadRaw(object):
     def test_metadata(self, archival_data):
         expected = 94249
@@ -157,3 +221,42 @@ class TestReadRaw(object):
         _, records = read_raw(archival_data)
         assert len(records) == expected_len
         assert all(set(record) == expected_columns for record in records)
+
+class TestReadFile(object):
+    path = "tests/data/SIRO1604-example.txt"
+
+    def test_matches_read_raw(self, archival_data):
+        expected = read_raw(archival_data)
+        assert read_file(self.path) == expected
+
+    def test_selects(self):
+        _, rows = read_file(self.path, ["1001"])
+        assert list(rows[0]) == ["ending_time", "1001"]
+
+    def test_columns(self, buffer):
+        expected = parse_columns(buffer)
+        assert read_file_columns(self.path) == expected
+
+    def test_raises_empty(self, tmp_path):
+        file = tmp_path / "EUPQ1801.txt"
+        file.write_bytes(b"")
+        with pytest.raises(ValueError):
+            read_file(file)
+
+class TestReadFiles(object):
+    def test_directory(self, tmp_path, archival_data):
+        for filestem in ("SIRO1604", "SIRO1605"):
+            (tmp_path / f"{filestem}.txt").write_text(archival_data)
+        (tmp_path / "notes.md").write_text("")
+
+        results = list(read_files(tmp_path, ["1001"], columnar=True))
+        filestems, station_ids, contents = zip(*results)
+        assert filestems == ("SIRO1604", "SIRO1605")
+        assert station_ids == (94249, 94249)
+        assert all(len(columns["1001"]) == 100 for columns in contents)
+
+    def test_paths(self):
+        results = list(read_files(["tests/data/SIRO1604-example.txt"]))
+        (filestem, station_id, rows), = results
+        assert filestem == "SIRO1604-example"
+        assert len(rows) == 100
@@ -1,7 +1,16 @@
 from unittest import mock
 import pytest
 
-from solardat.descriptions import _get_tables, _merge_tables, lookup_code
+from solardat import descriptions
+from solardat.descriptions import (
+    ColumnDescription,
+    _build_index,
+    _get_tables,
+    _merge_tables,
+    describe_columns,
+    lookup_code,
+    parse_units,
+)
 
 
 mock_table = {
@@ -10,7 +19,7 @@ mock_table = {
     "1000": "Spectral",
 }
 
-@mock.patch("solardat.descriptions._merged_table", mock_table)
+@mock.patch("solardat.descriptions._index", _build_index(mock_table))
 class TestLookupDescription(object):
     @pytest.mark.parametrize("code", ["1", "10000"], ids=["Short", "Long"])
     def test_validates_code_length(self, code):
@@ -31,6 +40,49 @@ class TestLookupDescription(object):
     def test_lookup_code(self, code, expected):
         assert lookup_code(code) == expected
 
+    def test_raises_unknown_spectral(self):
+        with pytest.raises(ValueError):
+            lookup_code("2000")
+
+class TestBuildIndex(object):
+    def test_matches_merged_table(self):
+        merged_table = _merge_tables(_get_tables())
+        index = _build_index(merged_table)
+
+        for code, description in merged_table.items():
+            assert index[code] == description
+        assert index["1001"] == merged_table["100"]
+        assert index["9301"] == merged_table["930"]
+
+class TestDescribeColumns(object):
+    def test_describes(self):
+        columns = ["doy", "ending_time", "1001", "1001_FLAG", "9301", "9301_FLAG"]
+
+        out = describe_columns(columns)
+        assert list(out) == columns
+        assert out["doy"].code is None
+        assert out["1001"] == ColumnDescription(
+            "1001", lookup_code("100"), "watt hours per square meter per hour", False
+        )
+        assert out["9301"].units == "degrees Celsius"
+        assert out["9301_FLAG"].code == "9301"
+        assert out["9301_FLAG"].is_flag
+
+    @pytest.mark.parametrize("description, expected", [
+        ("Direct (watts); Beam", "watts"),
+        ("Meteorological data; Albedo", None),
+    ])
+    def test_parse_units(self, description, expected):
+        assert parse_units(description) == expected
+
+class TestLazyTables(object):
+    def test_tablenames(self):
+        expected = {"solar", "spectral", "meteorological", "quality"}
+        assert descriptions.tablenames == expected
+
+    def test_loads_once(self):
+        assert descriptions.tables is descriptions.tables
+
 class TestTableMerging(object):
     def test_no_collisions(self):
         tables = _get_tables()
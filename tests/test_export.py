@@ -0,0 +1,58 @@
+import csv
+import pytest
+
+from solardat.decode import read_raw
+from solardat.export import CSV, PARQUET, export, export_file, export_many
+from solardat.http import BASE_URL
+
+
+@pytest.fixture
+def rows(archival_data):
+    _, rows = read_raw(archival_data)
+    return rows
+
+
+class TestExportFile(object):
+    def test_csv(self, rows, tmp_path):
+        file = export_file("SIRO1604", 94249, iter(rows), tmp_path, CSV, batch_size=30)
+        assert file == tmp_path / "SIRO1604.csv"
+
+        with open(file, newline="") as fh:
+            records = list(csv.DictReader(fh))
+        assert len(records) == 100
+        assert list(records[0]) == ["station_id", *rows[0]]
+        assert records[0]["station_id"] == "94249"
+        assert records[0]["ending_time"] == rows[0]["ending_time"].isoformat()
+        assert float(records[-1]["9301"]) == rows[-1]["9301"]
+
+    def test_parquet(self, rows, tmp_path):
+        parquet = pytest.importorskip("pyarrow.parquet")
+
+        file = export_file("SIRO1604", 94249, rows, tmp_path, PARQUET, batch_size=30)
+        table = parquet.read_table(str(file))
+        assert parquet.ParquetFile(str(file)).num_row_groups == 4
+        assert table.num_rows == 100
+        assert table.column_names == ["station_id", *rows[0]]
+        assert table.column("1001_FLAG").to_pylist() == [row["1001_FLAG"] for row in rows]
+        assert table.column("ending_time").to_pylist()[0] == rows[0]["ending_time"]
+
+    def test_raises_unknown_format(self, rows, tmp_path):
+        with pytest.raises(ValueError):
+            export_file("SIRO1604", 94249, rows, tmp_path, "xlsx")
+
+def test_export(rows, tmp_path):
+    results = [("SIRO1604", 94249, iter(rows)), ("SIRO1605", 94249, iter(rows))]
+
+    files = export(results, tmp_path, CSV)
+    assert [file.name for file in files] == ["SIRO1604.csv", "SIRO1605.csv"]
+
+@pytest.mark.asyncio
+async def test_export_many(mock_rsps, session, archival_data, tmp_path):
+    paths = ["download/Archive/SIRF1601.txt", "download/Archive/SIRF1602.txt"]
+
+    for path in paths:
+        mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data)
+    files = await export_many(session, paths, tmp_path, CSV)
+
+    assert [file.name for file in files] == ["SIRF1601.csv", "SIRF1602.csv"]
+    assert all(file.exists() for file in files)
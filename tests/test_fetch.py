@@ -1,15 +1,23 @@
 from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from io import BytesIO
+from threading import Thread
 from zipfile import ZipFile
 import pytest
+import re
 import requests
 import responses
 
+import solardat.http
 from solardat.fetch import (
+    download_ranged,
     fetch_compressed,
     fetch_file,
+    fetch_many,
+    fetch_series,
     find_compressed,
     find_files,
+    stream_compressed,
 )
 from solardat.http import BASE_URL
 from solardat.search import LIST_FILES_PATH
@@ -72,6 +80,56 @@ class TestFetchFile(object):
         assert station_id == self.station_id
         assert len(rows) >= self.n_rows
 
+    @responses.activate
+    def test_series(self, archival_data):
+        responses.add(responses.GET, f"{BASE_URL}/{self.filepath}", body=archival_data)
+
+        series = fetch_series(self.filepath)
+        assert series.station_id == self.station_id
+        assert len(series) == self.n_rows
+
+@pytest.mark.usefixtures("clear_response_cache")
+class TestFetchMany(object):
+    filepaths = [f"download/Archive/SIRF16{month:02d}.txt" for month in range(1, 7)]
+    station_id = 94249
+    n_rows = 100
+
+    @responses.activate
+    def test_mocked(self, archival_data):
+        for filepath in self.filepaths:
+            responses.add(responses.GET, f"{BASE_URL}/{filepath}", body=archival_data)
+
+        results = fetch_many(self.filepaths, workers=3)
+        filestems, station_ids, all_rows = zip(*results)
+        assert list(filestems) == [f"SIRF16{month:02d}" for month in range(1, 7)]
+        assert all(station_id == self.station_id for station_id in station_ids)
+        assert all(len(rows) == self.n_rows for rows in all_rows)
+
+    @responses.activate
+    def test_raises(self, archival_data):
+        first, second = self.filepaths[:2]
+        responses.add(responses.GET, f"{BASE_URL}/{first}", status=404)
+        responses.add(responses.GET, f"{BASE_URL}/{second}", body=archival_data)
+
+        with pytest.raises(requests.HTTPError):
+            fetch_many([first, second])
+
+    @responses.activate
+    def test_failed(self, archival_data):
+        first, second = self.filepaths[:2]
+        responses.add(responses.GET, f"{BASE_URL}/{first}", status=404)
+        responses.add(responses.GET, f"{BASE_URL}/{second}", body=archival_data)
+
+        failed = {}
+        results = fetch_many([first, second], failed=failed)
+        assert [filestem for filestem, _, _ in results] == ["SIRF1602"]
+        assert list(failed) == [first]
+        assert isinstance(failed[first], requests.HTTPError)
+
+    def test_validates_workers(self):
+        with pytest.raises(ValueError):
+            fetch_many(self.filepaths, workers=0)
+
 @pytest.mark.usefixtures("clear_response_cache")
 class TestFindCompressed(object):
     @responses.activate
@@ -137,3 +195,151 @@ class TestFetchCompressed(object):
         assert filestems == expected_filestems
         assert all(station_id == 94249 for station_id in station_ids)
         assert all(len(rows) > 0 for rows in contents)
+
+@pytest.mark.usefixtures("clear_response_cache")
+class TestStreamCompressed(object):
+    @responses.activate
+    def test_mocked(self, archival_data):
+        expected_filestems = ["ABCD1604", "ABCD1605"]
+        compressed = make_compressed(expected_filestems, archival_data)
+        filepath = "download/temp/12345.zip"
+        responses.add(responses.GET, f"{BASE_URL}/{filepath}", body=compressed)
+
+        expected = list(fetch_compressed(filepath))
+        out = [
+            (filestem, station_id, list(rows))
+            for filestem, station_id, rows in stream_compressed(filepath)
+        ]
+        assert out == expected
+
+
+class ZipfileHandler(BaseHTTPRequestHandler):
+    """Serve one file, with byte ranges if the server supports them."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        if self.server.head_status is not None:
+            self.server.requests.append((self.command, None))
+            self.send_response(self.server.head_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body):
+        content = self.server.content
+        self.server.requests.append((self.command, self.headers.get("Range")))
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range") or "")
+        if self.server.ranges and match:
+            start, end = int(match.group(1)), int(match.group(2))
+            if start in self.server.failing:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            content = content[start:end + 1]
+            if start in self.server.truncated:
+                # Cut off once, as by a dropped connection.
+                self.server.truncated.remove(start)
+                content = content[:-1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+        else:
+            self.send_response(200)
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(content)
+
+@pytest.fixture(params=[True, False], ids=["ranges", "no-ranges"])
+def zipfile_server(request, archival_data, monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), ZipfileHandler)
+    filestems = ["ABCD1604", "ABCD1605", "ABCD1606"]
+    server.content = make_compressed(filestems, archival_data)
+    server.ranges = request.param
+    server.requests = []
+    server.head_status = None
+    server.truncated = set()
+    server.failing = set()
+    thread = Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(solardat.http, "BASE_URL", base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class TestDownloadRanged(object):
+    path = "download/temp/12345.zip"
+
+    def test_download(self, zipfile_server, tmp_path):
+        with open(tmp_path / "download.zip", "wb") as file:
+            file.write(b"header")
+            size = download_ranged(self.path, file, workers=3, chunk_size=1000)
+        content = zipfile_server.content
+        assert size == len(content)
+        assert (tmp_path / "download.zip").read_bytes() == b"header" + content
+
+        gets = [byte_range for method, byte_range in zipfile_server.requests
+                if method == "GET"]
+        if zipfile_server.ranges:
+            assert len(gets) == -(-len(content) // 1000)
+            assert all(gets)
+        else:
+            assert gets == [None]
+
+    def test_single_chunk(self, zipfile_server, tmp_path):
+        with open(tmp_path / "download.zip", "wb") as file:
+            download_ranged(self.path, file, chunk_size=10 ** 9)
+        assert (tmp_path / "download.zip").read_bytes() == zipfile_server.content
+
+    @pytest.mark.usefixtures("clear_response_cache")
+    def test_fetch_compressed(self, zipfile_server, archival_data):
+        filestems, station_ids, contents = zip(*fetch_compressed(self.path, workers=4))
+        assert filestems == ("ABCD1604", "ABCD1605", "ABCD1606")
+        assert all(len(rows) == 100 for rows in contents)
+
+        streamed = [
+            (filestem, station_id, list(rows))
+            for filestem, station_id, rows in stream_compressed(self.path, workers=4)
+        ]
+        assert [filestem for filestem, _, _ in streamed] == list(filestems)
+
+    def test_no_head(self, zipfile_server, tmp_path):
+        zipfile_server.head_status = 405
+        with open(tmp_path / "download.zip", "wb") as file:
+            download_ranged(self.path, file, workers=3, chunk_size=1000)
+        assert (tmp_path / "download.zip").read_bytes() == zipfile_server.content
+        assert zipfile_server.requests == [("HEAD", None), ("GET", None)]
+
+    def test_retries_short_chunk(self, zipfile_server, tmp_path):
+        zipfile_server.truncated.add(1000)
+        with open(tmp_path / "download.zip", "wb") as file:
+            download_ranged(self.path, file, workers=3, chunk_size=1000)
+        assert (tmp_path / "download.zip").read_bytes() == zipfile_server.content
+        if zipfile_server.ranges:
+            assert zipfile_server.requests.count(("GET", "bytes=1000-1999")) == 2
+
+    def test_stops_on_failure(self, zipfile_server, tmp_path):
+        if not zipfile_server.ranges:
+            pytest.skip("Requires ranges")
+        zipfile_server.failing.add(0)
+        with open(tmp_path / "download.zip", "wb") as file:
+            with pytest.raises(requests.HTTPError):
+                download_ranged(self.path, file, workers=2, chunk_size=10)
+
+        # Chunks not started yet are cancelled.
+        gets = [request for request in zipfile_server.requests if request[0] == "GET"]
+        assert len(gets) < len(zipfile_server.content) // 10
+
+    def test_validates(self, tmp_path):
+        with open(tmp_path / "download.zip", "wb") as file:
+            with pytest.raises(ValueError):
+                download_ranged(self.path, file, workers=0)
@@ -0,0 +1,8 @@
+from solardat.files import write_atomic
+
+
+def test_write_atomic(tmp_path):
+    file = tmp_path / "sub" / "file.txt"
+    write_atomic(file, b"contents")
+    assert file.read_bytes() == b"contents"
+    assert [p.name for p in file.parent.iterdir()] == ["file.txt"]
@@ -0,0 +1,142 @@
+from array import array
+from datetime import datetime, timedelta
+from io import StringIO
+import pytest
+
+from solardat.decode import columns_to_rows, parse_columns
+from solardat.gaps import (
+    Duplicate,
+    Gap,
+    GapIndex,
+    find_gaps,
+    infer_interval,
+    row_times,
+    time_diffs,
+)
+
+
+@pytest.fixture
+def times():
+    # One-minute end times, missing 00:04 and 00:05, with 00:07
+    # repeated.
+    minutes = [1, 2, 3, 6, 7, 7, 7, 8, 9, 10]
+    return array("q", [60 * minute for minute in minutes])
+
+
+def test_time_diffs():
+    assert time_diffs(array("q", [60, 120, 300])) == array("q", [60, 180])
+    assert time_diffs(array("q", [60])) == array("q")
+
+class TestInferInterval(object):
+    def test_from_file_type(self):
+        assert infer_interval([], "Q") == 900
+
+    def test_from_data(self, times):
+        assert infer_interval(times) == 60
+        assert infer_interval([0, 0, 0, 300]) == 300
+
+    def test_too_few(self):
+        with pytest.raises(ValueError):
+            infer_interval([60, 60])
+
+
+class TestFindGaps(object):
+    def test_finds(self, times):
+        result = find_gaps(times)
+        assert result.interval == 60
+        assert (result.n_rows, result.first, result.last) == (10, 60, 600)
+        assert result.gaps == [Gap(180, 360, 2)]
+        assert result.duplicates == [Duplicate(420, 3)]
+        assert result.irregular == []
+        assert result.missing == 2
+        assert not result.is_regular
+
+    def test_irregular(self):
+        result = find_gaps([60, 120, 90, 180, 240], interval=60)
+        assert result.irregular == [Gap(120, 90, 0), Gap(90, 180, 0)]
+
+    def test_regular(self, archival_data):
+        with StringIO(archival_data) as buffer:
+            _, columns = parse_columns(buffer)
+
+        result = find_gaps(columns["ending_time"], file_type="O")
+        assert result.is_regular
+        assert result.n_rows == 100
+
+    def test_rollover(self):
+        # 23:59, 24:00 and 00:01 of the next day.
+        start = datetime(2018, 1, 1, 23, 59)
+        rows = [{"ending_time": start + timedelta(minutes=i)} for i in range(3)]
+        assert find_gaps(row_times(rows), file_type="O").is_regular
+
+    def test_from_rows(self, archival_data):
+        with StringIO(archival_data) as buffer:
+            _, columns = parse_columns(buffer)
+        rows = columns_to_rows(columns)
+        assert row_times(rows) == columns["ending_time"]
+
+    def test_empty(self):
+        result = find_gaps(array("q"), file_type="H")
+        assert result.interval == 3600
+        assert result.is_regular
+
+    def test_edges(self):
+        times = [60 * minute for minute in [3, 4, 5, 7]]
+        result = find_gaps(times, interval=60, start=60, end=60 * 10)
+        assert result.gaps == [Gap(0, 180, 2), Gap(300, 420, 1), Gap(420, 660, 3)]
+        assert result.missing == 6
+        assert (result.first, result.last) == (180, 420)
+
+        # Bounds that are present add no gaps.
+        assert find_gaps(times, interval=60, start=180, end=420).gaps == [
+            Gap(300, 420, 1)
+        ]
+        # Nor do times outside of the bounds.
+        assert find_gaps(times, interval=60, start=240, end=300).gaps == [
+            Gap(300, 420, 1)
+        ]
+
+    def test_edges_irregular(self):
+        result = find_gaps([120, 180], interval=60, start=30)
+        assert result.irregular == [Gap(-30, 120, 0)]
+
+    def test_edges_empty(self):
+        result = find_gaps(array("q"), interval=60, start=60, end=600)
+        assert result.gaps == [Gap(0, 660, 10)]
+
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            find_gaps([60], interval=60, start=120, end=60)
+
+    def test_gaps_between(self):
+        times = [60 * minute for minute in [1, 2, 5, 6, 10, 11, 20]]
+        result = find_gaps(times, interval=60)
+        first, second, third = result.gaps
+
+        assert result.gaps_between(0, 60 * 30) == result.gaps
+        assert result.gaps_between(60 * 3, 60 * 6) == [first]
+        assert result.gaps_between(60 * 5, 60 * 6) == []
+        assert result.gaps_between(60 * 6, 60 * 12) == [second, third]
+
+
+class TestGapIndex(object):
+    def test_round_trip(self, times, tmp_path):
+        path = tmp_path / "gaps.json"
+        index = GapIndex.load(path)
+        index.add("EUPO1801", times)
+        index.add("EUPO1802", array("q", [60, 120]))
+        index.save()
+
+        loaded = GapIndex.load(path)
+        assert loaded.files == index.files
+        assert loaded.incomplete() == ["EUPO1801"]
+        assert loaded.gaps_between("EUPO1801", 0, 240) == [Gap(180, 360, 2)]
+
+    def test_add_bounds(self):
+        index = GapIndex()
+        result = index.add("EUPO1801", array("q", [60, 120]), start=60, end=240)
+        assert result.gaps == [Gap(120, 300, 2)]
+
+    def test_save_requires_path(self):
+        with pytest.raises(ValueError):
+            GapIndex().save()
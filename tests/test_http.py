@@ -1,9 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
 from requests.exceptions import HTTPError
 from requests.models import Response
 import pytest
 import responses
+import threading
+import time
 
-from solardat.http import _ResponseCache, _cache, BASE_URL, add_etag, dispatch, make_url
+from solardat.http import (
+    _ResponseCache,
+    _cache,
+    BASE_URL,
+    SingleFlight,
+    add_etag,
+    dispatch,
+    make_url,
+    revalidate,
+)
 
 
 def populated_cache():
@@ -68,6 +80,17 @@ class TestResponseCache(object):
         out = cache.get_etag(self.path)
         assert out is None
 
+    def test_freshness(self):
+        now = [100.]
+        cache = _ResponseCache(clock=lambda: now[0])
+        assert cache.validated_at("path") is None
+        assert not cache.is_fresh("path", 60)
+        cache.mark_validated("path")
+        assert cache.validated_at("path") == 100.
+        now[0] += 30
+        assert cache.is_fresh("path", 60)
+        assert not cache.is_fresh("path", 10)
+
     def test_clear_cache(self):
         cache, _ = populated_cache()
 
@@ -118,8 +141,122 @@ class TestDispatch(object):
         response = dispatch("GET", self.path)
         assert response is _cache[self.path]
 
+    @responses.activate
+    def test_retries(self):
+        responses.add(responses.GET, f"{BASE_URL}/test", status=503,
+                      headers={"Retry-After": "0"})
+        responses.add_callback(responses.GET, f"{BASE_URL}/test", callback=callback)
+        response = dispatch("GET", self.path)
+        assert response.status_code == 200
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_doesnt_retry_post(self):
+        responses.add(responses.POST, f"{BASE_URL}/test", status=503)
+        with pytest.raises(HTTPError):
+            dispatch("POST", self.path)
+        assert len(responses.calls) == 1
+
     @responses.activate
     def test_raises(self):
         responses.add(responses.GET, f"{BASE_URL}/non-existent", status=400)
         with pytest.raises(HTTPError):
             dispatch("GET", "non-existent")
+
+
+@pytest.mark.usefixtures("clear_response_cache")
+class TestRevalidate(object):
+    paths = ["unchanged", "changed", "same-etag", "broken"]
+
+    @pytest.fixture(autouse=True)
+    def cached(self):
+        for path in self.paths:
+            response = Response()
+            response.headers = {"ETag": f"{path}-etag"}
+            response.status_code = 200
+            _cache[path] = response
+
+    def mock_heads(self):
+        def head(request):
+            path = request.url.rsplit("/", 1)[-1]
+            if path == "unchanged":
+                return (304, {}, "")
+            if path == "same-etag":
+                return (200, {"ETag": "same-etag-etag"}, "")
+            return (200, {"ETag": "new"}, "")
+
+        for path in self.paths[:3]:
+            responses.add_callback(responses.HEAD, f"{BASE_URL}/{path}", callback=head)
+        responses.add(responses.HEAD, f"{BASE_URL}/broken", status=404)
+
+    @responses.activate
+    def test_revalidate(self):
+        self.mock_heads()
+        result = revalidate([*self.paths, "uncached", "changed"], workers=2)
+        assert result.changed == ["changed", "uncached"]
+        assert result.unchanged == ["same-etag", "unchanged"]
+        assert list(result.failed) == ["broken"]
+        assert all(call.request.method == "HEAD" for call in responses.calls)
+        assert all(call.request.headers["If-None-Match"] for call in responses.calls)
+
+        # Changed responses are kept until fetched again.
+        assert _cache.get_etag("changed") == "changed-etag"
+        assert _cache.validated_at("unchanged") is not None
+        assert _cache.validated_at("changed") is None
+
+    @responses.activate
+    def test_max_age(self):
+        self.mock_heads()
+        _cache.mark_validated("changed")
+        result = revalidate(self.paths, max_age=60)
+        assert "changed" in result.unchanged
+        assert len(responses.calls) == 3
+
+
+class TestSingleFlight(object):
+    def run_concurrently(self, function, n_followers=3):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def leader():
+            started.set()
+            release.wait()
+            return function()
+
+        with ThreadPoolExecutor(n_followers + 1) as executor:
+            futures = [executor.submit(flights.do, "key", leader)]
+            started.wait()
+            futures += [
+                executor.submit(flights.do, "key", function) for _ in range(n_followers)
+            ]
+            # Let the followers join the call in flight.
+            time.sleep(0.1)
+            release.set()
+
+        assert len(flights) == 0
+        return futures
+
+    def test_shares_result(self):
+        calls = []
+
+        def function():
+            calls.append(1)
+            return object()
+
+        futures = self.run_concurrently(function)
+        assert len(calls) == 1
+        assert len({id(future.result()) for future in futures}) == 1
+
+    def test_shares_error(self):
+        def function():
+            raise KeyError("boom")
+
+        for future in self.run_concurrently(function):
+            with pytest.raises(KeyError):
+                future.result()
+
+    def test_sequential_calls(self):
+        flights = SingleFlight()
+        assert flights.do("key", lambda: 1) == 1
+        assert flights.do("key", lambda: 2) == 2
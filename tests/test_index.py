@@ -0,0 +1,92 @@
+from datetime import date
+import pytest
+import responses
+
+from solardat.http import BASE_URL
+from solardat.index import ArchiveIndex
+from solardat.search import LIST_FILES_PATH, extract_rel_links
+
+
+@pytest.fixture
+def index(search_results_page):
+    index = ArchiveIndex()
+    index.update(extract_rel_links(search_results_page))
+    index.mark_searched(
+        TestArchiveIndex.start, TestArchiveIndex.end, ["Eugene", "Silver Lake"]
+    )
+    return index
+
+
+class TestArchiveIndex(object):
+    start = date(2016, 1, 1)
+    end = date(2016, 10, 1)
+
+    def test_stations(self, index):
+        assert index.stations == ["Eugene, OR", "Silver Lake, OR"]
+        assert "Eugene" in index
+        assert "Boise" not in index
+
+    def test_find_files(self, index):
+        expected = {
+            "Eugene, OR": [
+                "download/Archive/EUPF1602.txt",
+                "download/Archive/EUPQ1610.txt",
+                "download/Archive/EURO1604.txt",
+            ],
+            "Silver Lake, OR": [
+                "download/Archive/SIRO1608.txt",
+                "download/Archive/SIRO1609.txt",
+                "download/Archive/SIRO1610.txt",
+            ],
+        }
+
+        paths = index.find_files(self.start, self.end, ["Eugene", "Silver Lake"])
+        assert paths == expected
+
+    def test_find_files_filters(self, index):
+        expected = {"Silver Lake, OR": ["download/Archive/SIRO1609.txt"]}
+
+        paths = index.find_files(
+            date(2016, 9, 1), date(2016, 9, 1), ["Eugene", "Silver Lake"], ["O"]
+        )
+        assert paths == expected
+
+    @pytest.mark.usefixtures("clear_response_cache")
+    @responses.activate
+    def test_find_files_refreshes_missing(self, search_results_page):
+        responses.add(
+            responses.POST,
+            f"{BASE_URL}/{LIST_FILES_PATH}",
+            body=search_results_page
+        )
+        index = ArchiveIndex()
+
+        paths = index.find_files(self.start, self.end, ["Eugene"])
+        assert list(paths) == ["Eugene, OR"]
+        assert len(responses.calls) == 1
+
+        index.find_files(self.start, self.end, ["Eugene"])
+        index.find_files(date(2016, 3, 1), date(2016, 5, 1), ["Eugene"])
+        assert len(responses.calls) == 1
+
+        # Months outside of the searched interval are searched for.
+        index.find_files(date(2016, 6, 1), date(2016, 11, 1), ["Eugene"])
+        assert len(responses.calls) == 2
+        assert index.is_searched(self.start, date(2016, 11, 1), "Eugene")
+
+    def test_save_load(self, index, tmp_path):
+        path = tmp_path / "index.json"
+        index.save(path)
+
+        loaded = ArchiveIndex.load(path)
+        assert loaded.to_dict() == index.to_dict()
+        assert loaded.to_dict()["searched"]["Eugene"][::9] == ["2016-01", "2016-10"]
+
+    def test_is_searched(self, index):
+        assert index.is_searched(self.start, self.end, "Eugene")
+        assert not index.is_searched(date(2015, 12, 1), self.end, "Eugene")
+        assert not index.is_searched(self.start, self.end, "Boise")
+
+    def test_load_missing(self, tmp_path):
+        index = ArchiveIndex.load(tmp_path / "index.json")
+        assert index.stations == []
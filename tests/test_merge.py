@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from solardat.merge import align_rows, merge_rows
+
+
+def make_rows(start, n_rows, step=1, value=0.):
+    return [
+        {"ending_time": start + timedelta(minutes=step * i), "1001": value + i}
+        for i in range(n_rows)
+    ]
+
+START = datetime(2018, 1, 1)
+
+
+class TestMergeRows(object):
+    def test_orders_by_time(self):
+        streams = [("A", make_rows(START, 3, step=2)), ("B", make_rows(START, 4))]
+
+        merged = list(merge_rows(streams))
+        times = [row["ending_time"] for _, row in merged]
+        assert times == sorted(times)
+        assert len(merged) == 7
+        # Ties keep the order of the streams.
+        assert [label for label, _ in merged[:2]] == ["A", "B"]
+
+    def test_lazy(self):
+        def rows():
+            yield from make_rows(START, 2)
+            raise AssertionError("Consumed too far")
+
+        merged = merge_rows([("A", rows())])
+        assert next(merged)[0] == "A"
+
+class TestAlignRows(object):
+    def test_aligns(self):
+        streams = [
+            ("A", make_rows(START, 2, step=2, value=10.)),
+            ("B", make_rows(START, 3)),
+        ]
+        expected = [
+            {"ending_time": START, "A:1001": 10., "B:1001": 0.},
+            {"ending_time": START + timedelta(minutes=1), "B:1001": 1.},
+            {"ending_time": START + timedelta(minutes=2), "A:1001": 11., "B:1001": 2.},
+        ]
+
+        assert list(align_rows(streams)) == expected
+
+    def test_separator(self):
+        row, = align_rows([("A", make_rows(START, 1))], separator="__")
+        assert list(row) == ["ending_time", "A__1001"]
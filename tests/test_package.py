@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import pytest
+
+import solardat
+
+
+def imported_modules(statement):
+    code = f"{statement}; import sys; print(' '.join(sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, check=True)
+    return set(out.stdout.decode().split())
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="Requires module __getattr__")
+class TestLazyImports(object):
+    def test_defers_dependencies(self):
+        modules = imported_modules("from solardat import parse_archival")
+        assert "solardat.decode" in modules
+        assert not modules & {"aiohttp", "lxml", "requests", "solardat.fetch"}
+
+    def test_export_defers_aiohttp(self):
+        modules = imported_modules("import solardat.export")
+        assert "aiohttp" not in modules
+
+    def test_resolves_exports(self):
+        for name in solardat.__all__:
+            assert callable(getattr(solardat, name))
+
+    def test_resolves_submodules(self):
+        assert solardat.archive.__name__ == "solardat.archive"
+
+    def test_raises_for_missing(self):
+        with pytest.raises(AttributeError):
+            solardat.missing
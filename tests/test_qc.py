@@ -0,0 +1,112 @@
+from array import array
+from collections import OrderedDict
+from io import StringIO
+import pytest
+
+from solardat.decode import columns_to_rows, parse_columns
+from solardat.qc import (
+    all_good,
+    categorize,
+    combine_all,
+    combine_any,
+    describe_flag,
+    filter_columns,
+    filter_rows,
+    flag_columns,
+    good_mask,
+    invert,
+    isin,
+    quality_flags,
+    selected_runs,
+)
+
+
+@pytest.fixture
+def columns():
+    return OrderedDict([
+        ("ending_time", array("q", [60, 120, 180, 240])),
+        ("1001", array("d", [1., 2., 3., 4.])),
+        ("1001_FLAG", array("B", [11, 99, 11, 13])),
+        ("2011", array("d", [5., 6., 7., 8.])),
+        ("2011_FLAG", array("B", [11, 11, 99, 11])),
+    ])
+
+
+def test_good_mask(columns):
+    assert good_mask(columns["1001_FLAG"]) == bytes([1, 0, 1, 1])
+    assert good_mask(columns["1001_FLAG"], {13, 99}) == bytes([1, 0, 1, 0])
+
+def test_isin(columns):
+    assert isin(columns["1001_FLAG"], {13}) == bytes([0, 0, 0, 1])
+
+def test_combine():
+    masks = [bytes([1, 1, 0, 0]), bytes([1, 0, 1, 0])]
+    assert combine_all(masks) == bytes([1, 0, 0, 0])
+    assert combine_any(masks) == bytes([1, 1, 1, 0])
+    # Leading zero bytes are kept.
+    assert combine_all([bytes([0, 0, 1]), bytes([0, 0, 1])]) == bytes([0, 0, 1])
+
+    with pytest.raises(ValueError):
+        combine_all([bytes(2), bytes(3)])
+    with pytest.raises(ValueError):
+        combine_all([])
+
+def test_invert():
+    assert invert(bytes([1, 0, 0])) == bytes([0, 1, 1])
+
+
+class TestAllGood(object):
+    def test_all_elements(self, columns):
+        assert all_good(columns) == bytes([1, 0, 0, 1])
+
+    def test_selected_elements(self, columns):
+        assert all_good(columns, ["2011"]) == bytes([1, 1, 0, 1])
+        assert all_good(columns, []) == bytes([1, 1, 1, 1])
+
+    def test_missing_flags(self, columns):
+        with pytest.raises(ValueError):
+            all_good(columns, ["3001"])
+
+
+def test_selected_runs():
+    assert selected_runs(bytes([1, 1, 0, 1, 0, 0, 1])) == [(0, 2), (3, 4), (6, 7)]
+    assert selected_runs(bytes(3)) == []
+
+def test_filter(columns):
+    mask = all_good(columns)
+
+    filtered = filter_columns(columns, mask)
+    assert filtered["ending_time"] == array("q", [60, 240])
+    assert filtered["1001_FLAG"].typecode == "B"
+    assert filter_rows(columns_to_rows(columns), mask) == columns_to_rows(filtered)
+
+def test_flag_columns(archival_data):
+    with StringIO(archival_data) as buffer:
+        _, columns = parse_columns(buffer)
+
+    flags = flag_columns(columns_to_rows(columns))
+    assert list(flags) == [name for name in columns if name.endswith("_FLAG")]
+    assert flags["1001_FLAG"] == columns["1001_FLAG"]
+    assert flag_columns([]) == {}
+
+def test_categorize(columns):
+    categorical = categorize(columns["1001_FLAG"])
+    assert categorical.categories == list(quality_flags())
+    codes = [categorical.categories.index(flag) for flag in (11, 99, 11, 13)]
+    assert categorical.codes == array("B", codes)
+    assert categorical.descriptions[codes[1]] == (
+        "Missing or bad data; Missing or bad data"
+    )
+
+def test_categorize_stable():
+    # Codes do not depend on the other flags present.
+    first = categorize(array("B", [11, 99]))
+    second = categorize(array("B", [99, 42]))
+    assert first.codes[1] == second.codes[0]
+    assert second.categories[second.codes[1]] == 42
+
+def test_describe_flag():
+    assert describe_flag(9) == "Chart data (obsolete); Chart data (obsolete)"
+    assert describe_flag(42) == "Unknown flag: 42"
+    # Element codes are not flags.
+    assert describe_flag(100) == "Unknown flag: 100"
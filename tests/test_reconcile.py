@@ -0,0 +1,142 @@
+import pytest
+import responses
+
+import solardat.http
+from solardat.http import BASE_URL
+from solardat.reconcile import (
+    RESOLUTION_ORDER,
+    Selection,
+    fetch_reconciled,
+    read_header,
+    reconcile,
+)
+from solardat.throttle import Throttle
+
+
+ARCHIVE = "download/Archive"
+HEADERS = {
+    "O": ["1001", "2011"],
+    "F": ["1001", "2011", "3001"],
+    "Q": ["1001"],
+    "H": ["1001", "3001", "9301"],
+}
+
+
+def make_header(elements, station_id=94255, year=2018):
+    descriptors = [value for element in elements for value in (element, "0")]
+    return "\t".join(map(str, [station_id, year, *descriptors]))
+
+def fake_reader(path):
+    file_type = path[len(ARCHIVE) + 4]
+    elements = HEADERS[file_type]
+    columns = ["doy", "ending_time"]
+    for element in elements:
+        columns += [element, f"{element}_FLAG"]
+    return 94255, 2018, columns
+
+class RecordingThrottle(Throttle):
+    def __init__(self):
+        super().__init__()
+        self.outcomes = []
+
+    def release(self, ok, latency=None):
+        self.outcomes.append(ok)
+        super().release(ok, latency)
+
+@pytest.fixture
+def paths():
+    return [
+        f"{ARCHIVE}/EUP{file_type}{month}.txt"
+        for month in ("1801", "1802")
+        for file_type in "FHOQ"
+    ]
+
+@pytest.fixture
+def clear_header_cache():
+    yield
+    read_header.cache_clear()
+
+
+def test_resolution_order():
+    assert RESOLUTION_ORDER == ("O", "F", "Q", "H")
+
+
+class TestReconcile(object):
+    def test_all_elements(self, paths):
+        selections = reconcile(paths[:4], header_reader=fake_reader)
+        assert selections == [
+            Selection(f"{ARCHIVE}/EUPO1801.txt", "O", ["1001", "2011"]),
+            Selection(f"{ARCHIVE}/EUPF1801.txt", "F", ["3001"]),
+            Selection(f"{ARCHIVE}/EUPH1801.txt", "H", ["9301"]),
+        ]
+
+    def test_selected_elements(self, paths):
+        selections = reconcile(paths, ["3001", "4001"], header_reader=fake_reader)
+        assert selections == [
+            Selection(f"{ARCHIVE}/EUPF1801.txt", "F", ["3001"]),
+            Selection(f"{ARCHIVE}/EUPF1802.txt", "F", ["3001"]),
+        ]
+        assert selections[0].columns == ["3001", "3001_FLAG"]
+
+    def test_reads_only_needed_headers(self, paths):
+        read = []
+
+        def reader(path):
+            read.append(path)
+            return fake_reader(path)
+
+        reconcile(paths[:4], ["1001"], header_reader=reader)
+        assert read == [f"{ARCHIVE}/EUPO1801.txt"]
+
+    def test_urls(self, paths):
+        urls = [f"{BASE_URL}/{path}" for path in paths[:4]]
+        assert reconcile(urls, header_reader=fake_reader) == reconcile(
+            paths[:4], header_reader=fake_reader
+        )
+
+
+@pytest.mark.usefixtures("clear_header_cache", "clear_response_cache")
+class TestMocked(object):
+    @responses.activate
+    def test_read_header(self):
+        path = f"{ARCHIVE}/EUPH1801.txt"
+        body = f"{make_header(['1001'])}\n1\t100\t0\t11\n"
+        responses.add(responses.GET, f"{BASE_URL}/{path}", body=body)
+
+        columns = ["doy", "ending_time", "1001", "1001_FLAG"]
+        assert read_header(path) == (94255, 2018, columns)
+        # Headers are cached.
+        read_header(path)
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_read_header_throttled(self, monkeypatch):
+        throttle = RecordingThrottle()
+        monkeypatch.setattr(solardat.http, "_throttle", throttle)
+        path = f"{ARCHIVE}/EUPH1801.txt"
+        url = f"{BASE_URL}/{path}"
+        responses.add(responses.GET, url, status=503, headers={"Retry-After": "0"})
+        responses.add(responses.GET, url, body=f"{make_header(['1001'])}\n")
+
+        assert read_header(path)[0] == 94255
+        # The failed attempt is retried, and both go through the throttle.
+        assert throttle.outcomes == [False, True]
+        assert throttle.active == 0
+
+    @responses.activate
+    def test_fetch_reconciled(self, archival_data):
+        path_o = f"{ARCHIVE}/SIRO1604.txt"
+        path_h = f"{ARCHIVE}/SIRH1604.txt"
+        responses.add(responses.GET, f"{BASE_URL}/{path_o}", body=archival_data)
+        hourly = f"{make_header(['1001', '9999'], 94249, 2016)}\n92\t100\t0\t11\t1\t11\n"
+        responses.add(responses.GET, f"{BASE_URL}/{path_h}", body=hourly)
+
+        results = list(fetch_reconciled([path_o, path_h], ["1001", "9999"], period="Q"))
+        (selection_o, station_id, columns_o), (selection_h, _, columns_h) = results
+
+        assert selection_o.elements == ["1001"]
+        assert station_id == 94249
+        assert list(columns_o)[:2] == ["ending_time", "1001_mean"]
+        assert len(columns_o["ending_time"]) == 7
+        assert selection_h.elements == ["9999"]
+        assert list(columns_h["9999_mean"]) == [1.]
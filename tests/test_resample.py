@@ -0,0 +1,129 @@
+from array import array
+from datetime import datetime, timedelta
+from io import StringIO
+import math
+import pytest
+
+from solardat.decode import (
+    columns_to_rows,
+    iter_archival,
+    parse_columns,
+    to_timestamp,
+)
+from solardat.resample import (
+    period_seconds,
+    resample_columns,
+    resample_rows,
+    window_end,
+)
+
+
+START = datetime(2018, 1, 1)
+
+
+def make_rows(values, flags):
+    return [
+        {
+            "ending_time": START + timedelta(minutes=i + 1),
+            "1001": value,
+            "1001_FLAG": flag,
+        }
+        for i, (value, flag) in enumerate(zip(values, flags))
+    ]
+
+def assert_rows_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for row, expected_row in zip(actual, expected):
+        assert list(row) == list(expected_row)
+        for key, value in row.items():
+            if not isinstance(value, float):
+                assert value == expected_row[key]
+            elif math.isnan(value):
+                assert math.isnan(expected_row[key])
+            else:
+                assert value == pytest.approx(expected_row[key])
+
+
+def test_period_seconds():
+    assert period_seconds("F") == 300
+    assert period_seconds(timedelta(days=1)) == 86400
+    with pytest.raises(ValueError):
+        period_seconds("X")
+    with pytest.raises(ValueError):
+        period_seconds(timedelta(0))
+
+def test_window_end():
+    assert window_end(1, 60) == 60
+    assert window_end(60, 60) == 60
+    assert window_end(61, 60) == 120
+
+
+class TestResampleRows(object):
+    def test_aggregates(self):
+        rows = make_rows([1., 2., 3., 4., 5.], [11, 99, 11, 11, 11])
+
+        resampled = list(resample_rows(rows, timedelta(minutes=3)))
+        expected = [
+            {
+                "ending_time": START + timedelta(minutes=3),
+                "1001_mean": 2.,
+                "1001_sum": 4.,
+                "1001_min": 1.,
+                "1001_max": 3.,
+                "1001_count": 2,
+                "1001_good_fraction": 2 / 3,
+            },
+            {
+                "ending_time": START + timedelta(minutes=6),
+                "1001_mean": 4.5,
+                "1001_sum": 9.,
+                "1001_min": 4.,
+                "1001_max": 5.,
+                "1001_count": 2,
+                "1001_good_fraction": 1.,
+            },
+        ]
+        assert_rows_equal(resampled, expected)
+
+    def test_all_bad(self):
+        rows = make_rows([1., 2.], [99, 99])
+
+        row, = resample_rows(rows, "F", ["mean", "count", "good_fraction"])
+        assert math.isnan(row["1001_mean"])
+        assert row["1001_count"] == 0
+        assert row["1001_good_fraction"] == 0.
+
+    def test_lazy(self):
+        def rows():
+            yield from make_rows([1.] * 6, [11] * 6)
+            raise AssertionError("Consumed too far")
+
+        resampled = resample_rows(rows(), timedelta(minutes=2))
+        assert next(resampled)["1001_count"] == 2
+
+    def test_unknown_statistic(self):
+        with pytest.raises(ValueError):
+            list(resample_rows([], "H", ["median"]))
+
+
+class TestResampleColumns(object):
+    def test_matches_rows(self, archival_data):
+        with StringIO(archival_data) as buffer:
+            _, columns = parse_columns(buffer)
+        with StringIO(archival_data) as buffer:
+            _, rows = iter_archival(buffer)
+            expected = list(resample_rows(rows, "Q"))
+
+        resampled = resample_columns(columns, "Q")
+        assert len(resampled["ending_time"]) == len(expected)
+        assert_rows_equal(columns_to_rows(resampled), expected)
+
+    def test_without_flags(self):
+        rows = make_rows([1., 2., 3.], [99, 99, 99])
+        columns = {
+            "ending_time": array("q", [to_timestamp(row["ending_time"]) for row in rows]),
+            "1001": array("d", [row["1001"] for row in rows]),
+        }
+
+        resampled = resample_columns(columns, "H", ["count"])
+        assert resampled["1001_count"] == array("q", [3])
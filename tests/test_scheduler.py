@@ -0,0 +1,148 @@
+from aioresponses import aioresponses
+import aiohttp
+import asyncio
+import pytest
+
+from solardat import async_fetch
+from solardat.http import BASE_URL
+from solardat.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    SIZE_ORDER,
+    FetchScheduler,
+    job_key,
+)
+from solardat.throttle import AdaptiveLimit, AsyncThrottle
+
+
+def path(stem):
+    return f"download/Archive/{stem}.txt"
+
+
+class FakeFetch(object):
+    """Record fetched paths, holding each fetch until released."""
+
+    def __init__(self):
+        self.fetched = []
+        self.urgent = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, session, path, urgent=False):
+        self.fetched.append(path)
+        self.urgent.append(urgent)
+        await self.release.wait()
+        if "missing" in path:
+            raise KeyError(path)
+        return 94255, [path]
+
+
+def test_size_order():
+    assert SIZE_ORDER == ("H", "Q", "F", "O")
+
+@pytest.mark.parametrize("stem, expected", [
+    ("EUPH1801", ("EUP", 0)),
+    ("SIRO1604", ("SIR", 3)),
+    ("missing", ("", 4)),
+])
+def test_job_key(stem, expected):
+    assert job_key(path(stem)) == expected
+
+
+@pytest.mark.asyncio
+class TestFetchScheduler(object):
+    async def test_order(self):
+        fetch = FakeFetch()
+        fetch.release.set()
+        async with FetchScheduler(None, workers=1, reserved=0, fetch=fetch) as scheduler:
+            stems = ["EUPO1801", "EUPH1801", "EUPQ1801", "SIRO1801", "SIRF1801"]
+            futures = [scheduler.submit(path(stem), BACKGROUND) for stem in stems]
+            futures.append(scheduler.submit(path("BUPO1801"), INTERACTIVE))
+            await asyncio.gather(*futures)
+
+        # Interactive first, then round robin over stations, smallest
+        # files first.
+        expected = ["BUPO1801", "EUPH1801", "SIRF1801", "EUPQ1801", "SIRO1801",
+                    "EUPO1801"]
+        assert fetch.fetched == [path(stem) for stem in expected]
+
+    async def test_results(self):
+        fetch = FakeFetch()
+        fetch.release.set()
+        async with FetchScheduler(None, workers=2, fetch=fetch) as scheduler:
+            found = scheduler.submit(path("EUPH1801"))
+            missing = scheduler.submit(path("missing"))
+            assert await found == (94255, [path("EUPH1801")])
+            with pytest.raises(KeyError):
+                await missing
+
+    async def test_reserved_worker(self):
+        fetch = FakeFetch()
+        async with FetchScheduler(None, workers=2, reserved=1, fetch=fetch) as scheduler:
+            backfill = [scheduler.submit(path(f"EUPO18{month:02d}")) for month in (1, 2)]
+            await asyncio.sleep(0)
+            # Only one worker runs background fetches.
+            assert fetch.fetched == [path("EUPO1801")]
+
+            interactive = scheduler.submit(path("SIRH1801"), INTERACTIVE)
+            await asyncio.sleep(0)
+            assert fetch.fetched[-1] == path("SIRH1801")
+            assert fetch.urgent == [False, True]
+
+            fetch.release.set()
+            await asyncio.gather(interactive, *backfill)
+
+    async def test_saturated_throttle(self, monkeypatch, archival_data):
+        throttle = AsyncThrottle(limit=AdaptiveLimit(initial=1, maximum=1))
+        monkeypatch.setattr(async_fetch, "_throttle", throttle)
+        # A backfill download holds the only request slot.
+        await throttle.acquire()
+
+        async with FetchScheduler(None, workers=2, reserved=1) as scheduler:
+            with aioresponses() as mocked:
+                mocked.get(f"{BASE_URL}/{path('SIRO1604')}", body=archival_data)
+                mocked.get(f"{BASE_URL}/{path('SIRO1605')}", body=archival_data)
+                async with aiohttp.ClientSession() as session:
+                    scheduler.session = session
+                    backfill = scheduler.submit(path("SIRO1604"))
+                    interactive = scheduler.submit(path("SIRO1605"), INTERACTIVE)
+                    station_id, rows = await asyncio.wait_for(interactive, 5)
+                    assert station_id == 94249
+                    assert not backfill.done()
+
+                    await throttle.release(True)
+                    await asyncio.wait_for(backfill, 5)
+
+    async def test_cancelled(self):
+        fetch = FakeFetch()
+        async with FetchScheduler(None, workers=1, reserved=0, fetch=fetch) as scheduler:
+            first = scheduler.submit(path("EUPH1801"))
+            second = scheduler.submit(path("EUPH1802"))
+            third = scheduler.submit(path("EUPH1803"))
+            await asyncio.sleep(0)
+            second.cancel()
+            fetch.release.set()
+            await asyncio.gather(first, third)
+
+        assert path("EUPH1802") not in fetch.fetched
+
+    async def test_close_cancels_pending(self):
+        fetch = FakeFetch()
+        scheduler = FetchScheduler(None, workers=1, reserved=0, fetch=fetch)
+        scheduler.start()
+        running = scheduler.submit(path("EUPH1801"))
+        pending = scheduler.submit(path("EUPH1802"))
+        await asyncio.sleep(0)
+        await scheduler.close()
+        assert running.cancelled()
+        assert pending.cancelled()
+        assert len(scheduler) == 0
+
+    async def test_validates(self):
+        with pytest.raises(ValueError):
+            FetchScheduler(None, workers=1, reserved=1)
+        scheduler = FetchScheduler(None)
+        with pytest.raises(RuntimeError):
+            scheduler.submit(path("EUPH1801"))
+        async with scheduler:
+            with pytest.raises(ValueError):
+                scheduler.submit(path("EUPH1801"), priority=5)
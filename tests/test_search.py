@@ -1,4 +1,6 @@
+from collections import defaultdict
 from datetime import date
+from lxml import html
 import pytest
 import responses
 
@@ -26,6 +28,26 @@ def search_results_page():
         content = fh.read().encode()
     return content
 
+def reference_rel_links(page):
+    # Parses the whole page before walking the results table.
+    tree = html.fromstring(page)
+    table_xpath = '//table[@border="1" and @cellspacing="0" and @cellpadding="2"]'
+    subheading_xpath = 'td[@align="CENTER" and @colspan="3"]'
+
+    all_links = defaultdict(list)
+    station = None
+    for row in tree.xpath(table_xpath)[0]:
+        subheadings = row.xpath(subheading_xpath)
+        if subheadings:
+            station = subheadings[0][0].text
+            continue
+        if station is None:
+            continue
+        for _, _, link, _ in row.iterlinks():
+            if is_download_url(link):
+                all_links[station].append(link)
+    return dict(all_links)
+
 
 @pytest.mark.usefixtures("clear_response_cache")
 class TestStations(object):
@@ -104,6 +126,19 @@ class TestArchivalSearch(object):
         links = extract_rel_links(search_results_page)
         assert links == expected
 
+    def test_extracts_large_page(self, search_results_page):
+        # Repeat the station blocks of the results table.
+        start = search_results_page.rindex(
+            b"<tr>", 0, search_results_page.index(b'<td colspan="3"')
+        )
+        end = search_results_page.index(b"</table>\n</table>")
+        blocks = search_results_page[start:end] * 50
+        page = b"".join([search_results_page[:start], blocks, search_results_page[end:]])
+
+        links = extract_rel_links(page)
+        assert links == reference_rel_links(page)
+        assert len(links["Eugene, OR"]) == 3 * 50
+
     def test_extracts_raises_if_no_table(self):
         content = b"<html><body><p>Hi</p></body></html>"
         with pytest.raises(RuntimeError):
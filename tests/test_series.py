@@ -0,0 +1,102 @@
+from array import array
+from datetime import datetime
+from io import StringIO
+import pytest
+
+from solardat.decode import columns_to_rows, parse_columns, to_timestamp
+from solardat.series import TimeSeries, read_series, read_station_series
+
+
+START = datetime(2016, 4, 1, 0, 10)
+END = datetime(2016, 4, 1, 0, 20)
+
+
+@pytest.fixture
+def columns(archival_data):
+    with StringIO(archival_data) as buffer:
+        _, columns = parse_columns(buffer)
+    return columns
+
+@pytest.fixture
+def series(columns):
+    return TimeSeries(94249, columns)
+
+def shifted(columns, seconds):
+    out = dict(columns)
+    out["ending_time"] = array("q", [time + seconds for time in columns["ending_time"]])
+    return out
+
+
+class TestTimeSeries(object):
+    def test_unordered(self):
+        with pytest.raises(ValueError):
+            TimeSeries(94249, {"ending_time": array("q", [120, 60])})
+
+    def test_bounds(self, series):
+        assert len(series) == 100
+        assert series.first == datetime(2016, 4, 1, 0, 1)
+        assert series.last == datetime(2016, 4, 1, 1, 40)
+        assert TimeSeries(1, {"ending_time": array("q")}).first is None
+
+    def test_window(self, series, columns):
+        window = series.window(START, END, ["1001"])
+        assert list(window) == ["ending_time", "1001"]
+        assert isinstance(window["1001"], memoryview)
+        assert window["ending_time"].tolist() == list(range(
+            to_timestamp(START), to_timestamp(END) + 1, 60,
+        ))
+        assert window["1001"].tolist() == columns["1001"][9:20].tolist()
+
+    def test_window_is_view(self, series):
+        window = series.window(START, END)
+        series.columns["1001"][9] = 123.
+        assert window["1001"][0] == 123.
+
+    def test_window_outside(self, series):
+        window = series.window(datetime(2017, 1, 1), datetime(2017, 2, 1))
+        assert len(window["ending_time"]) == 0
+        window = series.window(END, START)
+        assert len(window["ending_time"]) == 0
+
+    def test_rows(self, series, columns):
+        rows = series.rows(START, END)
+        assert rows == columns_to_rows(columns)[9:20]
+        from_rows = TimeSeries.from_rows(94249, rows)
+        assert from_rows.columns == series.slice(START, END).columns
+
+
+class TestConcat(object):
+    def test_joins(self, columns):
+        later = TimeSeries(94249, shifted(columns, 3600 * 24))
+        earlier = TimeSeries(94249, columns)
+
+        joined = TimeSeries.concat([later, earlier])
+        assert len(joined) == 200
+        assert joined.first == earlier.first
+        assert joined.last == later.last
+        window = joined.window(earlier.last, later.first)
+        assert len(window["ending_time"]) == 2
+
+    def test_overlap(self, columns):
+        with pytest.raises(ValueError):
+            TimeSeries.concat([
+                TimeSeries(94249, columns),
+                TimeSeries(94249, shifted(columns, 60)),
+            ])
+
+    def test_mismatch(self, columns):
+        other = TimeSeries(94255, shifted(columns, 3600 * 24))
+        with pytest.raises(ValueError):
+            TimeSeries.concat([TimeSeries(94249, columns), other])
+
+
+def test_read_series(tmp_path, archival_data):
+    path = tmp_path / "SIRO1604.txt"
+    path.write_text(archival_data)
+
+    series = read_series(path, ["1001"])
+    assert series.station_id == 94249
+    assert list(series.columns) == ["ending_time", "1001"]
+
+    joined = read_station_series([path], ["1001"])
+    assert joined.columns == series.columns
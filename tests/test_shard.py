@@ -0,0 +1,96 @@
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from threading import Thread
+import multiprocessing
+import os
+import pytest
+
+import solardat.http
+from solardat.shard import (
+    fetch_sharded,
+    merge_catalogs,
+    partition,
+    run_shard,
+    shard_catalog_name,
+)
+from solardat.store import CATALOG_NAME, ColumnStore
+
+
+PATHS = [
+    "download/Archive/SIRF1604.txt",
+    "download/Archive/SIRO1604.txt",
+    "download/Archive/SIRQ1604.txt",
+]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serve the server's directory, as `directory` requires Python 3.7."""
+
+    def translate_path(self, path):
+        relative = os.path.relpath(super().translate_path(path), os.getcwd())
+        return os.path.join(self.server.directory, relative)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def archive_server(tmp_path, archival_data, monkeypatch):
+    served = tmp_path / "served"
+    for path in PATHS:
+        file = served / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(archival_data)
+
+    server = HTTPServer(("127.0.0.1", 0), QuietHandler)
+    server.directory = str(served)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(solardat.http, "BASE_URL", base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_partition():
+    paths = [f"download/Archive/EUPO18{month:02d}.txt" for month in range(1, 8)]
+    shards = partition(reversed(paths), 3)
+    assert shards == [paths[0::3], paths[1::3], paths[2::3]]
+    assert partition(paths[:1], 2) == [paths[:1], []]
+
+    with pytest.raises(ValueError):
+        partition(paths, 0)
+
+def test_run_shard(archive_server, tmp_path):
+    root = tmp_path / "store"
+    result = run_shard(1, [PATHS[0], "download/Archive/SIRH1604.txt"], root)
+
+    assert result.written == [PATHS[0]]
+    assert list(result.failed) == ["download/Archive/SIRH1604.txt"]
+    assert "404" in result.failed["download/Archive/SIRH1604.txt"]
+    store = ColumnStore(root, shard_catalog_name(1))
+    assert list(store.partitions) == ["94249/2016/04/SIRF"]
+
+def test_merge_catalogs(archive_server, tmp_path):
+    root = tmp_path / "store"
+    run_shard(0, PATHS[:1], root)
+    run_shard(1, PATHS[1:], root)
+
+    store = merge_catalogs(root, range(2))
+    assert len(store.partitions) == 3
+    assert not (root / shard_catalog_name(0)).exists()
+    assert ColumnStore(root).partitions == store.partitions
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="Worker processes must inherit the patched base URL",
+)
+def test_fetch_sharded(archive_server, tmp_path):
+    root = tmp_path / "store"
+    result = fetch_sharded(PATHS, root, processes=2)
+
+    assert result.written == PATHS
+    assert not result.failed
+    store = ColumnStore(root)
+    assert len(store.partitions) == 3
+    assert len(store.read(94249, ["1001"], file_type="Q")["1001"]) == 100
+    assert [path.name for path in root.glob("*.json")] == [CATALOG_NAME]
@@ -0,0 +1,70 @@
+from datetime import datetime
+import sqlite3
+import pytest
+
+from solardat.decode import read_raw
+from solardat.sqlite import DEFAULT_TABLE, SQLiteSink, load
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def rows(archival_data):
+    _, rows = read_raw(archival_data)
+    return rows
+
+
+class TestSQLiteSink(object):
+    def test_write(self, connection, rows):
+        sink = SQLiteSink(connection, batch_size=30)
+
+        n_rows = sink.write("SIRO1604", 94249, iter(rows))
+        assert n_rows == 100
+
+        out = connection.execute(
+            f'SELECT filestem, station_id, ending_time, "1001", "1001_FLAG" '
+            f"FROM {DEFAULT_TABLE} ORDER BY ending_time LIMIT 1"
+        ).fetchone()
+        first = rows[0]
+        assert out == (
+            "SIRO1604",
+            94249,
+            first["ending_time"].isoformat(" "),
+            first["1001"],
+            first["1001_FLAG"],
+        )
+
+    def test_write_empty(self, connection):
+        sink = SQLiteSink(connection)
+        assert sink.write("SIRO1604", 94249, []) == 0
+
+    def test_adds_columns(self, connection):
+        sink = SQLiteSink(connection)
+        time = datetime(2016, 4, 1)
+        sink.write("A", 1, [{"ending_time": time, "1001": 1.0, "1001_FLAG": 11}])
+        sink.write("B", 2, [{"ending_time": time, "2011": 2.0, "2011_FLAG": 12}])
+
+        out = connection.execute(
+            f'SELECT "1001", "2011" FROM {DEFAULT_TABLE} ORDER BY station_id'
+        ).fetchall()
+        assert out == [(1.0, None), (None, 2.0)]
+
+    def test_creates_index_on_exit(self, connection, rows):
+        with SQLiteSink(connection) as sink:
+            sink.write("SIRO1604", 94249, rows)
+
+        indexes = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).fetchall()
+        assert indexes == [(f"{DEFAULT_TABLE}_station_time",)]
+
+def test_load(connection, rows):
+    results = [("SIRO1604", 94249, iter(rows)), ("SIRO1605", 94249, iter(rows))]
+
+    assert load(connection, results) == 200
+    count, = connection.execute(f"SELECT COUNT(*) FROM {DEFAULT_TABLE}").fetchone()
+    assert count == 200
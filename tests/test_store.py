@@ -0,0 +1,92 @@
+from datetime import datetime
+from io import StringIO
+import pytest
+
+from solardat.decode import from_timestamp, parse_columns
+from solardat.store import CATALOG_NAME, ColumnStore
+
+
+@pytest.fixture
+def columns(archival_data):
+    with StringIO(archival_data) as buffer:
+        _, columns = parse_columns(buffer)
+    return columns
+
+@pytest.fixture
+def store(tmp_path, columns):
+    store = ColumnStore(tmp_path)
+    store.write("SIRO1604", 94249, columns)
+    store.save()
+    return store
+
+
+class TestColumnStore(object):
+    def test_write(self, store, tmp_path):
+        partition, = store.partitions.values()
+        assert partition.key == "94249/2016/04/SIRO"
+        assert partition.n_rows == 100
+        assert (tmp_path / "94249/2016/04/SIRO/1001_FLAG.bin").exists()
+
+    def test_rewrite_removes_columns(self, store, columns, tmp_path):
+        partial = {name: values for name, values in columns.items() if name != "9301"}
+        store.write("SIRO1604", 94249, partial)
+        assert not (tmp_path / "94249/2016/04/SIRO/9301.bin").exists()
+        assert (tmp_path / "94249/2016/04/SIRO/1001.bin").exists()
+
+    def test_prefixes(self, store, columns):
+        partial = {name: values for name, values in columns.items() if name != "9301"}
+        store.write("SIXO1604", 94249, partial)
+        assert len(store.partitions) == 2
+        with pytest.raises(ValueError):
+            store.read(94249, ["1001"])
+        out = store.read(94249, ["9301"], prefix="SIR")
+        assert out["9301"] == columns["9301"]
+
+    def test_reloads_catalog(self, store, tmp_path):
+        reloaded = ColumnStore(tmp_path)
+        assert reloaded.partitions == store.partitions
+        assert (tmp_path / CATALOG_NAME).exists()
+
+    def test_open_column(self, store, columns):
+        partition, = store.partitions.values()
+        view = store.open_column(partition, "1001_FLAG")
+        assert view.tolist() == columns["1001_FLAG"].tolist()
+
+    def test_read(self, store, columns):
+        out = store.read(94249, ["9301", "1001_FLAG"])
+        assert list(out) == ["ending_time", "9301", "1001_FLAG"]
+        for name, values in out.items():
+            assert values == columns[name]
+
+    def test_read_interval(self, store, columns):
+        times = list(map(from_timestamp, columns["ending_time"]))
+        start, end = times[10], times[19]
+
+        out = store.read(94249, ["9301"], start=start, end=end)
+        assert list(map(from_timestamp, out["ending_time"])) == times[10:20]
+        assert out["9301"] == columns["9301"][10:20]
+
+    @pytest.mark.parametrize("kwds", [
+        {"station_id": 1},
+        {"station_id": 94249, "file_type": "H"},
+        {"station_id": 94249, "start": datetime(2016, 5, 1)},
+    ], ids=["station", "file type", "interval"])
+    def test_find_partitions_excludes(self, store, kwds):
+        assert store.find_partitions(**kwds) == []
+
+    def test_read_missing_column(self, store):
+        with pytest.raises(KeyError):
+            store.read(94249, ["1000"])
+
+    def test_read_partly_missing_column(self, store, columns):
+        partial = {name: values for name, values in columns.items() if name != "9301"}
+        store.write("SIRO1605", 94249, partial)
+        with pytest.raises(KeyError, match="SIRO1605"):
+            store.read(94249, ["9301"])
+
+    def test_read_requires_file_type(self, store, columns):
+        store.write("SIRH1604", 94249, columns)
+        with pytest.raises(ValueError):
+            store.read(94249, ["9301"])
+        out = store.read(94249, ["9301"], file_type="O")
+        assert out["9301"] == columns["9301"]
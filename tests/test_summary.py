@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import math
+import statistics
+import pytest
+
+from solardat.summary import (
+    ElementSummary,
+    merge_summaries,
+    summarize_file,
+    summarize_rows,
+)
+
+
+START = datetime(2018, 1, 1)
+
+
+def make_rows(values, flags, start=START):
+    return [
+        {
+            "ending_time": start + timedelta(minutes=i + 1),
+            "1001": value,
+            "1001_FLAG": flag,
+        }
+        for i, (value, flag) in enumerate(zip(values, flags))
+    ]
+
+
+class TestSummarizeRows(object):
+    def test_summarizes(self):
+        rows = make_rows([1., 2., -99999., 4., 100.], [11, 12, 99, 11, 13])
+
+        summary = summarize_rows(rows, bad_flags={13, 99})["1001"]
+        assert summary.count == 3
+        assert summary.missing == 1
+        assert summary.bad == 1
+        assert summary.samples == 5
+        assert summary.minimum == 1.
+        assert summary.maximum == 4.
+        assert summary.mean == pytest.approx(statistics.mean([1., 2., 4.]))
+        assert summary.variance == pytest.approx(statistics.variance([1., 2., 4.]))
+        assert summary.first == START + timedelta(minutes=1)
+        assert summary.last == START + timedelta(minutes=5)
+
+    def test_lazy_input(self):
+        rows = iter(make_rows([1., 2.], [11, 11]))
+        assert summarize_rows(rows)["1001"].count == 2
+
+    def test_no_good_samples(self):
+        summary = summarize_rows(make_rows([-99999.], [99]))["1001"]
+        values = summary.to_dict()
+        assert values["count"] == 0
+        assert math.isnan(values["mean"])
+        assert math.isnan(values["variance"])
+
+
+class TestMerge(object):
+    def test_matches_single_pass(self):
+        values = [0.5 * i * i for i in range(20)]
+        flags = [99 if i % 7 == 0 else 11 for i in range(20)]
+        rows = make_rows(values, flags)
+
+        expected = summarize_rows(rows)["1001"]
+        merged = merge_summaries([
+            summarize_rows(rows[:6]),
+            summarize_rows(rows[6:13]),
+            summarize_rows(rows[13:]),
+        ])["1001"]
+
+        assert merged.count == expected.count
+        assert merged.missing == expected.missing
+        assert merged.mean == pytest.approx(expected.mean)
+        assert merged.variance == pytest.approx(expected.variance)
+        assert (merged.minimum, merged.maximum) == (expected.minimum, expected.maximum)
+        assert (merged.first, merged.last) == (expected.first, expected.last)
+
+    def test_empty(self):
+        merged = ElementSummary().merge(ElementSummary())
+        assert merged.samples == 0
+        assert merged.first is None
+
+
+def test_summarize_file(tmp_path, archival_data):
+    path = tmp_path / "SIRO1604.txt"
+    path.write_text(archival_data)
+
+    station_id, summaries = summarize_file(path)
+    assert station_id == 94249
+    assert list(summaries) == ["1001", "2011", "3001", "1961", "9301"]
+    assert summaries["1001"].count == 100
@@ -0,0 +1,139 @@
+import json
+import pytest
+import threading
+
+import solardat.sync
+from solardat.files import write_atomic
+from solardat.http import BASE_URL
+from solardat.sync import (
+    MANIFEST_NAME,
+    Manifest,
+    ManifestEntry,
+    local_path,
+    sync_files,
+)
+
+
+def test_local_path(tmp_path):
+    out = local_path(tmp_path, f"{BASE_URL}/download/Archive/EUPQ1801.txt")
+    assert out == tmp_path / "EUP" / "EUPQ1801.txt"
+
+class TestManifest(object):
+    def test_round_trips(self, tmp_path):
+        manifest = Manifest(tmp_path / MANIFEST_NAME)
+        manifest["download/Archive/EUPQ1801.txt"] = ManifestEntry("etag", 10, 1.5)
+        manifest.save()
+
+        loaded = Manifest.load(tmp_path / MANIFEST_NAME)
+        assert loaded.entries == manifest.entries
+
+    def test_load_missing(self, tmp_path):
+        manifest = Manifest.load(tmp_path / MANIFEST_NAME)
+        assert len(manifest) == 0
+
+@pytest.mark.asyncio
+class TestSyncFiles(object):
+    paths = (
+        "download/Archive/SIRF1601.txt",
+        "download/Archive/SIRF1602.txt",
+    )
+
+    async def test_fetches_new(self, mock_rsps, session, archival_data, tmp_path):
+        for path in self.paths:
+            mock_rsps.get(
+                f"{BASE_URL}/{path}", body=archival_data, headers={"ETag": path}
+            )
+
+        result = await sync_files(session, self.paths, tmp_path)
+        assert sorted(result.fetched) == list(self.paths)
+        assert not result.unchanged
+        assert not result.failed
+
+        manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+        assert set(manifest) == set(self.paths)
+        for path in self.paths:
+            file = local_path(tmp_path, path)
+            assert file.read_text() == archival_data
+            assert manifest[path]["etag"] == path
+            assert manifest[path]["size"] == file.stat().st_size
+
+    async def test_revalidates(self, mock_rsps, session, archival_data, tmp_path):
+        path = self.paths[0]
+        url = f"{BASE_URL}/{path}"
+        mock_rsps.get(url, body=archival_data, headers={"ETag": "etag"})
+        await sync_files(session, [path], tmp_path)
+
+        sent_headers = []
+
+        def callback(url, **kwds):
+            sent_headers.append(kwds["headers"])
+
+        mock_rsps.get(url, status=304, callback=callback)
+        result = await sync_files(session, [path], tmp_path)
+        assert result.unchanged == [path]
+        assert sent_headers == [{"If-None-Match": "etag"}]
+
+    async def test_skips_fresh(self, mock_rsps, session, archival_data, tmp_path):
+        path = self.paths[0]
+        mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data)
+        await sync_files(session, [path], tmp_path)
+
+        # No response is registered, so a request would fail.
+        result = await sync_files(session, [path], tmp_path, max_age=60)
+        assert result.unchanged == [path]
+
+    async def test_reports_progress(self, mock_rsps, session, archival_data, tmp_path):
+        path = self.paths[0]
+        mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data)
+
+        reported = []
+        await sync_files(
+            session, [path], tmp_path, progress=lambda *args: reported.append(args)
+        )
+        await sync_files(
+            session,
+            [path],
+            tmp_path,
+            max_age=60,
+            progress=lambda *args: reported.append(args),
+        )
+        assert reported == [(path, archival_data.encode()), (path, None)]
+
+    async def test_collects_failures(self, mock_rsps, session, archival_data, tmp_path):
+        good, bad = self.paths
+        mock_rsps.get(f"{BASE_URL}/{good}", body=archival_data)
+        mock_rsps.get(f"{BASE_URL}/{bad}", status=404)
+
+        result = await sync_files(session, self.paths, tmp_path)
+        assert result.fetched == [good]
+        assert list(result.failed) == [bad]
+        assert good in Manifest.load(tmp_path / MANIFEST_NAME)
+
+    async def test_retries(self, mock_rsps, session, archival_data, tmp_path):
+        path = self.paths[0]
+        mock_rsps.get(f"{BASE_URL}/{path}", status=503, headers={"Retry-After": "0"})
+        mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data)
+
+        result = await sync_files(session, [path], tmp_path)
+        assert result.fetched == [path]
+        assert not result.failed
+
+    async def test_writes_off_loop(
+        self, mock_rsps, session, archival_data, tmp_path, monkeypatch
+    ):
+        threads = []
+
+        def write(file, content):
+            threads.append(threading.current_thread())
+            write_atomic(file, content)
+
+        monkeypatch.setattr(solardat.sync, "write_atomic", write)
+        monkeypatch.setattr(solardat.sync, "SAVE_EVERY", 1)
+        for path in self.paths:
+            mock_rsps.get(f"{BASE_URL}/{path}", body=archival_data)
+
+        await sync_files(session, self.paths, tmp_path)
+        # The files and the manifest saved as each completes are written
+        # in threads, and the manifest is saved once more at the end.
+        assert len(threads) == 5
+        assert threading.main_thread() not in threads[:4]
@@ -0,0 +1,234 @@
+import asyncio
+import pytest
+
+from solardat.throttle import (
+    DEFAULT_MAX_BACKOFF,
+    AdaptiveLimit,
+    AsyncThrottle,
+    Throttle,
+    TokenBucket,
+    backoff,
+    retry,
+    retry_after,
+    retry_async,
+)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("attempt, bound", [(1, 0.5), (2, 1.), (4, 4.), (20, 30.)])
+def test_backoff(attempt, bound):
+    assert backoff(attempt, rand=lambda lo, hi: hi) == bound
+    assert 0 <= backoff(attempt) <= bound
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"Retry-After": "2"}, 2.),
+    ({"Retry-After": "-1"}, 0.),
+    ({"Retry-After": "86400"}, DEFAULT_MAX_BACKOFF),
+    ({"Retry-After": "nan"}, 0.),
+    ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, None),
+    ({}, None),
+    (None, None),
+])
+def test_retry_after(headers, expected):
+    assert retry_after(headers) == expected
+
+
+class TestTokenBucket(object):
+    def test_burst(self):
+        clock = Clock()
+        bucket = TokenBucket(rate=2., burst=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5
+        assert bucket.reserve() == 1.
+
+    def test_refills(self):
+        clock = Clock()
+        bucket = TokenBucket(rate=2., burst=2, clock=clock)
+        bucket.reserve()
+        bucket.reserve()
+        clock.now += 10
+        # Up to the burst size.
+        assert [bucket.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+    @pytest.mark.parametrize("rate, burst", [(0, 1), (1, 0)])
+    def test_validates(self, rate, burst):
+        with pytest.raises(ValueError):
+            TokenBucket(rate, burst)
+
+
+class TestAdaptiveLimit(object):
+    def test_increases(self):
+        limit = AdaptiveLimit(initial=4, maximum=6, clock=Clock())
+        # About one per round trip of `limit` requests.
+        for _ in range(4):
+            limit.success(1.)
+        assert limit.limit == 4
+        limit.success(1.)
+        assert limit.limit == 5
+        for _ in range(100):
+            limit.success(1.)
+        assert limit.limit == 6
+
+    def test_decreases_on_failure(self):
+        clock = Clock()
+        limit = AdaptiveLimit(initial=16, clock=clock)
+        limit.success(1.)
+        limit.failure()
+        assert limit.limit == 8
+        # Once per round trip.
+        limit.failure()
+        assert limit.limit == 8
+        clock.now += 2
+        limit.failure()
+        assert limit.limit == 4
+
+    def test_decreases_on_latency_spike(self):
+        limit = AdaptiveLimit(initial=16, clock=Clock())
+        limit.success(1.)
+        limit.success(2.)
+        assert limit.limit == 16
+        limit.success(10.)
+        assert limit.limit == 8
+        # Spikes are still averaged.
+        assert limit.latency == pytest.approx(1.99)
+
+    def test_recovers_from_lasting_latency_change(self):
+        clock = Clock()
+        limit = AdaptiveLimit(initial=8, clock=clock)
+        for latency in [0.1] * 50 + [1.] * 500:
+            clock.now += latency
+            limit.success(latency)
+
+        assert limit.latency == pytest.approx(1.)
+        assert limit.limit > 8
+
+    def test_without_latency(self):
+        limit = AdaptiveLimit(initial=4, clock=Clock())
+        limit.success(1.)
+        for _ in range(5):
+            limit.success()
+        assert limit.limit == 5
+        assert limit.latency == 1.
+
+    def test_minimum(self):
+        clock = Clock()
+        limit = AdaptiveLimit(initial=2, minimum=2, clock=clock)
+        limit.failure()
+        assert limit.limit == 2
+
+    def test_validates(self):
+        with pytest.raises(ValueError):
+            AdaptiveLimit(initial=4, maximum=2)
+
+
+def test_throttle():
+    clock = Clock()
+    throttle = Throttle(limit=AdaptiveLimit(initial=2, clock=clock), clock=clock)
+    throttle.acquire()
+    throttle.acquire()
+    assert throttle.active == 2
+    throttle.release(ok=False)
+    assert throttle.active == 1
+    assert throttle.limit.limit == 1
+
+@pytest.mark.asyncio
+async def test_async_throttle():
+    throttle = AsyncThrottle(limit=AdaptiveLimit(initial=2))
+    active = []
+
+    async def request():
+        await throttle.acquire()
+        active.append(throttle.active)
+        await asyncio.sleep(0.01)
+        await throttle.release(ok=True, latency=0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert max(active) == 2
+    assert throttle.active == 0
+
+@pytest.mark.asyncio
+async def test_async_throttle_urgent():
+    throttle = AsyncThrottle(rate=1., limit=AdaptiveLimit(initial=1, maximum=1))
+    await throttle.acquire()
+    waiting = asyncio.ensure_future(throttle.acquire())
+    await asyncio.sleep(0)
+    # Urgent requests skip both the rate and the concurrency limit.
+    await asyncio.wait_for(throttle.acquire(urgent=True), 0.5)
+    assert throttle.active == 2
+    assert not waiting.done()
+    waiting.cancel()
+
+async def _active(throttle):
+    return throttle.active
+
+def test_async_throttle_loops():
+    throttle = AsyncThrottle(limit=AdaptiveLimit(initial=1))
+    first = asyncio.new_event_loop()
+    second = asyncio.new_event_loop()
+    try:
+        first.run_until_complete(throttle.acquire())
+        # Requests in flight in one loop do not block another loop, and
+        # are not forgotten.
+        second.run_until_complete(throttle.acquire())
+        assert second.run_until_complete(_active(throttle)) == 1
+        first.run_until_complete(throttle.release(ok=True))
+        assert first.run_until_complete(_active(throttle)) == 0
+        assert second.run_until_complete(_active(throttle)) == 1
+    finally:
+        first.close()
+        second.close()
+
+class TestRetry(object):
+    def flaky(self, failures, exc=OSError):
+        calls = []
+
+        def function():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise exc("boom")
+            return len(calls)
+        return function, calls
+
+    def test_retries(self):
+        function, calls = self.flaky(2)
+        delays = []
+        result = retry(function, lambda exc: 0.5, delay=lambda n: n / 10,
+                       sleep=delays.append)
+        assert result == 3
+        assert delays == [0.5, 0.5]
+
+    def test_uses_longer_delay(self):
+        function, calls = self.flaky(1)
+        delays = []
+        retry(function, lambda exc: 0., delay=lambda n: 2., sleep=delays.append)
+        assert delays == [2.]
+
+    def test_gives_up(self):
+        function, calls = self.flaky(5)
+        with pytest.raises(OSError):
+            retry(function, lambda exc: 0., attempts=3, sleep=lambda delay: None)
+        assert len(calls) == 3
+
+    def test_not_retried(self):
+        function, calls = self.flaky(1, KeyError)
+        with pytest.raises(KeyError):
+            retry(function, lambda exc: None, sleep=lambda delay: None)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_async(self):
+        function, calls = self.flaky(2)
+
+        async def coroutine():
+            return function()
+
+        result = await retry_async(coroutine, lambda exc: 0., delay=lambda n: 0.)
+        assert result == 3
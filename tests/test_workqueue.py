@@ -0,0 +1,145 @@
+from aioresponses import aioresponses
+import sqlite3
+
+import pytest
+
+from solardat.http import BASE_URL
+from solardat.sync import MANIFEST_NAME, ManifestEntry, local_path
+from solardat.workqueue import DONE, FAILED, LEASED, PENDING, WorkQueue, work
+
+
+PATHS = [f"download/Archive/SIRO16{month:02d}.txt" for month in range(1, 6)]
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    with WorkQueue(tmp_path / "queue.db", lease=60, max_attempts=2, clock=clock) as queue:
+        queue.add(PATHS)
+        yield queue
+
+
+class TestWorkQueue(object):
+    def test_add(self, queue):
+        assert queue.add(PATHS[:2] + ["download/Archive/SIRO1606.txt"]) == 1
+        assert queue.counts() == {PENDING: 6, LEASED: 0, DONE: 0, FAILED: 0}
+
+    def test_claims_disjoint_batches(self, queue):
+        first = queue.claim("a", 2)
+        second = queue.claim("b", 2)
+        third = queue.claim("c", 2)
+        assert first == PATHS[:2]
+        assert second == PATHS[2:4]
+        assert third == PATHS[4:]
+        assert queue.claim("d", 2) == []
+
+    def test_shared_file(self, queue, tmp_path, clock):
+        other = WorkQueue(tmp_path / "queue.db", clock=clock)
+        assert queue.claim("a", 3) == PATHS[:3]
+        assert other.claim("b", 3) == PATHS[3:]
+        other.close()
+
+    def test_complete(self, queue):
+        claimed = queue.claim("a", 2)
+        # Paths leased by another worker are not completed.
+        assert queue.complete("b", claimed) == 0
+        assert queue.complete("a", claimed) == 2
+        assert queue.counts()[DONE] == 2
+
+    def test_validators(self, queue):
+        claimed = queue.claim("a", 2)
+        entry = ManifestEntry('"abc"', 10, 1000.)
+        queue.complete("a", claimed, {claimed[0]: entry})
+        assert queue.validators() == {claimed[0]: entry}
+        assert queue.validators(claimed[1:]) == {}
+
+    def test_expired_lease(self, queue, clock):
+        claimed = queue.claim("a", 2)
+        clock.now += 61
+        assert queue.claim("b", 2) == claimed
+        # The original worker lost its leases.
+        assert queue.heartbeat("a") == 0
+        assert queue.complete("a", claimed) == 0
+
+    def test_heartbeat(self, queue, clock):
+        claimed = queue.claim("a", 2)
+        clock.now += 50
+        assert queue.heartbeat("a") == 2
+        clock.now += 50
+        assert queue.claim("b", 2) == PATHS[2:4]
+        assert queue.complete("a", claimed) == 2
+
+    def test_fail_retries(self, queue):
+        path, = queue.claim("a", 1)
+        queue.fail("a", {path: "boom"})
+        assert queue.claim("a", 1) == [path]
+        queue.fail("a", {path: "boom"})
+        # Out of attempts.
+        assert queue.counts()[FAILED] == 1
+        assert queue.claim("a", 1) == [PATHS[1]]
+
+    def test_reclaim(self, queue, clock):
+        queue.claim("a", 1)
+        queue.claim("b", 1)
+        clock.now += 61
+        queue.claim("a", 1)
+        clock.now += 61
+
+        # The first path used up its attempts.
+        assert queue.reclaim() == 2
+        counts = queue.counts()
+        assert counts[FAILED] == 1
+        assert counts[PENDING] == 4
+
+
+def test_adds_columns(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "queue.db"))
+    connection.execute(
+        """
+        CREATE TABLE jobs (
+            path TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            owner TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at REAL NOT NULL
+        )
+        """
+    )
+    connection.close()
+
+    with WorkQueue(tmp_path / "queue.db") as queue:
+        queue.add(PATHS[:1])
+        queue.complete("a", queue.claim("a"), {PATHS[0]: ManifestEntry(None, 1, 0.)})
+        assert list(queue.validators()) == PATHS[:1]
+
+
+def test_work(tmp_path, archival_data):
+    with WorkQueue(tmp_path / "queue.db") as queue:
+        queue.add(PATHS[:3])
+        with aioresponses() as mocked:
+            mocked.get(f"{BASE_URL}/{PATHS[0]}", body=archival_data)
+            mocked.get(f"{BASE_URL}/{PATHS[1]}", body=archival_data)
+            mocked.get(f"{BASE_URL}/{PATHS[2]}", status=404, repeat=True)
+            result = work(queue, tmp_path / "mirror", worker="a", batch_size=2)
+
+        assert sorted(result.fetched) == PATHS[:2]
+        assert list(result.failed) == [PATHS[2]]
+        assert local_path(tmp_path / "mirror", PATHS[0]).exists()
+        # Validators are kept in the queue, not in a shared manifest.
+        assert not (tmp_path / "mirror" / MANIFEST_NAME).exists()
+        assert sorted(queue.validators()) == PATHS[:2]
+        counts = queue.counts()
+        assert counts[DONE] == 2
+        assert counts[PENDING] + counts[FAILED] == 1